@@ -1,31 +1,7 @@
 import time
 import numpy as np
 import matplotlib.pyplot as plt
-from lightbinpack import ffd, nf, bfd, obfd, obfdp
-
-
-def verify_packing(original_lengths, bin_results, max_length):
-    """Verify if the packing result is valid."""
-    packed_items = set()
-    for bin_items in bin_results:
-        packed_items.update(bin_items)
-    if len(packed_items) != len(original_lengths):
-        return False
-
-    for bin_items in bin_results:
-        if sum(original_lengths[i] for i in bin_items) > max_length:
-            return False
-
-    return True
-
-
-def calculate_utilization(original_lengths, bin_results, max_length):
-    """Calculate space utilization"""
-    used_space = sum(
-        sum(original_lengths[i] for i in bin_items) for bin_items in bin_results
-    )
-    total_space = len(bin_results) * max_length
-    return used_space / total_space
+from lightbinpack import ffd, nf, bfd, obfd, obfdp, evaluate
 
 
 def run_benchmark(algorithm, sizes, lengths, max_length, num_runs=3):
@@ -37,16 +13,17 @@ def run_benchmark(algorithm, sizes, lengths, max_length, num_runs=3):
         total_util = 0
         for _ in range(num_runs):
             data = lengths[:size]
-            start = time.time()
+            start = time.perf_counter()
             result = algorithm(data, max_length)
-            end = time.time()
+            end = time.perf_counter()
 
-            assert verify_packing(data, result, max_length), (
+            metrics = evaluate(result, data, max_length)
+            assert metrics["valid"], (
                 f"Algorithm {algorithm.__name__} failed validation at data size {size}"
             )
 
             total_time += end - start
-            total_util += calculate_utilization(data, result, max_length)
+            total_util += metrics["utilization"]
 
         time_results.append(total_time / num_runs)
         util_results.append(total_util / num_runs)
@@ -1,63 +1,7 @@
 import time
 import numpy as np
 import matplotlib.pyplot as plt
-from lightbinpack import ogbfd, ogbfdp, ohgbfd
-
-
-def verify_packing(original_lengths, bin_results, max_length):
-    """Verify if the packing result is valid."""
-    packed_items = set()
-    for group in bin_results:
-        for bin_items in group:
-            packed_items.update(bin_items)
-
-    if len(packed_items) != len(original_lengths):
-        return False
-
-    for group in bin_results:
-        for bin_items in group:
-            if sum(original_lengths[i] for i in bin_items) > max_length:
-                return False
-
-    return True
-
-
-def calculate_utilization(original_lengths, bin_results, max_length):
-    """Calculate space utilization"""
-    total_bins = sum(len(group) for group in bin_results)
-    used_space = sum(
-        sum(original_lengths[i] for i in bin_items)
-        for group in bin_results
-        for bin_items in group
-    )
-    total_space = total_bins * max_length
-    return used_space / total_space
-
-
-def calculate_square_sum_balance(original_lengths, bin_results):
-    """Calculate normalized load balance metrics using sum of squares for each group"""
-    if not bin_results:
-        return 0.0
-
-    group_imbalances = []
-    for group in bin_results:
-        group_square_sums = [
-            sum(original_lengths[i] * original_lengths[i] for i in bin_items)
-            for bin_items in group
-            if bin_items
-        ]
-
-        if group_square_sums:
-            max_square_sum = max(group_square_sums)
-            min_square_sum = min(group_square_sums)
-            group_imbalance = (
-                (max_square_sum - min_square_sum) / max_square_sum
-                if max_square_sum > 0
-                else 0.0
-            )
-            group_imbalances.append(group_imbalance)
-
-    return sum(group_imbalances) / len(group_imbalances) if group_imbalances else 0.0
+from lightbinpack import ogbfd, ogbfdp, ohgbfd, evaluate
 
 
 def count_bin_groups(bin_results):
@@ -83,23 +27,24 @@ def run_balance_benchmark(
         for _ in range(num_runs):
             data = lengths[:size]
 
-            start = time.time()
+            start = time.perf_counter()
             if algorithm.__name__ == "ohgbfd":
                 batch_max_lengths = [max_length] * bins_per_group
-                result = algorithm(data, batch_max_lengths, strategy=strategy)
+                result = algorithm(data, batch_max_lengths)
             elif algorithm.__name__ in ["ogbfd", "ogbfdp"]:
                 result = algorithm(data, max_length, bins_per_group, strategy=strategy)
             else:
                 result = algorithm(data, max_length)
-            end = time.time()
+            end = time.perf_counter()
 
-            assert verify_packing(data, result, max_length), (
+            metrics = evaluate(result, data, max_length)
+            assert metrics["valid"], (
                 f"Algorithm {algorithm.__name__} failed validation at data size {size}"
             )
 
             total_time += end - start
-            total_util += calculate_utilization(data, result, max_length)
-            total_balance += calculate_square_sum_balance(data, result)
+            total_util += metrics["utilization"]
+            total_balance += metrics["group_imbalance"]
             total_groups += count_bin_groups(result)
 
         time_results.append(total_time / num_runs)
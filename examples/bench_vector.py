@@ -0,0 +1,92 @@
+import time
+import numpy as np
+from lightbinpack import obfd, ogbfd, ovbfd, ovgbfd
+
+
+def generate_multimodal_sizes(size, rng):
+    """Generate (tokens, images, vision FLOPs) sizes for multimodal samples"""
+    tokens = rng.integers(1000, 20000, size)
+    images = np.minimum(rng.poisson(tokens / 5000), 6)
+    patches_per_image = rng.choice([256, 576, 1024, 2304], size)
+    vision_flops = images * patches_per_image * patches_per_image // 1024
+    return np.stack([tokens, images, vision_flops], axis=1)
+
+
+def flatten_groups(result):
+    """Flatten grouped results into a list of bins"""
+    if result and isinstance(result[0][0], list):
+        return [bin_items for group in result for bin_items in group]
+    return result
+
+
+def calculate_violations(sizes, bin_results, capacity):
+    """Calculate the fraction of non-empty bins exceeding any capacity"""
+    bins = [bin_items for bin_items in flatten_groups(bin_results) if bin_items]
+    overflow = sum(
+        1 for bin_items in bins if (sizes[bin_items].sum(axis=0) > capacity).any()
+    )
+    return overflow / len(bins)
+
+
+def calculate_utilization(sizes, bin_results, capacity):
+    """Calculate per-dimension space utilization"""
+    bins = flatten_groups(bin_results)
+    return sizes.sum(axis=0) / (len(bins) * np.asarray(capacity))
+
+
+def run_benchmark(algorithm, sizes, capacity, vector, bins_per_group=None):
+    """Run a token-only or vector packing benchmark"""
+    args = (sizes, capacity) if vector else (sizes[:, 0].tolist(), capacity[0])
+    if bins_per_group is not None:
+        args += (bins_per_group,)
+
+    start = time.perf_counter()
+    result = algorithm(*args)
+    end = time.perf_counter()
+
+    return (
+        end - start,
+        len(flatten_groups(result)),
+        calculate_utilization(sizes, result, capacity),
+        calculate_violations(sizes, result, capacity),
+    )
+
+
+def main():
+    sizes = [10000, 50000, 100000, 500000]
+    capacity = [50000, 12, 32000]
+    bins_per_group = 8
+
+    rng = np.random.default_rng(0)
+    data = generate_multimodal_sizes(max(sizes), rng)
+
+    print("\nVector Packing Benchmark Results:")
+    print("-" * 90)
+    print(
+        f"{'Size':>8} {'Algorithm':>10} {'Time(s)':>8} {'Bins':>8} "
+        f"{'Token%':>8} {'Image%':>8} {'FLOPs%':>8} {'Overflow%':>10}"
+    )
+    print("-" * 90)
+
+    for size in sizes:
+        subset = data[:size]
+        results = {
+            "OBFD": run_benchmark(obfd, subset, capacity, vector=False),
+            "OVBFD": run_benchmark(ovbfd, subset, capacity, vector=True),
+            "OGBFD": run_benchmark(
+                ogbfd, subset, capacity, vector=False, bins_per_group=bins_per_group
+            ),
+            "OVGBFD": run_benchmark(
+                ovgbfd, subset, capacity, vector=True, bins_per_group=bins_per_group
+            ),
+        }
+        for name, (elapsed, bins, utilization, violations) in results.items():
+            print(
+                f"{size:>8} {name:>10} {elapsed:>8.3f} {bins:>8} "
+                f"{utilization[0]:>8.2%} {utilization[1]:>8.2%} "
+                f"{utilization[2]:>8.2%} {violations:>10.2%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
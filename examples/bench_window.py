@@ -0,0 +1,70 @@
+import time
+import numpy as np
+from lightbinpack import nf, obfd, owbfd, evaluate
+
+
+def generate_curriculum_lengths(size, max_length, rng):
+    """Generate lengths whose typical size grows over the epoch"""
+    progress = np.linspace(0.0, 1.0, size)
+    medians = max_length / 64 * (1 + 7 * progress)
+    lengths = rng.lognormal(np.log(medians), 0.8)
+    return np.clip(np.rint(lengths), 1, max_length).astype(int).tolist()
+
+
+def calculate_displacement(bin_results):
+    """Calculate the max and mean distance between input and packed positions"""
+    order = np.fromiter(
+        (idx for bin_items in bin_results for idx in bin_items), dtype=np.int64
+    )
+    distance = np.abs(order - np.arange(len(order)))
+    return int(distance.max()), float(distance.mean())
+
+
+def run_benchmark(algorithm, lengths, max_length, *args):
+    """Run a packing benchmark and report time, utilization and reordering"""
+    start = time.perf_counter()
+    result = algorithm(lengths, max_length, *args)
+    end = time.perf_counter()
+
+    metrics = evaluate(result, lengths, max_length)
+    assert metrics["valid"], f"{algorithm.__name__} produced an invalid plan"
+
+    return (
+        end - start,
+        metrics["num_bins"],
+        metrics["utilization"],
+        *calculate_displacement(result),
+    )
+
+
+def main():
+    size = 500000
+    max_length = 8192
+    window_sizes = [64, 256, 1024, 4096, 16384, 65536]
+
+    rng = np.random.default_rng(0)
+    lengths = generate_curriculum_lengths(size, max_length, rng)
+
+    results = {"NF": run_benchmark(nf, np.array(lengths, dtype=float), max_length)}
+    for window_size in window_sizes:
+        results[f"OWBFD-{window_size}"] = run_benchmark(
+            owbfd, lengths, max_length, window_size
+        )
+    results["OBFD"] = run_benchmark(obfd, lengths, max_length)
+
+    print("\nWindowed Packing Benchmark Results:")
+    print("-" * 70)
+    print(
+        f"{'Algorithm':>12} {'Time(s)':>8} {'Bins':>8} {'Util%':>8} "
+        f"{'MaxShift':>10} {'MeanShift':>10}"
+    )
+    print("-" * 70)
+    for name, (elapsed, bins, utilization, max_shift, mean_shift) in results.items():
+        print(
+            f"{name:>12} {elapsed:>8.3f} {bins:>8} {utilization:>8.2%} "
+            f"{max_shift:>10} {mean_shift:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import multiprocessing
+import numpy as np
+from lightbinpack import pack, evaluate, set_num_threads
+
+lengths = np.random.default_rng(0).integers(1, 4000, 100000).tolist()
+batch_max_length = 8192
+
+
+def worker(backend):
+    # Runs in a forked child, like a dataloader worker
+    results = pack(
+        lengths, batch_max_length, strategy="ogbfdp", dp_size=8, backend=backend
+    )
+    print(f"child ({backend}):", evaluate(results, lengths, batch_max_length)["valid"])
+
+
+if __name__ == "__main__":
+    # Cap the threads or worker processes of parallel algorithms
+    set_num_threads(4)
+
+    # OpenMP runs multi-threaded in the parent before forking
+    results = pack(lengths, batch_max_length, strategy="ogbfdp", dp_size=8)
+    print("parent:", evaluate(results, lengths, batch_max_length)["valid"])
+
+    context = multiprocessing.get_context("fork")
+    for backend in ["openmp", "process"]:
+        process = context.Process(target=worker, args=(backend,))
+        process.start()
+        process.join()
@@ -1,16 +1,38 @@
-from lightbinpack.cpp.ffd import ffd
 from lightbinpack.cpp.nf import nf
-from lightbinpack.cpp.bfd import bfd
 from lightbinpack.cpp.obfd import obfd
-from lightbinpack.cpp.obfdp import obfdp
 from lightbinpack.cpp.ogbfd import ogbfd
-from lightbinpack.cpp.ogbfdp import ogbfdp
 from lightbinpack.cpp.ohgbfd import ohgbfd
 from lightbinpack.cpp.oshgbfd import oshgbfd
 from lightbinpack.cpp.radix_sort import radix_sort
 from lightbinpack.cpp.radix_merge import radix_merge
-from lightbinpack.cpp.load_balance import load_balance
-from lightbinpack.packing import pack, PackingStrategy
+from lightbinpack.cpp.obfdu import obfdu
+from lightbinpack.cpp.ogbfdu import ogbfdu
+from lightbinpack.cpp.ovbfd import ovbfd
+from lightbinpack.cpp.ovgbfd import ovgbfd
+from lightbinpack.cpp.owbfd import owbfd
+from lightbinpack.backend import (
+    ExecutionBackend,
+    load_balance,
+    set_num_threads,
+    get_num_threads,
+    ffd,
+    bfd,
+    obfdp,
+    ogbfdp,
+    ohgbfdp,
+    oshgbfdp,
+    oobfd,
+    oogbfd,
+)
+from lightbinpack.packing import (
+    pack,
+    pack_update,
+    pack_file,
+    evaluate,
+    PackingStrategy,
+    PlanUpdater,
+)
+from lightbinpack.auto import calibrate, select_strategy
 
 __version__ = "0.1.1"
 __all__ = [
@@ -22,10 +44,28 @@ __all__ = [
     "ogbfd",
     "ogbfdp",
     "ohgbfd",
+    "ohgbfdp",
     "oshgbfd",
+    "oshgbfdp",
     "radix_sort",
     "radix_merge",
     "load_balance",
+    "obfdu",
+    "ogbfdu",
+    "oobfd",
+    "oogbfd",
+    "ovbfd",
+    "ovgbfd",
+    "owbfd",
     "pack",
+    "pack_update",
+    "PlanUpdater",
+    "pack_file",
+    "evaluate",
     "PackingStrategy",
+    "calibrate",
+    "select_strategy",
+    "ExecutionBackend",
+    "set_num_threads",
+    "get_num_threads",
 ]
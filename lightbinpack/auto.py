@@ -0,0 +1,576 @@
+import json
+import logging
+import os
+import time
+import warnings
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from lightbinpack import (
+    bfd,
+    obfd,
+    obfdp,
+    ogbfd,
+    ogbfdp,
+    ohgbfd,
+    ohgbfdp,
+    oshgbfd,
+    oshgbfdp,
+)
+from lightbinpack.backend import (
+    default_num_threads,
+    resolve_num_threads,
+)
+from lightbinpack.packing import PackingStrategy, PackingVariant, evaluate
+
+logger = logging.getLogger(__name__)
+
+COST_MODEL_VERSION = 2
+
+# Parallel kernels trade a little packing quality for speed, so they are only
+# selected when predicted to be at least this much faster than the serial one.
+PARALLEL_SPEEDUP_THRESHOLD = 1.1
+
+# Without a cost model, the parallel kernel of a family is used above this
+# many items, the size at which the native kernels use 4 threads.
+FALLBACK_PARALLEL_ITEMS = 100000
+
+# Default model calibrated on a reference machine and shipped with the
+# package, used until the caller calibrates one for the local machine.
+BUNDLED_COST_MODEL_PATH = os.path.join(os.path.dirname(__file__), "cost_model.json")
+
+
+def _group_capacities(capacity: int, group_size: int) -> List[int]:
+    """Heterogeneous capacities of a synthetic group: one full bin, the rest half"""
+    return [capacity] + [max(1, capacity // 2)] * (group_size - 1)
+
+
+def _combination_capacities(capacity: int, group_size: int) -> List[List[int]]:
+    """Bin combinations of a synthetic OSHGBFD input with ``group_size`` bins each"""
+    return [
+        _group_capacities(capacity, group_size),
+        [max(1, capacity // 2)] * group_size,
+    ]
+
+
+# Kernels timed by the calibration micro-benchmark. Each entry maps a kernel
+# name to (strategy, whether it takes num_threads, whether it packs groups,
+# call with synthetic input of capacity c, group size g and t threads).
+_KERNELS: Dict[str, Tuple[PackingStrategy, bool, bool, Callable]] = {
+    "obfd": (
+        PackingStrategy.OBFD,
+        False,
+        False,
+        lambda lengths, c, g, t: obfd(lengths, c),
+    ),
+    "obfdp": (
+        PackingStrategy.OBFDP,
+        True,
+        False,
+        lambda lengths, c, g, t: obfdp(lengths, c, -1, t),
+    ),
+    "bfd": (
+        PackingStrategy.BFD,
+        False,
+        False,
+        lambda lengths, c, g, t: bfd(lengths, c, 0, t),
+    ),
+    "ogbfd": (
+        PackingStrategy.OGBFD,
+        False,
+        True,
+        lambda lengths, c, g, t: ogbfd(lengths, c, g),
+    ),
+    "ogbfdp": (
+        PackingStrategy.OGBFDP,
+        True,
+        True,
+        lambda lengths, c, g, t: ogbfdp(lengths, c, g, -1, 0, t),
+    ),
+    "ohgbfd": (
+        PackingStrategy.OHGBFD,
+        False,
+        True,
+        lambda lengths, c, g, t: ohgbfd(lengths, _group_capacities(c, g)),
+    ),
+    "ohgbfdp": (
+        PackingStrategy.OHGBFDP,
+        True,
+        True,
+        lambda lengths, c, g, t: ohgbfdp(lengths, _group_capacities(c, g), -1, [], t),
+    ),
+    "oshgbfd": (
+        PackingStrategy.OSHGBFD,
+        False,
+        True,
+        lambda lengths, c, g, t: oshgbfd(lengths, _combination_capacities(c, g)),
+    ),
+    "oshgbfdp": (
+        PackingStrategy.OSHGBFDP,
+        True,
+        True,
+        lambda lengths, c, g, t: oshgbfdp(
+            lengths, _combination_capacities(c, g), -1, [], t
+        ),
+    ),
+}
+
+_cost_models: Dict[str, Dict[str, Any]] = {}
+
+
+def _thread_candidates(max_threads: int) -> List[int]:
+    """Thread counts considered for parallel kernels: powers of two and the maximum"""
+    candidates = []
+    threads = 2
+    while threads < max_threads:
+        candidates.append(threads)
+        threads *= 2
+    candidates.append(max(max_threads, 2))
+    return candidates
+
+
+def _cost_features(
+    num_items: int,
+    capacity: float,
+    max_length: float,
+    mean_length: float,
+    group_size: int = 1,
+) -> List[float]:
+    """
+    Regressors of the cost model
+
+    The number of items N and the bin capacity L (the size of the
+    capacity-indexed segment tree), the largest item length (the size of the
+    counting sort), the expected number of bins N * mean / L, which drives
+    the sparse index of BFD, and N times the number of bins per group G,
+    the cost of choosing a bin within a group in the grouped kernels.
+    """
+    bins = num_items * mean_length / capacity if capacity > 0 else 0.0
+    return [
+        float(num_items),
+        float(capacity),
+        float(max_length),
+        bins,
+        float(num_items * group_size),
+    ]
+
+
+def _nnls(features: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Non-negative least squares by the Lawson-Hanson active set method
+
+    Columns are scaled to unit norm first, as the regressors span several
+    orders of magnitude.
+    """
+    scale = np.linalg.norm(features, axis=0)
+    scale[scale == 0] = 1.0
+    a = features / scale
+    num_features = a.shape[1]
+    x = np.zeros(num_features)
+    passive = np.zeros(num_features, dtype=bool)
+    tol = 1e-10 * max(1.0, float(np.abs(a.T @ targets).max(initial=0.0)))
+    for _ in range(3 * num_features):
+        gradient = a.T @ (targets - a @ x)
+        if passive.all() or gradient[~passive].max() <= tol:
+            break
+        passive[np.argmax(np.where(passive, -np.inf, gradient))] = True
+        while True:
+            z = np.zeros(num_features)
+            if passive.any():
+                z[passive] = np.linalg.lstsq(a[:, passive], targets, rcond=None)[0]
+            if (z[passive] > 0).all():
+                x = z
+                break
+            # Step towards z until a coefficient hits zero, then drop it
+            blocking = passive & (z <= 0)
+            denominator = x[blocking] - z[blocking]
+            alpha = np.min(
+                np.divide(
+                    x[blocking],
+                    denominator,
+                    out=np.zeros_like(denominator),
+                    where=denominator > 0,
+                )
+            )
+            x = x + alpha * (z - x)
+            passive &= x > 0
+            x[~passive] = 0.0
+    return x / scale
+
+
+def auto_calibration_enabled() -> bool:
+    """
+    Whether ``strategy="auto"`` may calibrate a missing cost model itself
+
+    Enabled by setting the LIGHTBINPACK_AUTO_CALIBRATE environment variable
+    to 1. Otherwise the bundled default model is used until ``calibrate`` is
+    called.
+    """
+    return os.environ.get("LIGHTBINPACK_AUTO_CALIBRATE", "0").strip() == "1"
+
+
+def default_cost_model_path() -> str:
+    """Path of the cached cost model, overridable with LIGHTBINPACK_COST_MODEL"""
+    path = os.environ.get("LIGHTBINPACK_COST_MODEL")
+    if path:
+        return path
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_dir, "lightbinpack", "cost_model.json")
+
+
+def calibrate(
+    sizes: Tuple[int, ...] = (20000, 200000),
+    capacities: Tuple[int, ...] = (4096, 1 << 20),
+    length_ratios: Tuple[int, ...] = (4, 64),
+    group_sizes: Tuple[int, ...] = (2, 8, 32),
+    repeat: int = 2,
+    random_seed: int = 0,
+    path: Optional[Union[str, os.PathLike]] = None,
+) -> Dict[str, Any]:
+    """
+    Calibrate the cost model with a micro-benchmark on the local machine
+
+    Every kernel (and every candidate thread count of the parallel kernels)
+    is timed on uniform synthetic lengths for each combination of ``sizes``,
+    ``capacities`` and ``length_ratios``, and the grouped kernels also for
+    each of ``group_sizes``. A linear model in the number of items N, the
+    bin capacity L, the largest item length, the expected number of bins
+    N * mean / L and N times the group size is then fitted per kernel by
+    non-negative least squares, so the prediction follows the length
+    distribution and the group size as well as the input size. The model is
+    also cached in memory for ``path``, so later ``strategy="auto"`` calls
+    use it.
+
+    Args:
+        sizes: Numbers of items to time
+        capacities: Bin capacities to time
+        length_ratios: Lengths are drawn uniformly up to capacity / ratio
+        group_sizes: Bins per group timed for the grouped kernels
+        repeat: Number of runs per measurement, the fastest one is kept
+        random_seed: Seed for the synthetic lengths
+        path: Where to save the model as JSON. If None, it is not saved
+
+    Returns:
+        Cost model dictionary with keys ``version``, ``max_threads`` and
+        ``kernels``, mapping kernel name to thread count to coefficients
+    """
+    max_threads = default_num_threads()
+    rng = np.random.default_rng(random_seed)
+    inputs = []
+    for capacity in capacities:
+        for ratio in length_ratios:
+            max_length = max(1, capacity // ratio)
+            for size in sizes:
+                inputs.append(
+                    (
+                        rng.integers(1, max_length + 1, size).tolist(),
+                        capacity,
+                        max_length,
+                    )
+                )
+
+    kernels: Dict[str, Dict[str, List[float]]] = {}
+    for name, (_, threaded, grouped, run) in _KERNELS.items():
+        points = [
+            (lengths, capacity, max_length, group_size)
+            for lengths, capacity, max_length in inputs
+            for group_size in (group_sizes if grouped else (1,))
+        ]
+        features = np.asarray(
+            [
+                _cost_features(
+                    len(lengths), capacity, max_length, (max_length + 1) / 2, group_size
+                )
+                for lengths, capacity, max_length, group_size in points
+            ]
+        )
+        kernels[name] = {}
+        for threads in (
+            _thread_candidates(resolve_num_threads(max_threads)) if threaded else [1]
+        ):
+            timings = []
+            for lengths, capacity, _, group_size in points:
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    run(lengths, capacity, group_size, threads)
+                    best = min(best, time.perf_counter() - start)
+                timings.append(best)
+            kernels[name][str(threads)] = _nnls(features, np.asarray(timings)).tolist()
+            logger.debug("Calibrated %s with %d threads: %s", name, threads, timings)
+
+    model = {
+        "version": COST_MODEL_VERSION,
+        "max_threads": max_threads,
+        "kernels": kernels,
+    }
+
+    if path is not None:
+        _save_cost_model(model, path)
+        _cost_models[os.fspath(path)] = model
+
+    return model
+
+
+def _read_cost_model(path: Union[str, os.PathLike]) -> Optional[Dict[str, Any]]:
+    """Read a cost model, None when missing, unreadable or of another version"""
+    try:
+        with open(path) as f:
+            model = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(model, dict) or model.get("version") != COST_MODEL_VERSION:
+        return None
+    return model
+
+
+def _save_cost_model(model: Dict[str, Any], path: Union[str, os.PathLike]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(model, f, indent=2)
+
+
+def load_cost_model(
+    path: Optional[Union[str, os.PathLike]] = None, recalibrate: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Load the cost model calibrated for this machine, or the bundled default
+
+    A model cached at ``path`` is used when it was written by a compatible
+    version for the current thread count. Otherwise the model is calibrated
+    and cached when ``recalibrate`` is set or ``auto_calibration_enabled()``
+    is True, which takes several seconds, and the bundled default model is
+    used when it is not. Nothing is timed or written implicitly by default.
+
+    Args:
+        path: Cache file. If None, uses ``default_cost_model_path()``
+        recalibrate: Whether to ignore the cache and calibrate again
+
+    Returns:
+        Cost model dictionary as returned by ``calibrate``, or None when not
+        even the bundled model can be read
+    """
+    path = os.fspath(path) if path is not None else default_cost_model_path()
+    if not recalibrate and path in _cost_models:
+        return _cost_models[path]
+
+    model = None
+    if not recalibrate:
+        model = _read_cost_model(path)
+        if model is not None and model.get("max_threads") != default_num_threads():
+            model = None
+
+    if model is None and (recalibrate or auto_calibration_enabled()):
+        if not recalibrate:
+            warnings.warn(
+                "Calibrating the strategy='auto' cost model, which takes several "
+                f"seconds, and caching it in {path}."
+            )
+        model = calibrate()
+        try:
+            _save_cost_model(model, path)
+        except OSError as e:
+            logger.warning("Could not save cost model to %s: %s", path, e)
+
+    if model is None:
+        model = _read_cost_model(BUNDLED_COST_MODEL_PATH)
+
+    _cost_models[path] = model
+    return model
+
+
+def _predict_time(coefficients: List[float], features: List[float]) -> float:
+    return float(np.dot(coefficients, features))
+
+
+def select_strategy(
+    lengths: Union[List[Union[int, float]], np.ndarray],
+    batch_max_length: Union[float, int, List[int], List[List[int]]],
+    dp_size: int = 1,
+    variant: Optional[Union[str, PackingVariant]] = None,
+    weights: Optional[List[int]] = None,
+    cost_model: Optional[Dict[str, Any]] = None,
+    sample_size: int = 10000,
+    random_seed: int = 0,
+    add_noise: bool = False,
+) -> Dict[str, Any]:
+    """
+    Choose a packing kernel and thread count with the calibrated cost model
+
+    The output format is fixed by ``batch_max_length`` and ``variant`` as in
+    ``pack``; within that family the serial, parallel and sparse-index (BFD,
+    whose cost does not grow with the capacity) kernels are compared by
+    predicted time. The prediction uses the number of items, the capacity
+    and the number of bins per group (``dp_size``, or the number of
+    capacities of the heterogeneous algorithms) together with the largest
+    and mean length of a random sample.
+    Non-integer lengths can only use BFD, and kernels that do not support
+    the caller's options are skipped. The utilization is predicted by
+    packing the sample with the serial kernel of the family, so it only
+    depends on the input and not on the model or earlier calls. Thread
+    counts above the local core count are not considered.
+
+    Without a cost model (see ``load_cost_model``), the serial kernel of the
+    family is chosen, or its parallel version above
+    ``FALLBACK_PARALLEL_ITEMS`` items.
+
+    Args:
+        lengths: Item lengths
+        batch_max_length: Bin capacity in any format accepted by ``pack``
+        dp_size: Number of bins per group
+        variant: Packing variant ("linear"/"square"), defaults to grouped
+        weights: Optional weights for heterogeneous algorithms
+        cost_model: Cost model to use. If None, uses ``load_cost_model()``
+        sample_size: Number of lengths sampled for the features and
+            utilization prediction
+        random_seed: Seed for the sample
+        add_noise: Whether ``pack`` adds noise to the lengths, which BFD
+            does not support
+
+    Returns:
+        Dictionary with keys:
+        - strategy: Selected PackingStrategy
+        - num_threads: Thread count for parallel kernels, 1 for serial ones
+        - predicted_time: Predicted packing time in seconds, None without
+          a cost model
+        - predicted_utilization: Predicted bin utilization
+        - features: num_items, capacity, group_size, and max_length and
+          mean_length of the sampled lengths
+        - candidates: Predicted time of every considered kernel
+
+    Raises:
+        ValueError: When no kernel supports the input
+    """
+    if isinstance(variant, str):
+        try:
+            variant = PackingVariant(variant.lower())
+        except ValueError:
+            raise ValueError(f"Invalid variant: {variant}")
+
+    num_items = len(lengths)
+    rng = np.random.default_rng(random_seed)
+    if num_items > sample_size:
+        sample_indices = np.sort(rng.choice(num_items, sample_size, replace=False))
+    else:
+        sample_indices = np.arange(num_items)
+    if isinstance(lengths, np.ndarray):
+        sample = lengths[sample_indices]
+        integral = np.issubdtype(lengths.dtype, np.integer)
+    else:
+        sample = np.asarray([lengths[i] for i in sample_indices])
+        integral = all(isinstance(x, (int, np.integer)) for x in lengths)
+
+    if isinstance(batch_max_length, (list, tuple)):
+        if all(isinstance(x, (list, tuple)) for x in batch_max_length):
+            family = ["oshgbfd", "oshgbfdp"]
+            capacity = max(max(combination) for combination in batch_max_length)
+            group_size = max(len(combination) for combination in batch_max_length)
+        else:
+            family = ["ohgbfd", "ohgbfdp"]
+            capacity = max(batch_max_length)
+            group_size = len(batch_max_length)
+    elif variant == PackingVariant.LINEAR:
+        family = ["obfd", "obfdp", "bfd"] if integral else ["bfd"]
+        capacity = batch_max_length
+        group_size = 1
+    else:
+        family = ["ogbfd", "ogbfdp"]
+        capacity = batch_max_length
+        group_size = dp_size
+    if not integral and family != ["bfd"]:
+        raise ValueError(
+            "strategy='auto' requires integer lengths unless variant is 'linear'"
+        )
+    if add_noise:
+        # pack() only adds noise to the lengths of the integer kernels
+        if not integral:
+            raise ValueError("strategy='auto' with add_noise requires integer lengths")
+        family = [name for name in family if name != "bfd"]
+
+    features = {
+        "num_items": num_items,
+        "capacity": capacity,
+        "group_size": group_size,
+        "max_length": float(sample.max()) if len(sample) else 0.0,
+        "mean_length": float(sample.mean()) if len(sample) else 0.0,
+    }
+    regressors = _cost_features(
+        num_items,
+        capacity,
+        features["max_length"],
+        features["mean_length"],
+        group_size,
+    )
+
+    if cost_model is None:
+        cost_model = load_cost_model()
+
+    candidates: Dict[str, float] = {}
+    if cost_model is None:
+        if family == ["bfd"]:
+            name, num_threads = "bfd", 1
+        elif num_items > FALLBACK_PARALLEL_ITEMS:
+            name = family[1]
+            num_threads = resolve_num_threads(-1, num_items)
+        else:
+            name, num_threads = family[0], 1
+        predicted_time = None
+    else:
+        best = None
+        max_threads = max(2, default_num_threads())
+        for name in family:
+            threaded = _KERNELS[name][1]
+            for threads, coefficients in cost_model["kernels"][name].items():
+                if int(threads) > max_threads:
+                    continue
+                predicted = _predict_time(coefficients, regressors)
+                candidates[f"{name}:{threads}" if threaded else name] = predicted
+                score = (
+                    predicted * PARALLEL_SPEEDUP_THRESHOLD if threaded else predicted
+                )
+                if best is None or score < best[3]:
+                    best = (name, int(threads), predicted, score)
+        name, num_threads, predicted_time, _ = best
+    strategy = _KERNELS[name][0]
+
+    sample_lengths = sample.tolist()
+    sample_weights = [weights[i] for i in sample_indices] if weights else []
+    if family[0] == "oshgbfd":
+        sample_plan = oshgbfd(sample_lengths, batch_max_length, -1, sample_weights)
+    elif family[0] == "ohgbfd":
+        sample_plan = ohgbfd(sample_lengths, batch_max_length, -1, sample_weights)
+    elif family[0] == "ogbfd":
+        sample_plan = ogbfd(sample_lengths, batch_max_length, dp_size)
+    elif integral:
+        sample_plan = obfd(sample_lengths, batch_max_length)
+    else:
+        sample_plan = bfd(sample_lengths, batch_max_length, 0, 1)
+    predicted_utilization = (
+        evaluate(sample_plan, sample, batch_max_length)["utilization"]
+        if sample_plan
+        else 0.0
+    )
+
+    logger.info(
+        "strategy='auto' selected %s with %d threads for %d items "
+        "(capacity %s, max length %.0f, mean length %.1f): "
+        "predicted time %s, predicted utilization %.2f%%",
+        strategy.value,
+        num_threads,
+        num_items,
+        capacity,
+        features["max_length"],
+        features["mean_length"],
+        "unknown" if predicted_time is None else f"{predicted_time:.4f}s",
+        predicted_utilization * 100,
+    )
+
+    return {
+        "strategy": strategy,
+        "num_threads": num_threads,
+        "predicted_time": predicted_time,
+        "predicted_utilization": predicted_utilization,
+        "features": features,
+        "candidates": candidates,
+    }
@@ -0,0 +1,524 @@
+import atexit
+import functools
+import multiprocessing
+import multiprocessing.util
+import os
+import warnings
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, List, Optional, Tuple, Union
+from lightbinpack import obfd, ogbfd, ohgbfd, oshgbfd
+from lightbinpack.cpp.bfd import bfd as _bfd
+from lightbinpack.cpp.ffd import ffd as _ffd
+from lightbinpack.cpp.load_balance import load_balance as _load_balance
+from lightbinpack.cpp.obfdp import obfdp as _obfdp
+from lightbinpack.cpp.ogbfdp import ogbfdp as _ogbfdp
+from lightbinpack.cpp.ohgbfdp import ohgbfdp as _ohgbfdp
+from lightbinpack.cpp.oobfd import oobfd as _oobfd
+from lightbinpack.cpp.oogbfd import oogbfd as _oogbfd
+from lightbinpack.cpp.oshgbfdp import oshgbfdp as _oshgbfdp
+
+
+class ExecutionBackend(Enum):
+    """Enum class for execution backends of parallel algorithms"""
+
+    OPENMP = "openmp"  # OpenMP threads inside the native kernel
+    PROCESS = "process"  # Pool of worker processes over shared memory
+
+
+_num_threads_cap = int(os.environ.get("LIGHTBINPACK_NUM_THREADS", "-1") or -1)
+_openmp_used = False
+_forked_after_openmp = False
+_forked = False
+_fork_warned = False
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+_pool_workers = 0
+
+
+def _after_fork_in_child() -> None:
+    global _forked_after_openmp, _forked, _fork_warned
+    global _pool, _pool_pid, _pool_workers
+    # libgomp's thread pool does not survive fork: a multi-threaded region in
+    # the child of a process that already ran one deadlocks. Single-threaded
+    # regions do not touch the pool and stay safe.
+    _forked_after_openmp = _forked_after_openmp or _openmp_used
+    _forked = True
+    _fork_warned = False
+    # The parent's pool belongs to the parent, never shut it down from here
+    _pool = None
+    _pool_pid = None
+    _pool_workers = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def default_num_threads() -> int:
+    """Number of threads OpenMP uses by default in this process"""
+    env = os.environ.get("OMP_NUM_THREADS", "").split(",")[0]
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def set_num_threads(num_threads: int) -> None:
+    """
+    Cap the number of threads or worker processes used by parallel algorithms
+
+    Args:
+        num_threads: Maximum number of threads, or -1 to remove the cap.
+            Defaults to the LIGHTBINPACK_NUM_THREADS environment variable
+    """
+    global _num_threads_cap
+    _num_threads_cap = num_threads if num_threads > 0 else -1
+
+
+def get_num_threads() -> int:
+    """Current cap on threads or worker processes, -1 if unlimited"""
+    return _num_threads_cap
+
+
+def mark_openmp_used(num_threads: int) -> None:
+    """Record that a multi-threaded OpenMP region ran in this process"""
+    global _openmp_used
+    if num_threads != 1:
+        _openmp_used = True
+
+
+def _capped_num_threads(num_threads: int, num_items: int) -> int:
+    if num_threads <= 0:
+        num_threads = 1
+        if num_items > 20000:
+            num_threads = 2
+        if num_items > 100000:
+            num_threads = 4
+        if num_items > 500000:
+            num_threads = default_num_threads()
+    if _num_threads_cap > 0:
+        num_threads = min(num_threads, _num_threads_cap)
+    return num_threads
+
+
+def resolve_num_threads(num_threads: int = -1, num_items: int = 0) -> int:
+    """
+    Number of threads a parallel algorithm may safely use in this process
+
+    Without an explicit count, the size thresholds of the native kernels are
+    applied (2 threads above 20K items, 4 above 100K, all above 500K). The
+    result is limited by ``set_num_threads`` and forced to 1 in a process
+    forked after OpenMP ran multi-threaded, where libgomp would deadlock.
+
+    Args:
+        num_threads: Requested number of threads, -1 for automatic
+        num_items: Number of items to pack, used for the automatic count
+
+    Returns:
+        Number of threads to pass to the kernel
+    """
+    global _fork_warned
+    num_threads = _capped_num_threads(num_threads, num_items)
+    if _forked_after_openmp and num_threads > 1:
+        if not _fork_warned:
+            warnings.warn(
+                "OpenMP ran multi-threaded before this process was forked; "
+                "parallel packing uses a single thread to avoid a deadlock. "
+                'Use backend="process" to pack in parallel.'
+            )
+            _fork_warned = True
+        num_threads = 1
+    return num_threads
+
+
+def load_balance(
+    input_data: Union[List[int], List[List[int]], List[List[List[int]]]],
+    nodes: int = 2,
+    enable_parallel: bool = True,
+    num_threads: int = -1,
+) -> Union[List[int], List[List[int]], List[List[List[int]]]]:
+    """
+    Load balancing algorithm (experimental), safe to call across fork
+
+    Args:
+        input_data: 1D, 2D or 3D integer lists
+        nodes: Number of nodes to balance across
+        enable_parallel: Whether to balance lists in parallel (2D and 3D input)
+        num_threads: Number of OpenMP threads. If -1, uses all available
+            threads, subject to ``set_num_threads`` and fork safety
+
+    Returns:
+        Balanced lists in the same shape as the input
+    """
+    if input_data and not isinstance(input_data[0], (list, tuple, np.ndarray)):
+        return _load_balance(input_data, nodes)
+    if enable_parallel:
+        num_threads = resolve_num_threads(
+            num_threads if num_threads > 0 else default_num_threads()
+        )
+        mark_openmp_used(num_threads)
+    return _load_balance(input_data, nodes, enable_parallel, num_threads)
+
+
+def _fork_safe(kernel: Callable, num_threads_index: int) -> Callable:
+    # Route the num_threads argument of a native OpenMP kernel, positional at
+    # num_threads_index or by keyword, through resolve_num_threads so direct
+    # calls are capped and tracked exactly like pack()
+    @functools.wraps(kernel)
+    def wrapper(*args, **kwargs):
+        if len(args) > num_threads_index:
+            num_threads = args[num_threads_index]
+            args = args[:num_threads_index] + args[num_threads_index + 1 :]
+        else:
+            num_threads = kwargs.pop("num_threads", -1)
+        lengths = args[0] if args else kwargs["lengths"]
+        num_threads = resolve_num_threads(num_threads, len(lengths))
+        mark_openmp_used(num_threads)
+        return kernel(*args, num_threads=num_threads, **kwargs)
+
+    return wrapper
+
+
+ffd = _fork_safe(_ffd, 3)
+bfd = _fork_safe(_bfd, 3)
+obfdp = _fork_safe(_obfdp, 3)
+ogbfdp = _fork_safe(_ogbfdp, 5)
+ohgbfdp = _fork_safe(_ohgbfdp, 4)
+oshgbfdp = _fork_safe(_oshgbfdp, 4)
+oobfd = _fork_safe(_oobfd, 4)
+oogbfd = _fork_safe(_oogbfd, 6)
+
+
+def _get_pool(num_workers: int) -> ProcessPoolExecutor:
+    """Return the process pool, (re)creating it for this process if needed"""
+    global _pool, _pool_pid, _pool_workers
+    if _pool is not None and _pool_pid == os.getpid() and _pool_workers >= num_workers:
+        return _pool
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown()
+    # Never fork the workers: the caller may hold OpenMP or other threads.
+    # A forkserver inherited through fork belongs to the parent, so forked
+    # processes spawn their workers instead.
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods and not _forked else "spawn"
+    )
+    _pool = ProcessPoolExecutor(num_workers, mp_context=context)
+    _pool_pid = os.getpid()
+    _pool_workers = num_workers
+    # Processes started by multiprocessing skip atexit and join their
+    # children, including the idle workers, unless a finalizer shuts the pool
+    # down. It must run before the finalizers of the pool's queues.
+    multiprocessing.util.Finalize(None, _shutdown_pool, exitpriority=100)
+    return _pool
+
+
+def _shutdown_pool() -> None:
+    global _pool
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown()
+    _pool = None
+
+
+atexit.register(_shutdown_pool)
+
+
+def _pack_chunk(
+    kernel: str,
+    input_name: str,
+    output_name: str,
+    num_items: int,
+    has_weights: bool,
+    chunk: int,
+    num_chunks: int,
+    start: int,
+    args: Tuple[Any, ...],
+) -> Tuple[int, int]:
+    """
+    Pack items ``chunk::num_chunks`` with a serial kernel in a worker process
+
+    The chunk's items are written to its slot ``[start, start + size)`` of the
+    shared output: item indices bin after bin, and their bin ids
+    ``group * stride + bin`` (``-1`` for items of the last group, which are
+    repacked by the caller). Bin types of sequential heterogeneous groups go to the third
+    output row.
+
+    Returns:
+        Number of kept items and kept groups
+    """
+    input_shm = SharedMemory(name=input_name)
+    output_shm = SharedMemory(name=output_name)
+    try:
+        inputs = np.ndarray((2, num_items), dtype=np.int64, buffer=input_shm.buf)
+        outputs = np.ndarray((3, num_items), dtype=np.int64, buffer=output_shm.buf)
+        lengths = inputs[0, chunk::num_chunks].tolist()
+        weights = inputs[1, chunk::num_chunks].tolist() if has_weights else []
+
+        # The kernels fill the last group only after the final repack
+        if kernel == "obfdp":
+            result = [[bin_items] for bin_items in obfd(lengths, *args)]
+        elif kernel == "ogbfdp":
+            result = ogbfd(lengths, *args, fill_last_group=False)
+        elif kernel == "ohgbfdp":
+            result = ohgbfd(lengths, *args, weights, False)
+        else:
+            result = oshgbfd(lengths, *args, weights, False)
+        if not result:
+            return 0, 0
+
+        items, bin_ids, bin_types = outputs
+        sequential = kernel == "oshgbfdp"
+        stride = max(len(combination) for combination in args[0]) if sequential else 0
+        position = start
+        for group_idx, group in enumerate(result[:-1]):
+            if sequential:
+                bin_types[start + group_idx], group = group
+            for bin_idx, bin_items in enumerate(group):
+                end = position + len(bin_items)
+                items[position:end] = bin_items
+                bin_ids[position:end] = group_idx * (stride or len(group)) + bin_idx
+                position = end
+        kept_items = position - start
+
+        # Items of the last group are repacked in bin order, as in the kernels
+        last_group = result[-1][1] if sequential else result[-1]
+        for bin_items in last_group:
+            end = position + len(bin_items)
+            items[position:end] = bin_items
+            bin_ids[position:end] = -1
+            position = end
+        end = start + len(lengths)
+        # Local indices map back to the original ones
+        items[start:end] = items[start:end] * num_chunks + chunk
+        return kept_items, len(result) - 1
+    finally:
+        input_shm.close()
+        output_shm.close()
+
+
+def _fill_last_group(
+    groups: List[List[List[int]]],
+    lengths: Union[List[int], np.ndarray],
+    capacities: Optional[List[int]] = None,
+) -> None:
+    """
+    Fill empty bins of the last group, as the native parallel kernels do
+
+    Items are moved from the preceding groups, or else bins of the first
+    group are copied, only into bins whose capacity they fit. ``capacities``
+    gives the capacity of each bin of the last group, None when all bins
+    have the same capacity and every item fits any of them.
+    """
+    if len(groups) < 2:
+        return
+    target_group = groups[-1]
+    empty_bin_indices = [
+        bin_idx for bin_idx, bin_items in enumerate(target_group) if not bin_items
+    ]
+    if not empty_bin_indices:
+        return
+
+    def fits(bin_idx: int, length: int) -> bool:
+        return capacities is None or length <= capacities[bin_idx]
+
+    early_termination = False
+    for group in reversed(groups[:-1]):
+        for donor_bin in reversed(group):
+            if not empty_bin_indices or early_termination:
+                break
+            if len(donor_bin) >= 2:
+                item = donor_bin[-1]
+                for position in range(len(empty_bin_indices) - 1, -1, -1):
+                    if fits(empty_bin_indices[position], lengths[item]):
+                        target_group[empty_bin_indices.pop(position)].append(
+                            donor_bin.pop()
+                        )
+                        break
+            else:
+                early_termination = True
+        if not empty_bin_indices or early_termination:
+            break
+
+    if empty_bin_indices:
+        copied = [False] * len(groups[0])
+        for bin_idx, bin_items in enumerate(target_group):
+            if bin_items:
+                continue
+            for source_idx, source_bin in enumerate(groups[0]):
+                if not copied[source_idx] and fits(
+                    bin_idx, sum(lengths[idx] for idx in source_bin)
+                ):
+                    target_group[bin_idx] = list(source_bin)
+                    copied[source_idx] = True
+                    break
+
+
+def process_pack(
+    kernel: str,
+    lengths: Union[List[int], np.ndarray],
+    batch_max_length: Union[int, List[int], List[List[int]]],
+    item_max_length: int = -1,
+    bins_per_group: int = 1,
+    strategy: int = 0,
+    weights: Optional[List[int]] = None,
+    num_workers: int = -1,
+) -> Union[List[List[int]], List[List[List[int]]], List[Tuple[int, List[List[int]]]]]:
+    """
+    Run a parallel algorithm on a pool of worker processes
+
+    Like the OpenMP kernels, items are split round-robin into chunks, each
+    chunk is packed with the serial algorithm, and the last bin or group of
+    every chunk is repacked together. Lengths and weights are shared with the
+    workers, and plans returned, through shared memory. Workers are started
+    with forkserver (or spawn), so this is safe in processes that already
+    used OpenMP; in daemonic processes, which cannot have children, it falls
+    back to OpenMP with ``resolve_num_threads``.
+
+    Args:
+        kernel: Parallel algorithm, one of "obfdp", "ogbfdp", "ohgbfdp" and
+            "oshgbfdp"
+        lengths: Item lengths
+        batch_max_length: Bin capacity in the format of the algorithm
+        item_max_length: Maximum length of items. If -1, calculated automatically
+        bins_per_group: Number of bins per group (OGBFDP)
+        strategy: Strategy for OGBFDP (0 or 1)
+        weights: Optional weights for heterogeneous algorithms
+        num_workers: Number of worker processes, -1 for automatic
+
+    Returns:
+        Plan in the same format as the corresponding OpenMP kernel
+    """
+    num_items = len(lengths)
+    if multiprocessing.current_process().daemon:
+        if kernel == "obfdp":
+            return obfdp(lengths, batch_max_length, item_max_length, num_workers)
+        if kernel == "ogbfdp":
+            return ogbfdp(
+                lengths,
+                batch_max_length,
+                bins_per_group,
+                item_max_length,
+                strategy,
+                num_workers,
+            )
+        kernel_fn = ohgbfdp if kernel == "ohgbfdp" else oshgbfdp
+        return kernel_fn(
+            lengths, batch_max_length, item_max_length, weights or [], num_workers
+        )
+
+    num_workers = max(1, min(_capped_num_threads(num_workers, num_items), num_items))
+
+    if kernel == "obfdp":
+        args = (batch_max_length, item_max_length)
+    elif kernel == "ogbfdp":
+        args = (batch_max_length, bins_per_group, item_max_length, strategy)
+    else:
+        args = (batch_max_length, item_max_length)
+    sequential = kernel == "oshgbfdp"
+
+    size = max(num_items, 1) * np.dtype(np.int64).itemsize
+    input_shm = SharedMemory(create=True, size=2 * size)
+    output_shm = SharedMemory(create=True, size=3 * size)
+    try:
+        inputs = np.ndarray((2, num_items), dtype=np.int64, buffer=input_shm.buf)
+        outputs = np.ndarray((3, num_items), dtype=np.int64, buffer=output_shm.buf)
+        inputs[0] = lengths
+        if weights:
+            inputs[1] = weights
+
+        chunk_sizes = [
+            len(range(chunk, num_items, num_workers)) for chunk in range(num_workers)
+        ]
+        starts = np.concatenate(([0], np.cumsum(chunk_sizes)[:-1])).tolist()
+        pool = _get_pool(num_workers)
+        futures = [
+            pool.submit(
+                _pack_chunk,
+                kernel,
+                input_shm.name,
+                output_shm.name,
+                num_items,
+                bool(weights),
+                chunk,
+                num_workers,
+                starts[chunk],
+                args,
+            )
+            for chunk in range(num_workers)
+        ]
+
+        items, bin_ids, bin_types = outputs
+        groups = []
+        group_types = []
+        repack_items = []
+        for chunk, future in enumerate(futures):
+            kept_items, kept_groups = future.result()
+            start = starts[chunk]
+            chunk_items = items[start : start + kept_items]
+            if sequential:
+                types = bin_types[start : start + kept_groups].tolist()
+                stride = max(len(combination) for combination in batch_max_length)
+                num_bins = [len(batch_max_length[t]) for t in types]
+            else:
+                types = []
+                stride = (
+                    len(batch_max_length)
+                    if kernel == "ohgbfdp"
+                    else (bins_per_group if kernel == "ogbfdp" else 1)
+                )
+                num_bins = [stride] * kept_groups
+            counts = np.bincount(
+                bin_ids[start : start + kept_items], minlength=kept_groups * stride
+            )
+            bins = np.split(chunk_items, np.cumsum(counts)[:-1]) if kept_items else []
+            for group_idx in range(kept_groups):
+                base = group_idx * stride
+                groups.append(
+                    [bins[base + b].tolist() for b in range(num_bins[group_idx])]
+                )
+            group_types.extend(types)
+            repack_items.extend(
+                items[start + kept_items : start + chunk_sizes[chunk]].tolist()
+            )
+    finally:
+        input_shm.close()
+        input_shm.unlink()
+        output_shm.close()
+        output_shm.unlink()
+
+    if repack_items:
+        repack_lengths = [lengths[idx] for idx in repack_items]
+        repack_weights = [weights[idx] for idx in repack_items] if weights else []
+        if kernel == "obfdp":
+            repacked = [[bin_items] for bin_items in obfd(repack_lengths, *args)]
+        elif kernel == "ogbfdp":
+            repacked = ogbfd(repack_lengths, *args, fill_last_group=False)
+        elif kernel == "ohgbfdp":
+            repacked = ohgbfd(repack_lengths, *args, repack_weights, False)
+        else:
+            repacked = oshgbfd(repack_lengths, *args, repack_weights, False)
+        for group in repacked:
+            if sequential:
+                group_types.append(group[0])
+                group = group[1]
+            groups.append(
+                [[repack_items[idx] for idx in bin_items] for bin_items in group]
+            )
+
+    if kernel == "obfdp":
+        return [group[0] for group in groups]
+    if kernel == "ohgbfdp":
+        capacities = list(batch_max_length)
+    elif sequential and group_types:
+        capacities = list(batch_max_length[group_types[-1]])
+    else:
+        capacities = None
+    _fill_last_group(groups, lengths, capacities)
+    if sequential:
+        return list(zip(group_types, groups))
+    return groups
@@ -0,0 +1,18 @@
+from lightbinpack.benchmarks.distributions import DISTRIBUTIONS, generate_lengths
+from lightbinpack.benchmarks.suite import (
+    ENTRY_POINTS,
+    compare,
+    measure_memory,
+    run_case,
+    run_suite,
+)
+
+__all__ = [
+    "DISTRIBUTIONS",
+    "generate_lengths",
+    "ENTRY_POINTS",
+    "run_case",
+    "run_suite",
+    "measure_memory",
+    "compare",
+]
@@ -0,0 +1,163 @@
+"""
+Command line interface of the benchmark suite
+
+    python -m lightbinpack.benchmarks run --output results.json
+    python -m lightbinpack.benchmarks run --baseline baseline.json
+    python -m lightbinpack.benchmarks compare results.json baseline.json
+
+Exits with status 1 when a comparison finds regressions.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from typing import Any, Dict, List, Optional
+
+from lightbinpack.benchmarks.distributions import DISTRIBUTIONS
+from lightbinpack.benchmarks.suite import (
+    DEFAULT_CAPACITIES,
+    DEFAULT_SIZES,
+    ENTRY_POINTS,
+    compare,
+    run_suite,
+)
+
+
+def _print_results(results: Dict[str, Any]) -> None:
+    print(
+        f"{'Entry':<13} {'Distribution':<13} {'N':>9} {'L':>7} "
+        f"{'Time (s)':>10} {'RSS (MiB)':>10} {'Util':>8} {'Valid':>6}"
+    )
+    for record in results["results"]:
+        rss = record["peak_rss_mb"]
+        utilization = record.get("utilization")
+        print(
+            f"{record['entry']:<13} {record['distribution']:<13} "
+            f"{record['num_items']:>9} {record['capacity']:>7} "
+            f"{record['time_min']:>10.4f} "
+            f"{'-' if rss is None else f'{rss:.1f}':>10} "
+            f"{'-' if utilization is None else f'{utilization:.3%}':>8} "
+            f"{str(record.get('valid', '-')):>6}"
+        )
+
+
+def _report(regressions: List[Dict[str, Any]]) -> int:
+    if not regressions:
+        print("No regressions against the baseline")
+        return 0
+    print(f"{len(regressions)} regressions against the baseline:")
+    for regression in regressions:
+        print(
+            f"  {regression['case']}: {regression['metric']} "
+            f"{regression['baseline']} -> {regression['current']}"
+        )
+    return 1
+
+
+def _add_tolerances(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative slowdown",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative growth of peak RSS",
+    )
+    parser.add_argument(
+        "--utilization-tolerance",
+        type=float,
+        default=0.001,
+        help="Allowed absolute drop in utilization",
+    )
+
+
+def _compare(args: argparse.Namespace, current: Dict[str, Any], path: str) -> int:
+    with open(path) as f:
+        baseline = json.load(f)
+    return _report(
+        compare(
+            current,
+            baseline,
+            args.time_tolerance,
+            args.memory_tolerance,
+            args.utilization_tolerance,
+        )
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m lightbinpack.benchmarks",
+        description="Benchmark LightBinPack entry points and detect regressions",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmark suite")
+    run.add_argument(
+        "--entries", nargs="+", choices=list(ENTRY_POINTS), help="Entry points"
+    )
+    run.add_argument(
+        "--distributions",
+        nargs="+",
+        choices=list(DISTRIBUTIONS),
+        help="Length distributions",
+    )
+    run.add_argument(
+        "--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES), help="Item counts"
+    )
+    run.add_argument(
+        "--capacities",
+        nargs="+",
+        type=int,
+        default=list(DEFAULT_CAPACITIES),
+        help="Bin capacities",
+    )
+    run.add_argument("--seed", type=int, default=0, help="Random seed")
+    run.add_argument(
+        "--repeat", type=int, default=3, help="Timed calls per case after warm-up"
+    )
+    run.add_argument(
+        "--no-memory", action="store_true", help="Skip peak RSS measurement"
+    )
+    run.add_argument("--output", help="Write results as JSON to this path")
+    run.add_argument("--baseline", help="Compare against results stored at this path")
+    _add_tolerances(run)
+
+    check = commands.add_parser("compare", help="Compare stored results")
+    check.add_argument("current", help="Results to check")
+    check.add_argument("baseline", help="Baseline results")
+    _add_tolerances(check)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "compare":
+        with open(args.current) as f:
+            current = json.load(f)
+        return _compare(args, current, args.baseline)
+
+    results = run_suite(
+        args.entries,
+        args.distributions,
+        args.sizes,
+        args.capacities,
+        args.seed,
+        args.repeat,
+        not args.no_memory,
+    )
+    _print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        return _compare(args, results, args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Seeded item length distributions modelled on LLM training data"""
+
+import zlib
+from typing import Callable, Dict
+
+import numpy as np
+
+
+def _uniform(rng: np.random.Generator, num_items: int, max_length: int) -> np.ndarray:
+    """Uniform lengths, matching the ratios used by the example benchmarks"""
+    return rng.uniform(max_length / 50, max_length * 0.4, num_items)
+
+
+def _lognormal(rng: np.random.Generator, num_items: int, max_length: int) -> np.ndarray:
+    """Pre-training documents: lognormal with a median of 1/16 of the capacity"""
+    return rng.lognormal(np.log(max_length / 16), 1.0, num_items)
+
+
+def _bimodal(rng: np.random.Generator, num_items: int, max_length: int) -> np.ndarray:
+    """Mixed corpus: 70% short chat turns and 30% long documents"""
+    short = rng.lognormal(np.log(max_length / 64), 0.5, num_items)
+    long = rng.normal(max_length / 2, max_length / 8, num_items)
+    return np.where(rng.random(num_items) < 0.7, short, long)
+
+
+def _sft(rng: np.random.Generator, num_items: int, max_length: int) -> np.ndarray:
+    """Supervised fine-tuning: mostly short samples with a Pareto tail"""
+    return (rng.pareto(1.5, num_items) + 1) * (max_length / 128)
+
+
+def _long_context(
+    rng: np.random.Generator, num_items: int, max_length: int
+) -> np.ndarray:
+    """Long-context training: most samples fill a large part of the window"""
+    return max_length * rng.beta(5.0, 1.5, num_items)
+
+
+DISTRIBUTIONS: Dict[str, Callable[[np.random.Generator, int, int], np.ndarray]] = {
+    "uniform": _uniform,
+    "lognormal": _lognormal,
+    "bimodal": _bimodal,
+    "sft": _sft,
+    "long_context": _long_context,
+}
+
+
+def generate_lengths(
+    distribution: str, num_items: int, max_length: int, seed: int = 0
+) -> np.ndarray:
+    """
+    Generate integer item lengths from a named distribution
+
+    The same arguments always give the same lengths, independent of the
+    NumPy version's global state or the order distributions are generated in.
+
+    Args:
+        distribution: One of ``DISTRIBUTIONS``
+        num_items: Number of items
+        max_length: Largest allowed length, usually the bin capacity
+        seed: Random seed
+
+    Returns:
+        int64 array of lengths in ``[1, max_length]``
+
+    Raises:
+        ValueError: When the distribution is unknown
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(
+            f"Unknown distribution {distribution!r}, "
+            f"expected one of {sorted(DISTRIBUTIONS)}"
+        )
+    rng = np.random.default_rng([seed, zlib.crc32(distribution.encode())])
+    lengths = DISTRIBUTIONS[distribution](rng, num_items, max_length)
+    return np.clip(np.rint(lengths), 1, max_length).astype(np.int64)
@@ -0,0 +1,530 @@
+"""Benchmark and regression suite for every packing entry point"""
+
+import logging
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import lightbinpack
+from lightbinpack import (
+    bfd,
+    evaluate,
+    ffd,
+    nf,
+    obfd,
+    obfdp,
+    obfdu,
+    ogbfd,
+    ogbfdp,
+    ogbfdu,
+    ohgbfd,
+    ohgbfdp,
+    oobfd,
+    oogbfd,
+    oshgbfd,
+    oshgbfdp,
+    ovbfd,
+    ovgbfd,
+    owbfd,
+    radix_merge,
+    radix_sort,
+)
+from lightbinpack.backend import default_num_threads, get_num_threads, load_balance
+from lightbinpack.benchmarks.distributions import DISTRIBUTIONS, generate_lengths
+
+logger = logging.getLogger(__name__)
+
+RESULTS_VERSION = 1
+GROUP_SIZE = 8
+WINDOW_SIZE = 1024
+LOAD_BALANCE_NODES = 8
+DEFAULT_SIZES = (10000, 100000)
+DEFAULT_CAPACITIES = (4096, 32768)
+
+Workload = Tuple[Callable[[], Any], Callable[[Any], Dict[str, Any]]]
+
+
+def _plan_metrics(plan: Any, lengths: np.ndarray, capacity: Any) -> Dict[str, Any]:
+    """Quality metrics of a packing plan from ``evaluate``"""
+    metrics = evaluate(plan, lengths, capacity)
+    return {
+        key: metrics[key]
+        for key in (
+            "valid",
+            "num_bins",
+            "utilization",
+            "group_imbalance",
+            "global_imbalance",
+            "bin_excess",
+        )
+    }
+
+
+def _packing(
+    kernel: Callable, *args: Any, floats: bool = False
+) -> Callable[[np.ndarray, int, np.random.Generator], Workload]:
+    """Workload for a kernel called as ``kernel(lengths, capacity, *args)``"""
+
+    def build(lengths: np.ndarray, capacity: int, rng: np.random.Generator):
+        if floats:
+            data, batch_max_length = lengths.astype(np.float64), float(capacity)
+        else:
+            data, batch_max_length = lengths.tolist(), capacity
+        return (
+            lambda: kernel(data, batch_max_length, *args),
+            lambda plan: _plan_metrics(plan, lengths, capacity),
+        )
+
+    return build
+
+
+def _heterogeneous(
+    kernel: Callable, sequential: bool
+) -> Callable[[np.ndarray, int, np.random.Generator], Workload]:
+    """Workload for OHGBFD/OSHGBFD style kernels with mixed bin capacities"""
+
+    def build(lengths: np.ndarray, capacity: int, rng: np.random.Generator):
+        if sequential:
+            capacities = [
+                [capacity, capacity // 2],
+                [capacity // 2, capacity // 2],
+            ]
+        else:
+            capacities = [capacity, capacity // 2, capacity // 2, capacity // 4]
+        data = lengths.tolist()
+        return (
+            lambda: kernel(data, capacities),
+            lambda plan: _plan_metrics(plan, lengths, capacities),
+        )
+
+    return build
+
+
+def _update(
+    kernel: Callable, grouped: bool
+) -> Callable[[np.ndarray, int, np.random.Generator], Workload]:
+    """Workload adding the second half of the items to a plan of the first"""
+
+    def build(lengths: np.ndarray, capacity: int, rng: np.random.Generator):
+        data = lengths.tolist()
+        start_index = len(data) // 2
+        if grouped:
+            plan = ogbfd(data[:start_index], capacity, GROUP_SIZE)
+            args = (plan, data, capacity, GROUP_SIZE, start_index)
+        else:
+            plan = obfd(data[:start_index], capacity)
+            args = (plan, data, capacity, start_index)
+        return (
+            lambda: kernel(*args),
+            lambda plan: _plan_metrics(plan, lengths, capacity),
+        )
+
+    return build
+
+
+def _out_of_core(
+    kernel: Callable, grouped: bool
+) -> Callable[[np.ndarray, int, np.random.Generator], Workload]:
+    """Workload for out-of-core kernels writing into in-memory buffers"""
+
+    def build(lengths: np.ndarray, capacity: int, rng: np.random.Generator):
+        buffers: Dict[str, np.ndarray] = {}
+
+        def allocate(name: str, size: int) -> np.ndarray:
+            buffers[name] = np.empty(size, dtype=np.int64)
+            return buffers[name]
+
+        args = (GROUP_SIZE, allocate) if grouped else (allocate,)
+
+        def score(num_bins: int) -> Dict[str, Any]:
+            plan = (buffers["items"], buffers["offsets"])
+            return _plan_metrics(plan, lengths, capacity)
+
+        return lambda: kernel(lengths, capacity, *args), score
+
+    return build
+
+
+def _vector(
+    kernel: Callable, grouped: bool
+) -> Callable[[np.ndarray, int, np.random.Generator], Workload]:
+    """Workload packing (tokens, images, vision cost) vectors"""
+
+    def build(lengths: np.ndarray, capacity: int, rng: np.random.Generator):
+        images = np.minimum(rng.poisson(lengths / (capacity / 8)), 6)
+        vision = images * rng.choice([256, 576, 1024], len(lengths))
+        sizes = np.stack([lengths, images, vision], axis=1)
+        capacities = [capacity, 8, 8 * 1024]
+        args = (GROUP_SIZE,) if grouped else ()
+        return (
+            lambda: kernel(sizes, capacities, *args),
+            lambda plan: _plan_metrics(plan, lengths, capacity),
+        )
+
+    return build
+
+
+def _token_groups(
+    lengths: np.ndarray, rng: np.random.Generator
+) -> List[List[List[int]]]:
+    """Groups of token lists sharing one of 64 prompts, one group per item"""
+    prompts = rng.integers(0, 1024, (64, 16)).tolist()
+    prompt_ids = rng.integers(0, 64, len(lengths))
+    siblings = rng.random(len(lengths)) < 0.3
+    groups = []
+    for length, prompt_id, sibling in zip(lengths.tolist(), prompt_ids, siblings):
+        response = rng.integers(0, 1024, max(1, length // 256)).tolist()
+        group = [prompts[prompt_id] + response]
+        if sibling:
+            group.append(prompts[prompt_id] + response[::-1])
+        groups.append(group)
+    return groups
+
+
+def _radix_sort(lengths: np.ndarray, capacity: int, rng: np.random.Generator):
+    groups = _token_groups(lengths, rng)
+
+    def score(result: List[List[List[int]]]) -> Dict[str, Any]:
+        keys = [group[0][:16] for group in result]
+        return {"valid": len(result) == len(groups) and keys == sorted(keys)}
+
+    return lambda: radix_sort(groups, 0, 15, 1024), score
+
+
+def _radix_merge(lengths: np.ndarray, capacity: int, rng: np.random.Generator):
+    groups = _token_groups(lengths, rng)
+
+    def score(result: Tuple) -> Dict[str, Any]:
+        merged = result[0]
+        return {
+            "valid": sum(len(group) for group in merged)
+            == sum(len(group) for group in groups),
+            "num_bins": len(merged),
+        }
+
+    return lambda: radix_merge(groups, 1, capacity // 16, 32, True), score
+
+
+def _load_balance(lengths: np.ndarray, capacity: int, rng: np.random.Generator):
+    data = lengths.tolist()
+    bins = [[data[i] for i in bin_items] for bin_items in obfd(data, capacity)]
+
+    def score(result: List[List[int]]) -> Dict[str, Any]:
+        return {"valid": len(result) == len(bins), "num_bins": len(result)}
+
+    return lambda: load_balance(bins, LOAD_BALANCE_NODES), score
+
+
+def _evaluate(lengths: np.ndarray, capacity: int, rng: np.random.Generator):
+    plan = obfd(lengths.tolist(), capacity)
+    return (
+        lambda: evaluate(plan, lengths, capacity),
+        lambda metrics: {"valid": metrics["valid"]},
+    )
+
+
+ENTRY_POINTS: Dict[str, Callable[[np.ndarray, int, np.random.Generator], Workload]] = {
+    "nf": _packing(nf, floats=True),
+    "ffd": _packing(ffd, floats=True),
+    "bfd": _packing(bfd, floats=True),
+    "obfd": _packing(obfd),
+    "obfdp": _packing(obfdp),
+    "ogbfd": _packing(ogbfd, GROUP_SIZE),
+    "ogbfdp": _packing(ogbfdp, GROUP_SIZE),
+    "ohgbfd": _heterogeneous(ohgbfd, sequential=False),
+    "ohgbfdp": _heterogeneous(ohgbfdp, sequential=False),
+    "oshgbfd": _heterogeneous(oshgbfd, sequential=True),
+    "oshgbfdp": _heterogeneous(oshgbfdp, sequential=True),
+    "obfdu": _update(obfdu, grouped=False),
+    "ogbfdu": _update(ogbfdu, grouped=True),
+    "oobfd": _out_of_core(oobfd, grouped=False),
+    "oogbfd": _out_of_core(oogbfd, grouped=True),
+    "ovbfd": _vector(ovbfd, grouped=False),
+    "ovgbfd": _vector(ovgbfd, grouped=True),
+    "owbfd": _packing(owbfd, WINDOW_SIZE),
+    "radix_sort": _radix_sort,
+    "radix_merge": _radix_merge,
+    "load_balance": _load_balance,
+    "evaluate": _evaluate,
+}
+
+
+def _build_workload(
+    entry: str, distribution: str, num_items: int, capacity: int, seed: int
+) -> Workload:
+    lengths = generate_lengths(distribution, num_items, capacity, seed)
+    rng = np.random.default_rng([seed, num_items, capacity])
+    return ENTRY_POINTS[entry](lengths, capacity, rng)
+
+
+def _peak_rss() -> Optional[float]:
+    """Peak resident set size of this process in MiB, if the OS reports it"""
+    # Linux carries ru_maxrss over from the forking parent across exec, so a
+    # spawned process would report the parent's peak; VmHWM starts afresh.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _memory_worker(
+    entry: str, distribution: str, num_items: int, capacity: int, seed: int
+) -> Tuple[Optional[float], Optional[float]]:
+    call, _ = _build_workload(entry, distribution, num_items, capacity, seed)
+    before = _peak_rss()
+    call()
+    after = _peak_rss()
+    if before is None or after is None:
+        return None, None
+    return after, after - before
+
+
+def measure_memory(
+    entry: str, distribution: str, num_items: int, capacity: int, seed: int = 0
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Peak RSS of one benchmark case, measured in a fresh spawned process
+
+    Returns:
+        Tuple of (peak RSS of the whole process, growth of the peak during
+        the call) in MiB, or ``(None, None)`` where the OS does not report
+        peak RSS. The growth is a lower bound on the call's own allocations,
+        since memory freed after preparing the inputs is reused first.
+    """
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(
+            _memory_worker, (entry, distribution, num_items, capacity, seed)
+        )
+
+
+def run_case(
+    entry: str,
+    distribution: str,
+    num_items: int,
+    capacity: int,
+    seed: int = 0,
+    repeat: int = 3,
+    memory: bool = True,
+) -> Dict[str, Any]:
+    """
+    Benchmark one entry point on one input
+
+    The first call warms up caches and the thread pool and its result is
+    scored; the following ``repeat`` calls are timed with
+    ``time.perf_counter``. Input conversion happens before timing.
+
+    Returns:
+        Dictionary with the case parameters, ``time_min`` and
+        ``time_median`` in seconds, ``peak_rss_mb`` and ``call_rss_mb`` (None
+        when memory is not measured) and the quality metrics of the entry
+    """
+    call, score = _build_workload(entry, distribution, num_items, capacity, seed)
+    result = call()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+
+    peak_rss, call_rss = (
+        measure_memory(entry, distribution, num_items, capacity, seed)
+        if memory
+        else (None, None)
+    )
+    record = {
+        "entry": entry,
+        "distribution": distribution,
+        "num_items": num_items,
+        "capacity": capacity,
+        "seed": seed,
+        "time_min": min(times),
+        "time_median": statistics.median(times),
+        "peak_rss_mb": peak_rss,
+        "call_rss_mb": call_rss,
+    }
+    record.update(score(result))
+    logger.info(
+        "%s on %s N=%d L=%d: %.4fs",
+        entry,
+        distribution,
+        num_items,
+        capacity,
+        min(times),
+    )
+    return record
+
+
+def environment() -> Dict[str, Any]:
+    """Machine and library details stored alongside results"""
+    return {
+        "lightbinpack": lightbinpack.__version__,
+        "numpy": np.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "available_threads": default_num_threads(),
+        "num_threads_cap": get_num_threads(),
+    }
+
+
+def run_suite(
+    entries: Optional[Sequence[str]] = None,
+    distributions: Optional[Sequence[str]] = None,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    capacities: Sequence[int] = DEFAULT_CAPACITIES,
+    seed: int = 0,
+    repeat: int = 3,
+    memory: bool = True,
+) -> Dict[str, Any]:
+    """
+    Benchmark entry points across distributions, item counts and capacities
+
+    Args:
+        entries: Names from ``ENTRY_POINTS``, all by default
+        distributions: Names from ``DISTRIBUTIONS``, all by default
+        sizes: Item counts (N) to sweep
+        capacities: Bin capacities (L) to sweep, also the largest item length
+        seed: Random seed for the inputs
+        repeat: Timed calls per case after one warm-up call
+        memory: Whether to measure peak RSS in a spawned process per case
+
+    Returns:
+        JSON-serializable dictionary with ``version``, ``environment``,
+        ``config`` and a ``results`` list of ``run_case`` records
+
+    Raises:
+        ValueError: When an entry or distribution is unknown
+    """
+    entries = list(entries or ENTRY_POINTS)
+    distributions = list(distributions or DISTRIBUTIONS)
+    for entry in entries:
+        if entry not in ENTRY_POINTS:
+            raise ValueError(
+                f"Unknown entry point {entry!r}, expected one of {list(ENTRY_POINTS)}"
+            )
+    for distribution in distributions:
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown distribution {distribution!r}, "
+                f"expected one of {list(DISTRIBUTIONS)}"
+            )
+
+    results = [
+        run_case(entry, distribution, num_items, capacity, seed, repeat, memory)
+        for entry in entries
+        for distribution in distributions
+        for num_items in sizes
+        for capacity in capacities
+    ]
+    return {
+        "version": RESULTS_VERSION,
+        "environment": environment(),
+        "config": {
+            "entries": entries,
+            "distributions": distributions,
+            "sizes": list(sizes),
+            "capacities": list(capacities),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def _case_key(record: Dict[str, Any]) -> Tuple:
+    return (
+        record["entry"],
+        record["distribution"],
+        record["num_items"],
+        record["capacity"],
+        record["seed"],
+    )
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    time_tolerance: float = 0.25,
+    memory_tolerance: float = 0.25,
+    utilization_tolerance: float = 0.001,
+    min_time: float = 0.001,
+) -> List[Dict[str, Any]]:
+    """
+    Compare suite results against a baseline and list regressions
+
+    Only cases present in both results are compared. Times are compared on
+    ``time_min``, which is the least noisy statistic, and cases faster than
+    ``min_time`` in both runs are skipped since their timings are dominated
+    by noise. Invalid plans are always reported, even when the baseline
+    was invalid too.
+
+    Args:
+        current: Results from ``run_suite``
+        baseline: Stored results from an earlier ``run_suite``
+        time_tolerance: Allowed relative slowdown
+        memory_tolerance: Allowed relative growth of peak RSS
+        utilization_tolerance: Allowed absolute drop in utilization
+        min_time: Times below this many seconds are not compared
+
+    Returns:
+        List of regressions, each a dictionary with ``case`` (a readable
+        case name), ``metric``, ``baseline`` and ``current``
+    """
+    baseline_records = {_case_key(record): record for record in baseline["results"]}
+    regressions = []
+
+    for record in current["results"]:
+        reference = baseline_records.get(_case_key(record))
+        if reference is None:
+            continue
+        case = "{}/{}/N={}/L={}".format(*_case_key(record)[:4])
+
+        def flag(metric: str) -> None:
+            regressions.append(
+                {
+                    "case": case,
+                    "metric": metric,
+                    "baseline": reference[metric],
+                    "current": record[metric],
+                }
+            )
+
+        # An invalid plan is never an acceptable baseline
+        if not record.get("valid", True):
+            flag("valid")
+        if max(record["time_min"], reference["time_min"]) >= min_time and record[
+            "time_min"
+        ] > reference["time_min"] * (1 + time_tolerance):
+            flag("time_min")
+        if (
+            record["peak_rss_mb"] is not None
+            and reference["peak_rss_mb"] is not None
+            and record["peak_rss_mb"]
+            > reference["peak_rss_mb"] * (1 + memory_tolerance)
+        ):
+            flag("peak_rss_mb")
+        if (
+            "utilization" in record
+            and "utilization" in reference
+            and record["utilization"] < reference["utilization"] - utilization_tolerance
+        ):
+            flag("utilization")
+
+    return regressions
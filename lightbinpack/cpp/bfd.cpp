@@ -1,80 +1,624 @@
+#include <omp.h>
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
 #include <algorithm>
-#include <list>
-#include <map>
+#include <cmath>
+#include <cstdint>
+#include <cstring>
 #include <stdexcept>
 #include <vector>
 
+#ifdef _MSC_VER
+#include <intrin.h>
+#endif
+
 namespace py = pybind11;
 
-class Bin {
+using LengthArray =
+    py::array_t<double, py::array::c_style | py::array::forcecast>;
+
+const int64_t kParallelThreshold = 1 << 17;
+const int64_t kMaxQuantizeLevels = 1 << 22;
+const int kMinRadixBits = 8;
+const int kMaxRadixBits = 16;
+const int kBucketMantissaBits = 7;
+const int kNumBuckets = 1 << 12;
+
+// Non-negative doubles order the same way as their IEEE-754 bit patterns, so
+// the sort key is the raw representation with the sign bit dropped (which
+// also folds -0.0 onto 0.0).
+inline uint64_t length_key(double value) {
+    uint64_t bits;
+    std::memcpy(&bits, &value, sizeof(bits));
+    return bits & ~(1ULL << 63);
+}
+
+inline int lowest_bit(uint64_t word) {
+#ifdef _MSC_VER
+    unsigned long index;
+    _BitScanForward64(&index, word);
+    return (int)index;
+#else
+    return __builtin_ctzll(word);
+#endif
+}
+
+// Item indices by descending key, ties by descending index (the order
+// std::sort with std::greater<std::pair<key, index>> gives, so results match
+// the comparison-sort version). One MSD radix pass over the top bits of the
+// key range scatters items into buckets small enough to finish in cache.
+std::vector<int> radix_order(const std::vector<uint64_t> &keys,
+                             int num_threads) {
+    int64_t n = keys.size();
+    bool parallel = n >= kParallelThreshold && num_threads > 1;
+
+    uint64_t low = ~0ULL;
+    uint64_t high = 0;
+#pragma omp parallel for schedule(static) reduction(min : low)                 \
+    reduction(max : high) num_threads(num_threads) if (parallel)
+    for (int64_t i = 0; i < n; ++i) {
+        low = std::min(low, keys[i]);
+        high = std::max(high, keys[i]);
+    }
+
+    int bits = kMinRadixBits;
+    while (bits < kMaxRadixBits && ((int64_t)1 << (bits + 3)) < n)
+        ++bits;
+    int width = 0;
+    while (width < 64 && ((high - low) >> width) != 0)
+        ++width;
+    int shift = std::max(0, width - bits);
+    int64_t num_buckets = (int64_t)1 << bits;
+
+    int max_threads = parallel ? num_threads : 1;
+    std::vector<int64_t> offsets(max_threads * num_buckets);
+    std::vector<int64_t> bucket_start(num_buckets + 1);
+    std::vector<std::pair<uint64_t, int>> sorted(n);
+    std::vector<int> order(n);
+
+#pragma omp parallel num_threads(max_threads) if (parallel)
+    {
+        int thread = omp_get_thread_num();
+        int team_size = omp_get_num_threads();
+        int64_t begin = n * thread / team_size;
+        int64_t end = n * (thread + 1) / team_size;
+        int64_t *local = &offsets[thread * num_buckets];
+
+        std::fill(local, local + num_buckets, 0);
+        for (int64_t i = begin; i < end; ++i) {
+            ++local[(high - keys[i]) >> shift];
+        }
+#pragma omp barrier
+#pragma omp single
+        {
+            int64_t position = 0;
+            for (int64_t b = 0; b < num_buckets; ++b) {
+                bucket_start[b] = position;
+                for (int t = 0; t < team_size; ++t) {
+                    int64_t count = offsets[t * num_buckets + b];
+                    offsets[t * num_buckets + b] = position;
+                    position += count;
+                }
+            }
+            bucket_start[num_buckets] = position;
+        }
+        for (int64_t i = begin; i < end; ++i) {
+            sorted[local[(high - keys[i]) >> shift]++] = {keys[i], (int)i};
+        }
+#pragma omp barrier
+#pragma omp for schedule(dynamic, 64)
+        for (int64_t b = 0; b < num_buckets; ++b) {
+            auto first = sorted.begin() + bucket_start[b];
+            auto last = sorted.begin() + bucket_start[b + 1];
+            std::sort(first, last, std::greater<std::pair<uint64_t, int>>());
+            for (auto it = first; it != last; ++it) {
+                order[it - sorted.begin()] = it->second;
+            }
+        }
+    }
+
+    return order;
+}
+
+// Bins indexed by remaining capacity for exact best fit over doubles. The
+// capacity range is split into logarithmic buckets on the high bits of the
+// IEEE-754 representation (32 octaves below the batch capacity, everything
+// smaller shares bucket 0), and a two-level bitmap finds the next non-empty
+// bucket. Each bucket is a radix tree over the remaining key bits: a node is
+// a leaf holding its bins sorted by (remaining, insertion order) in a flat
+// array until it has more than kLeafSize bins of different capacities, then
+// it splits into 64 children on the next 6 key bits, with a bitmap of the
+// non-empty ones. Leaves therefore stay small unless all their bins have the
+// same capacity, where bins are only appended and taken from the front, so
+// insert and take are O(depth) however the capacities cluster. A lookup is
+// the same as lower_bound on the std::map<double, std::list<size_t>> this
+// replaces.
+class CapacityBuckets {
+  private:
+    static const int kLeafSize = 64;
+    // Key bits below the bucket index, and the shift of the first split
+    static const int kBucketShift = 52 - kBucketMantissaBits;
+    static const int kFullShift = 57;
+
+    struct Entry {
+        uint64_t key;
+        int64_t bin;
+    };
+    struct Node {
+        std::vector<Entry> entries;
+        size_t head = 0;
+        uint64_t children_mask = 0;
+        int children = -1;
+        int parent = -1;
+        int shift = 0;
+
+        size_t size() const { return entries.size() - head; }
+    };
+
+    int64_t base;
+    std::vector<Node> nodes;
+    std::vector<uint64_t> words;
+    uint64_t summary = 0;
+
+    int bucket_of(uint64_t key) const {
+        int64_t bucket = (int64_t)(key >> kBucketShift) - base;
+        return (int)std::min<int64_t>(std::max<int64_t>(bucket, 0),
+                                      kNumBuckets - 1);
+    }
+
+    static int slot_of(const Node &node, uint64_t key) {
+        return (int)((key >> node.shift) & 63);
+    }
+
+    void mark(int bucket) {
+        words[bucket >> 6] |= 1ULL << (bucket & 63);
+        summary |= 1ULL << (bucket >> 6);
+    }
+
+    void unmark(int bucket) {
+        words[bucket >> 6] &= ~(1ULL << (bucket & 63));
+        if (words[bucket >> 6] == 0) {
+            summary &= ~(1ULL << (bucket >> 6));
+        }
+    }
+
+    int next_bucket(int bucket) const {
+        if (bucket >= kNumBuckets) {
+            return -1;
+        }
+        int word = bucket >> 6;
+        uint64_t bits = words[word] & (~0ULL << (bucket & 63));
+        if (bits != 0) {
+            return (word << 6) + lowest_bit(bits);
+        }
+        uint64_t rest = word + 1 < 64 ? summary & (~0ULL << (word + 1)) : 0;
+        if (rest == 0) {
+            return -1;
+        }
+        word = lowest_bit(rest);
+        return (word << 6) + lowest_bit(words[word]);
+    }
+
+    // Leaf of the smallest key in a non-empty subtree
+    int first_leaf(int node) const {
+        while (nodes[node].children != -1) {
+            node = nodes[node].children + lowest_bit(nodes[node].children_mask);
+        }
+        return node;
+    }
+
+    // Leaf and position of the first entry with key >= `key` in the
+    // subtree, or leaf -1
+    std::pair<int, size_t> lower_bound(int node, uint64_t key) const {
+        const Node &current = nodes[node];
+        if (current.children == -1) {
+            auto begin = current.entries.begin() + current.head;
+            auto it = std::lower_bound(begin, current.entries.end(), key,
+                                       [](const Entry &entry, uint64_t value) {
+                                           return entry.key < value;
+                                       });
+            if (it == current.entries.end()) {
+                return {-1, 0};
+            }
+            return {node, (size_t)(it - current.entries.begin())};
+        }
+        int slot = slot_of(current, key);
+        if (current.children_mask >> slot & 1) {
+            auto found = lower_bound(current.children + slot, key);
+            if (found.first != -1) {
+                return found;
+            }
+        }
+        uint64_t later =
+            slot == 63 ? 0 : current.children_mask & (~0ULL << (slot + 1));
+        if (later == 0) {
+            return {-1, 0};
+        }
+        int leaf = first_leaf(current.children + lowest_bit(later));
+        return {leaf, nodes[leaf].head};
+    }
+
+    void split(int node) {
+        int children = nodes.size();
+        int child_shift = std::max(0, nodes[node].shift - 6);
+        nodes.resize(nodes.size() + 64);
+        Node &leaf = nodes[node];
+        for (int c = 0; c < 64; ++c) {
+            nodes[children + c].parent = node;
+            nodes[children + c].shift = child_shift;
+        }
+        for (size_t i = leaf.head; i < leaf.entries.size(); ++i) {
+            int slot = slot_of(leaf, leaf.entries[i].key);
+            nodes[children + slot].entries.push_back(leaf.entries[i]);
+            leaf.children_mask |= 1ULL << slot;
+        }
+        leaf.children = children;
+        std::vector<Entry>().swap(leaf.entries);
+        leaf.head = 0;
+        for (int c = 0; c < 64; ++c) {
+            if (needs_split(children + c)) {
+                split(children + c);
+            }
+        }
+    }
+
+    bool needs_split(int node) const {
+        const Node &leaf = nodes[node];
+        return leaf.size() > kLeafSize &&
+               leaf.entries[leaf.head].key != leaf.entries.back().key;
+    }
+
+  public:
+    CapacityBuckets(double capacity) : words(kNumBuckets / 64, 0) {
+        base =
+            (int64_t)(length_key(capacity) >> kBucketShift) - (kNumBuckets - 1);
+        nodes.resize(kNumBuckets);
+        // Bucket 0 also holds every smaller capacity, so it splits on the
+        // whole key rather than on the bits below the bucket index
+        for (int bucket = 0; bucket < kNumBuckets; ++bucket) {
+            nodes[bucket].shift = bucket == 0 ? kFullShift : kBucketShift - 6;
+        }
+    }
+
+    // Removes and returns the bin with the smallest remaining capacity that
+    // is at least `size`, oldest first among equal capacities, or -1.
+    int64_t take_best_fit(double size) {
+        uint64_t key = length_key(size);
+        int bucket = bucket_of(key);
+        std::pair<int, size_t> found = {-1, 0};
+        if (words[bucket >> 6] >> (bucket & 63) & 1) {
+            found = lower_bound(bucket, key);
+        }
+        if (found.first == -1) {
+            bucket = next_bucket(bucket + 1);
+            if (bucket == -1) {
+                return -1;
+            }
+            int leaf = first_leaf(bucket);
+            found = {leaf, nodes[leaf].head};
+        }
+
+        Node &leaf = nodes[found.first];
+        int64_t bin = leaf.entries[found.second].bin;
+        if (found.second == leaf.head) {
+            ++leaf.head;
+        } else {
+            leaf.entries.erase(leaf.entries.begin() + found.second);
+        }
+        if (leaf.size() > 0) {
+            if (leaf.head > 64 && 2 * leaf.head > leaf.entries.size()) {
+                leaf.entries.erase(leaf.entries.begin(),
+                                   leaf.entries.begin() + leaf.head);
+                leaf.head = 0;
+            }
+            return bin;
+        }
+
+        leaf.entries.clear();
+        leaf.head = 0;
+        // Clear the emptied subtree from the bitmaps up to the bucket
+        int node = found.first;
+        while (nodes[node].parent != -1) {
+            Node &parent = nodes[nodes[node].parent];
+            parent.children_mask &= ~(1ULL << (node - parent.children));
+            if (parent.children_mask != 0) {
+                return bin;
+            }
+            node = nodes[node].parent;
+        }
+        unmark(node);
+        return bin;
+    }
+
+    void insert(double remaining, int64_t bin) {
+        uint64_t key = length_key(remaining);
+        int node = bucket_of(key);
+        if (!(words[node >> 6] >> (node & 63) & 1)) {
+            mark(node);
+        }
+        while (nodes[node].children != -1) {
+            int slot = slot_of(nodes[node], key);
+            nodes[node].children_mask |= 1ULL << slot;
+            node = nodes[node].children + slot;
+        }
+
+        std::vector<Entry> &entries = nodes[node].entries;
+        if (entries.size() == nodes[node].head || entries.back().key <= key) {
+            entries.push_back({key, bin});
+        } else {
+            auto it = std::upper_bound(entries.begin() + nodes[node].head,
+                                       entries.end(), key,
+                                       [](uint64_t value, const Entry &entry) {
+                                           return value < entry.key;
+                                       });
+            entries.insert(it, {key, bin});
+        }
+        if (needs_split(node)) {
+            split(node);
+        }
+    }
+};
+
+class IterativeSegmentTree {
+  private:
+    int n;
+    std::vector<int> tree;
+
   public:
-    double remaining_space;
-    size_t bin_index;
-    std::vector<int> items;
+    IterativeSegmentTree(int max_length) {
+        n = 1;
+        while (n < max_length + 1)
+            n <<= 1;
+        tree.assign(2 * n, 0);
+    }
+
+    void update(int idx, int val) {
+        idx += n - 1;
+        tree[idx] = val;
+        while (idx > 0) {
+            idx = (idx - 1) / 2;
+            int left = tree[2 * idx + 1];
+            int right = tree[2 * idx + 2];
+            int new_val = std::max(left, right);
+            if (tree[idx] == new_val)
+                break;
+            tree[idx] = new_val;
+        }
+    }
 
-    Bin(double space, size_t index)
-        : remaining_space(space), bin_index(index) {}
+    int find_best_fit(int target) const {
+        int idx = 0;
+        if (tree[idx] < target)
+            return -1;
+        while (idx < (n - 1)) {
+            if (tree[2 * idx + 1] >= target)
+                idx = 2 * idx + 1;
+            else
+                idx = 2 * idx + 2;
+        }
+        int capacity = idx - (n - 1);
+        return tree[idx] >= target ? capacity : -1;
+    }
 };
 
-std::vector<std::vector<int>> bfd(const std::vector<double> &lengths,
-                                  double batch_max_length) {
-    if (lengths.empty() || batch_max_length <= 0) {
-        return {};
+std::vector<std::vector<int>> collect_bins(const std::vector<int> &order,
+                                           const std::vector<int64_t> &bin_ids,
+                                           int64_t num_bins) {
+    std::vector<int64_t> bins_count(num_bins, 0);
+    for (int64_t bin_idx : bin_ids) {
+        ++bins_count[bin_idx];
+    }
+    std::vector<std::vector<int>> bins_items(num_bins);
+    for (int64_t b = 0; b < num_bins; ++b) {
+        bins_items[b].reserve(bins_count[b]);
     }
+    for (size_t k = 0; k < order.size(); ++k) {
+        bins_items[bin_ids[k]].push_back(order[k]);
+    }
+    return bins_items;
+}
 
-    std::vector<std::pair<double, int>> length_pairs;
-    length_pairs.reserve(lengths.size());
-    for (size_t i = 0; i < lengths.size(); i++) {
-        if (lengths[i] > batch_max_length) {
-            throw std::runtime_error("Item size exceeds batch max length");
+std::vector<std::vector<int>> best_fit(const double *lengths,
+                                       const std::vector<int> &order,
+                                       double batch_max_length) {
+    int64_t n = order.size();
+    std::vector<int64_t> bin_ids(n);
+    std::vector<double> bins_remaining;
+    CapacityBuckets buckets(batch_max_length);
+
+    for (int64_t k = 0; k < n; ++k) {
+        double size = lengths[order[k]];
+        int64_t bin_idx = buckets.take_best_fit(size);
+
+        if (bin_idx == -1) {
+            bin_idx = bins_remaining.size();
+            bins_remaining.push_back(batch_max_length);
         }
-        length_pairs.emplace_back(lengths[i], i);
+        bins_remaining[bin_idx] -= size;
+        bin_ids[k] = bin_idx;
+        buckets.insert(bins_remaining[bin_idx], bin_idx);
     }
 
-    std::sort(length_pairs.begin(), length_pairs.end(),
-              std::greater<std::pair<double, int>>());
+    return collect_bins(order, bin_ids, bins_remaining.size());
+}
 
-    std::map<double, std::list<size_t>> bins_map;
-    std::vector<Bin> bins;
+std::vector<std::vector<int>> best_fit_units(const uint64_t *units,
+                                             const std::vector<int> &order,
+                                             int capacity_units) {
+    int64_t n = order.size();
+    std::vector<int64_t> bin_ids(n);
+    std::vector<int> bins_remaining;
+    std::vector<std::vector<int64_t>> capacity_to_bins(capacity_units + 1);
+    IterativeSegmentTree seg_tree(capacity_units);
 
-    for (const auto &pair : length_pairs) {
-        double size = pair.first;
-        int orig_idx = pair.second;
+    for (int64_t k = 0; k < n; ++k) {
+        int size = (int)units[order[k]];
+        int best_capacity = seg_tree.find_best_fit(size);
+        int64_t bin_idx;
 
-        auto it = bins_map.lower_bound(size);
-        if (it != bins_map.end()) {
-            size_t bin_idx = it->second.front();
-            it->second.pop_front();
-            if (it->second.empty()) {
-                bins_map.erase(it);
+        if (best_capacity != -1) {
+            bin_idx = capacity_to_bins[best_capacity].back();
+            capacity_to_bins[best_capacity].pop_back();
+            if (capacity_to_bins[best_capacity].empty()) {
+                seg_tree.update(best_capacity, 0);
             }
+        } else {
+            bin_idx = bins_remaining.size();
+            bins_remaining.push_back(capacity_units);
+        }
 
-            Bin &bin = bins[bin_idx];
-            bin.remaining_space -= size;
-            bin.items.push_back(orig_idx);
+        int new_capacity = bins_remaining[bin_idx] - size;
+        bins_remaining[bin_idx] = new_capacity;
+        bin_ids[k] = bin_idx;
 
-            bins_map[bin.remaining_space].push_back(bin_idx);
-        } else {
-            Bin new_bin(batch_max_length - size, bins.size());
-            new_bin.items.push_back(orig_idx);
-            bins.push_back(new_bin);
-            bins_map[new_bin.remaining_space].push_back(new_bin.bin_index);
+        capacity_to_bins[new_capacity].push_back(bin_idx);
+        if (new_capacity > 0) {
+            seg_tree.update(new_capacity, new_capacity);
         }
     }
 
-    std::vector<std::vector<int>> final_result;
-    for (const auto &bin : bins) {
-        final_result.push_back(bin.items);
+    return collect_bins(order, bin_ids, bins_remaining.size());
+}
+
+// Quantized lengths are rounded up and the quantized capacity rounded down,
+// so a bin that fits in units also fits in real lengths. The final pass
+// re-checks each bin with the same summation the evaluator uses and moves
+// items to new bins if floating-point rounding ever breaks that bound.
+void repair_overflow(const double *lengths, double batch_max_length,
+                     std::vector<std::vector<int>> &bins_items,
+                     int num_threads) {
+    int64_t num_bins = bins_items.size();
+    std::vector<char> overflow(num_bins, 0);
+    int64_t overflow_count = 0;
+
+#pragma omp parallel for schedule(static) reduction(+ : overflow_count)        \
+    num_threads(num_threads) if (num_bins >= kParallelThreshold)
+    for (int64_t b = 0; b < num_bins; ++b) {
+        double used = 0;
+        for (int idx : bins_items[b]) {
+            used += lengths[idx];
+        }
+        if (used > batch_max_length) {
+            overflow[b] = 1;
+            ++overflow_count;
+        }
+    }
+    if (overflow_count == 0) {
+        return;
+    }
+
+    std::vector<int> evicted;
+    for (int64_t b = 0; b < num_bins; ++b) {
+        if (!overflow[b]) {
+            continue;
+        }
+        std::vector<int> &items = bins_items[b];
+        while (!items.empty()) {
+            double used = 0;
+            for (int idx : items) {
+                used += lengths[idx];
+            }
+            if (used <= batch_max_length) {
+                break;
+            }
+            evicted.push_back(items.back());
+            items.pop_back();
+        }
+    }
+
+    double used = batch_max_length;
+    for (int idx : evicted) {
+        if (used + lengths[idx] > batch_max_length) {
+            bins_items.emplace_back();
+            used = 0;
+        }
+        bins_items.back().push_back(idx);
+        used += lengths[idx];
+    }
+}
+
+std::vector<std::vector<int>> bfd(const LengthArray &lengths,
+                                  double batch_max_length,
+                                  int64_t quantize_levels = 0,
+                                  int num_threads = -1) {
+    if (lengths.size() == 0 || batch_max_length <= 0) {
+        return {};
+    }
+    if (lengths.ndim() != 1) {
+        throw std::runtime_error("Lengths must be a 1D sequence");
+    }
+    if (quantize_levels < 0 || quantize_levels > kMaxQuantizeLevels) {
+        throw std::runtime_error(
+            "quantize_levels must be between 0 and 4194304");
+    }
+
+    if (num_threads <= 0) {
+        num_threads = omp_get_max_threads();
+    }
+
+    const double *data = lengths.data();
+    int64_t n = lengths.size();
+    std::vector<std::vector<int>> bins_items;
+
+    {
+        py::gil_scoped_release release;
+
+        double unit =
+            quantize_levels > 0 ? batch_max_length / quantize_levels : 0.0;
+        int64_t capacity_units = quantize_levels;
+        while (capacity_units > 0 && capacity_units * unit > batch_max_length)
+            --capacity_units;
+
+        std::vector<uint64_t> keys(n);
+        int error = 0;
+
+#pragma omp parallel for schedule(static)                                      \
+    num_threads(num_threads) if (n >= kParallelThreshold && num_threads > 1)
+        for (int64_t i = 0; i < n; ++i) {
+            double len = data[i];
+            if (len > batch_max_length) {
+#pragma omp atomic write
+                error = 1;
+            } else if (len < 0) {
+#pragma omp atomic write
+                error = 2;
+            } else if (quantize_levels > 0) {
+                int64_t units = (int64_t)std::ceil(len / unit);
+                if (units * unit < len)
+                    ++units;
+                keys[i] = std::min(std::max<int64_t>(units, 1), capacity_units);
+            } else {
+                keys[i] = length_key(len);
+            }
+        }
+
+        if (error == 1) {
+            throw std::runtime_error("Item size exceeds batch max length");
+        }
+        if (error == 2) {
+            throw std::runtime_error("Item size must be non-negative");
+        }
+
+        std::vector<int> order = radix_order(keys, num_threads);
+
+        if (quantize_levels > 0) {
+            bins_items =
+                best_fit_units(keys.data(), order, (int)capacity_units);
+            repair_overflow(data, batch_max_length, bins_items, num_threads);
+        } else {
+            bins_items = best_fit(data, order, batch_max_length);
+        }
     }
 
-    return final_result;
+    return bins_items;
 }
 
 PYBIND11_MODULE(bfd, m) {
     m.doc() =
         "BFD (Best Fit Decreasing) algorithm optimized implementation in C++";
-    m.def("bfd", &bfd, "Optimized BFD algorithm");
+    m.def("bfd", &bfd, "Optimized BFD algorithm", py::arg("lengths"),
+          py::arg("batch_max_length"), py::arg("quantize_levels") = 0,
+          py::arg("num_threads") = -1);
 }
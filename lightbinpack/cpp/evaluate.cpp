@@ -0,0 +1,234 @@
+#include <omp.h>
+#include <pybind11/numpy.h>
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <stdexcept>
+#include <vector>
+
+namespace py = pybind11;
+
+using IndexArray =
+    py::array_t<int64_t, py::array::c_style | py::array::forcecast>;
+using ValueArray =
+    py::array_t<double, py::array::c_style | py::array::forcecast>;
+
+template <typename T>
+py::dict evaluate_impl(const int64_t *items, const int64_t *offsets,
+                       int64_t num_bins, const T *lengths, int64_t n,
+                       const double *capacity, int64_t num_capacity,
+                       const int64_t *group_offsets, int64_t num_groups,
+                       const double *weights, int num_threads) {
+    int64_t missing = 0;
+    int64_t duplicates = 0;
+    int64_t invalid_indices = 0;
+    int64_t overflow_bins = 0;
+    int64_t empty_bins = 0;
+    double used = 0;
+    double total_capacity = 0;
+    double max_capacity = 0;
+    double unique_length = 0;
+    double min_bin_cost = INFINITY;
+    double max_bin_cost = 0;
+    double sum_group_imbalance = 0;
+    double max_group_imbalance = 0;
+    int64_t balanced_groups = 0;
+
+    std::vector<double> bin_cost(num_bins, 0);
+    std::vector<int32_t> seen(n, 0);
+
+    {
+        py::gil_scoped_release release;
+
+#pragma omp parallel for schedule(dynamic, 1024)                               \
+    num_threads(num_threads) if (num_threads > 1)                              \
+    reduction(+ : invalid_indices, overflow_bins, empty_bins, used,            \
+                  total_capacity) reduction(max : max_capacity)
+        for (int64_t b = 0; b < num_bins; ++b) {
+            double bin_length = 0;
+            double cost = 0;
+            for (int64_t k = offsets[b]; k < offsets[b + 1]; ++k) {
+                int64_t idx = items[k];
+                if (idx < 0 || idx >= n) {
+                    ++invalid_indices;
+                    continue;
+                }
+#pragma omp atomic
+                ++seen[idx];
+                double len = (double)lengths[idx];
+                bin_length += len;
+                cost += weights ? weights[idx] : len * len;
+            }
+
+            double cap = capacity[num_capacity == 1 ? 0 : b];
+            if (bin_length > cap) {
+                ++overflow_bins;
+            }
+            if (offsets[b + 1] == offsets[b]) {
+                ++empty_bins;
+            }
+            bin_cost[b] = cost;
+            used += bin_length;
+            total_capacity += cap;
+            max_capacity = std::max(max_capacity, cap);
+        }
+
+#pragma omp parallel for schedule(static)                                      \
+    num_threads(num_threads) if (num_threads > 1)                              \
+    reduction(+ : missing, duplicates, unique_length)
+        for (int64_t i = 0; i < n; ++i) {
+            if (seen[i] == 0) {
+                ++missing;
+            } else {
+                duplicates += seen[i] - 1;
+                unique_length += (double)lengths[i];
+            }
+        }
+
+#pragma omp parallel for schedule(dynamic, 256)                                \
+    num_threads(num_threads) if (num_threads > 1)                              \
+    reduction(+ : sum_group_imbalance, balanced_groups)                        \
+    reduction(max : max_group_imbalance, max_bin_cost)                         \
+    reduction(min : min_bin_cost)
+        for (int64_t g = 0; g < num_groups; ++g) {
+            double group_min = INFINITY;
+            double group_max = 0;
+            for (int64_t b = group_offsets[g]; b < group_offsets[g + 1]; ++b) {
+                if (offsets[b + 1] == offsets[b]) {
+                    continue;
+                }
+                group_min = std::min(group_min, bin_cost[b]);
+                group_max = std::max(group_max, bin_cost[b]);
+            }
+            if (group_min == INFINITY) {
+                continue;
+            }
+            double imbalance =
+                group_max > 0 ? (group_max - group_min) / group_max : 0.0;
+            sum_group_imbalance += imbalance;
+            max_group_imbalance = std::max(max_group_imbalance, imbalance);
+            ++balanced_groups;
+            min_bin_cost = std::min(min_bin_cost, group_min);
+            max_bin_cost = std::max(max_bin_cost, group_max);
+        }
+    }
+
+    int64_t bin_lower_bound =
+        max_capacity > 0 ? (int64_t)std::ceil(unique_length / max_capacity) : 0;
+
+    py::dict result;
+    result["valid"] =
+        missing == 0 && invalid_indices == 0 && overflow_bins == 0;
+    result["num_items"] = n;
+    result["num_bins"] = num_bins;
+    result["num_groups"] = num_groups;
+    result["empty_bins"] = empty_bins;
+    result["missing"] = missing;
+    result["duplicates"] = duplicates;
+    result["invalid_indices"] = invalid_indices;
+    result["overflow_bins"] = overflow_bins;
+    result["utilization"] = total_capacity > 0 ? used / total_capacity : 0.0;
+    result["group_imbalance"] =
+        balanced_groups > 0 ? sum_group_imbalance / balanced_groups : 0.0;
+    result["max_group_imbalance"] = max_group_imbalance;
+    result["global_imbalance"] =
+        max_bin_cost > 0 ? (max_bin_cost - min_bin_cost) / max_bin_cost : 0.0;
+    result["bin_lower_bound"] = bin_lower_bound;
+    result["bin_excess"] = num_bins - empty_bins - bin_lower_bound;
+    return result;
+}
+
+py::dict evaluate(const IndexArray &items, const IndexArray &offsets,
+                  const py::array &lengths, const ValueArray &capacity,
+                  const IndexArray &group_offsets,
+                  const py::object &weights = py::none(),
+                  int num_threads = -1) {
+    if (items.ndim() != 1 || offsets.ndim() != 1 || offsets.size() < 1) {
+        throw std::runtime_error(
+            "Items and offsets must be 1D arrays with at least one offset");
+    }
+    int64_t num_bins = offsets.size() - 1;
+    const int64_t *offsets_data = offsets.data();
+    for (int64_t b = 0; b < num_bins; ++b) {
+        if (offsets_data[b] > offsets_data[b + 1]) {
+            throw std::runtime_error("Offsets must be non-decreasing");
+        }
+    }
+    if (offsets_data[0] != 0 || offsets_data[num_bins] != items.size()) {
+        throw std::runtime_error("Offsets must span the items array");
+    }
+
+    if (capacity.size() != 1 && capacity.size() != num_bins) {
+        throw std::runtime_error(
+            "Capacity must be a single value or one value per bin");
+    }
+
+    std::vector<int64_t> default_groups;
+    const int64_t *group_data = group_offsets.data();
+    int64_t num_groups = group_offsets.size() - 1;
+    if (group_offsets.size() == 0) {
+        default_groups.resize(num_bins + 1);
+        for (int64_t b = 0; b <= num_bins; ++b) {
+            default_groups[b] = b;
+        }
+        group_data = default_groups.data();
+        num_groups = num_bins;
+    } else if (group_data[0] != 0 || group_data[num_groups] != num_bins) {
+        throw std::runtime_error("Group offsets must span all bins");
+    }
+
+    py::array lengths_array = lengths;
+    if (lengths_array.ndim() != 1 ||
+        !(lengths_array.flags() & py::array::c_style)) {
+        lengths_array = ValueArray::ensure(lengths);
+        if (!lengths_array) {
+            throw std::runtime_error("Lengths must be a 1D array");
+        }
+    }
+    int64_t n = lengths_array.size();
+
+    ValueArray weights_array;
+    const double *weights_data = nullptr;
+    if (!weights.is_none()) {
+        weights_array = ValueArray::ensure(weights);
+        if (!weights_array || weights_array.size() != n) {
+            throw std::runtime_error(
+                "Weights must have the same size as lengths");
+        }
+        weights_data = weights_array.data();
+    }
+
+    if (num_threads <= 0) {
+        num_threads = omp_get_max_threads();
+    }
+
+    auto run = [&](auto *typed_lengths) {
+        return evaluate_impl(items.data(), offsets_data, num_bins,
+                             typed_lengths, n, capacity.data(), capacity.size(),
+                             group_data, num_groups, weights_data, num_threads);
+    };
+
+    if (lengths_array.dtype().equal(py::dtype::of<int32_t>())) {
+        return run(static_cast<const int32_t *>(lengths_array.data()));
+    }
+    if (lengths_array.dtype().equal(py::dtype::of<int64_t>())) {
+        return run(static_cast<const int64_t *>(lengths_array.data()));
+    }
+    if (lengths_array.dtype().equal(py::dtype::of<double>())) {
+        return run(static_cast<const double *>(lengths_array.data()));
+    }
+    ValueArray converted = ValueArray::ensure(lengths_array);
+    return run(converted.data());
+}
+
+PYBIND11_MODULE(evaluate, m) {
+    m.doc() = "Validation, utilization and balance metrics for packing plans "
+              "in flat format";
+    m.def("evaluate", &evaluate, "Evaluate a flat packing plan",
+          py::arg("items"), py::arg("offsets"), py::arg("lengths"),
+          py::arg("capacity"), py::arg("group_offsets") = IndexArray(),
+          py::arg("weights") = py::none(), py::arg("num_threads") = -1);
+}
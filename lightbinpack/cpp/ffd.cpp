@@ -1,123 +1,336 @@
+#include <omp.h>
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
 #include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <cstring>
 #include <stdexcept>
 #include <vector>
 
 namespace py = pybind11;
 
-class SegmentTree {
-  public:
-    SegmentTree(size_t size) : size(size) { tree.resize(4 * size, 0.0); }
+using LengthArray =
+    py::array_t<double, py::array::c_style | py::array::forcecast>;
+
+const int64_t kParallelThreshold = 1 << 17;
+const int64_t kMaxQuantizeLevels = 1 << 22;
+const int kMinRadixBits = 8;
+const int kMaxRadixBits = 16;
+
+// Non-negative doubles order the same way as their IEEE-754 bit patterns, so
+// the sort key is the raw representation with the sign bit dropped (which
+// also folds -0.0 onto 0.0).
+inline uint64_t length_key(double value) {
+    uint64_t bits;
+    std::memcpy(&bits, &value, sizeof(bits));
+    return bits & ~(1ULL << 63);
+}
 
-    void build(const std::vector<double> &bins_remaining_space) {
-        build(1, 0, size - 1, bins_remaining_space);
+// Item indices by descending key, ties by descending index (the order
+// std::sort with std::greater<std::pair<key, index>> gives, so results match
+// the comparison-sort version). One MSD radix pass over the top bits of the
+// key range scatters items into buckets small enough to finish in cache.
+std::vector<int> radix_order(const std::vector<uint64_t> &keys,
+                             int num_threads) {
+    int64_t n = keys.size();
+    bool parallel = n >= kParallelThreshold && num_threads > 1;
+
+    uint64_t low = ~0ULL;
+    uint64_t high = 0;
+#pragma omp parallel for schedule(static) reduction(min : low)                 \
+    reduction(max : high) num_threads(num_threads) if (parallel)
+    for (int64_t i = 0; i < n; ++i) {
+        low = std::min(low, keys[i]);
+        high = std::max(high, keys[i]);
     }
 
-    int query(double size_needed) {
-        return query(1, 0, this->size - 1, size_needed);
+    int bits = kMinRadixBits;
+    while (bits < kMaxRadixBits && ((int64_t)1 << (bits + 3)) < n)
+        ++bits;
+    int width = 0;
+    while (width < 64 && ((high - low) >> width) != 0)
+        ++width;
+    int shift = std::max(0, width - bits);
+    int64_t num_buckets = (int64_t)1 << bits;
+
+    int max_threads = parallel ? num_threads : 1;
+    std::vector<int64_t> offsets(max_threads * num_buckets);
+    std::vector<int64_t> bucket_start(num_buckets + 1);
+    std::vector<std::pair<uint64_t, int>> sorted(n);
+    std::vector<int> order(n);
+
+#pragma omp parallel num_threads(max_threads) if (parallel)
+    {
+        int thread = omp_get_thread_num();
+        int team_size = omp_get_num_threads();
+        int64_t begin = n * thread / team_size;
+        int64_t end = n * (thread + 1) / team_size;
+        int64_t *local = &offsets[thread * num_buckets];
+
+        std::fill(local, local + num_buckets, 0);
+        for (int64_t i = begin; i < end; ++i) {
+            ++local[(high - keys[i]) >> shift];
+        }
+#pragma omp barrier
+#pragma omp single
+        {
+            int64_t position = 0;
+            for (int64_t b = 0; b < num_buckets; ++b) {
+                bucket_start[b] = position;
+                for (int t = 0; t < team_size; ++t) {
+                    int64_t count = offsets[t * num_buckets + b];
+                    offsets[t * num_buckets + b] = position;
+                    position += count;
+                }
+            }
+            bucket_start[num_buckets] = position;
+        }
+        for (int64_t i = begin; i < end; ++i) {
+            sorted[local[(high - keys[i]) >> shift]++] = {keys[i], (int)i};
+        }
+#pragma omp barrier
+#pragma omp for schedule(dynamic, 64)
+        for (int64_t b = 0; b < num_buckets; ++b) {
+            auto first = sorted.begin() + bucket_start[b];
+            auto last = sorted.begin() + bucket_start[b + 1];
+            std::sort(first, last, std::greater<std::pair<uint64_t, int>>());
+            for (auto it = first; it != last; ++it) {
+                order[it - sorted.begin()] = it->second;
+            }
+        }
     }
 
-    void update(int idx, double value) { update(1, 0, size - 1, idx, value); }
+    return order;
+}
 
+template <typename T> class FirstFitTree {
   private:
-    size_t size;
-    std::vector<double> tree;
+    int64_t leaves;
+    T capacity;
+    std::vector<T> tree;
 
-    void build(int node, int start, int end,
-               const std::vector<double> &bins_remaining_space) {
-        if (start == end) {
-            tree[node] = bins_remaining_space[start];
-        } else {
-            int mid = (start + end) / 2;
-            build(2 * node, start, mid, bins_remaining_space);
-            build(2 * node + 1, mid + 1, end, bins_remaining_space);
-            tree[node] = std::max(tree[2 * node], tree[2 * node + 1]);
+  public:
+    FirstFitTree(T capacity, int64_t expected_bins) : capacity(capacity) {
+        leaves = 1;
+        while (leaves <= expected_bins)
+            leaves <<= 1;
+        tree.assign(2 * leaves, capacity);
+    }
+
+    int64_t size() const { return leaves; }
+
+    // Leftmost bin whose remaining capacity is at least `target`. Unopened
+    // bins hold the full capacity, so this is never past the first of them.
+    int64_t find_first_fit(T target) const {
+        int64_t idx = 1;
+        while (idx < leaves) {
+            idx <<= 1;
+            if (tree[idx] < target)
+                ++idx;
         }
+        return idx - leaves;
     }
 
-    int query(int node, int start, int end, double size_needed) {
-        if (tree[node] < size_needed) {
-            return -1;
+    void update(int64_t bin, T value) {
+        int64_t idx = bin + leaves;
+        tree[idx] = value;
+        for (idx >>= 1; idx > 0; idx >>= 1) {
+            T new_val = std::max(tree[2 * idx], tree[2 * idx + 1]);
+            if (tree[idx] == new_val)
+                break;
+            tree[idx] = new_val;
         }
-        if (start == end) {
-            return start;
+    }
+
+    void grow() {
+        std::vector<T> next(4 * leaves, capacity);
+        std::copy(tree.begin() + leaves, tree.end(), next.begin() + 2 * leaves);
+        for (int64_t idx = 2 * leaves - 1; idx > 0; --idx) {
+            next[idx] = std::max(next[2 * idx], next[2 * idx + 1]);
         }
-        int mid = (start + end) / 2;
-        int left_result = query(2 * node, start, mid, size_needed);
-        if (left_result != -1) {
-            return left_result;
+        leaves <<= 1;
+        tree.swap(next);
+    }
+};
+
+template <typename T>
+std::vector<std::vector<int>>
+first_fit(const T *sizes, const std::vector<int> &order, T capacity) {
+    int64_t n = order.size();
+    std::vector<int64_t> bin_ids(n);
+    std::vector<T> bins_remaining;
+    FirstFitTree<T> tree(capacity, std::min<int64_t>(n, 4096));
+
+    for (int64_t k = 0; k < n; ++k) {
+        T size = sizes[order[k]];
+        int64_t bin_idx = tree.find_first_fit(size);
+
+        if (bin_idx == (int64_t)bins_remaining.size()) {
+            bins_remaining.push_back(capacity);
+            if ((int64_t)bins_remaining.size() == tree.size()) {
+                tree.grow();
+            }
         }
-        return query(2 * node + 1, mid + 1, end, size_needed);
+        bins_remaining[bin_idx] -= size;
+        bin_ids[k] = bin_idx;
+        tree.update(bin_idx, bins_remaining[bin_idx]);
     }
 
-    void update(int node, int start, int end, int idx, double value) {
-        if (start == end) {
-            tree[node] = value;
-        } else {
-            int mid = (start + end) / 2;
-            if (idx <= mid) {
-                update(2 * node, start, mid, idx, value);
-            } else {
-                update(2 * node + 1, mid + 1, end, idx, value);
+    std::vector<int64_t> bins_count(bins_remaining.size(), 0);
+    for (int64_t k = 0; k < n; ++k) {
+        ++bins_count[bin_ids[k]];
+    }
+    std::vector<std::vector<int>> bins_items(bins_remaining.size());
+    for (size_t b = 0; b < bins_items.size(); ++b) {
+        bins_items[b].reserve(bins_count[b]);
+    }
+    for (int64_t k = 0; k < n; ++k) {
+        bins_items[bin_ids[k]].push_back(order[k]);
+    }
+
+    return bins_items;
+}
+
+// Quantized lengths are rounded up and the quantized capacity rounded down,
+// so a bin that fits in units also fits in real lengths. The final pass
+// re-checks each bin with the same summation the evaluator uses and moves
+// items to new bins if floating-point rounding ever breaks that bound.
+void repair_overflow(const double *lengths, double batch_max_length,
+                     std::vector<std::vector<int>> &bins_items,
+                     int num_threads) {
+    int64_t num_bins = bins_items.size();
+    std::vector<char> overflow(num_bins, 0);
+    int64_t overflow_count = 0;
+
+#pragma omp parallel for schedule(static) reduction(+ : overflow_count)        \
+    num_threads(num_threads) if (num_bins >= kParallelThreshold)
+    for (int64_t b = 0; b < num_bins; ++b) {
+        double used = 0;
+        for (int idx : bins_items[b]) {
+            used += lengths[idx];
+        }
+        if (used > batch_max_length) {
+            overflow[b] = 1;
+            ++overflow_count;
+        }
+    }
+    if (overflow_count == 0) {
+        return;
+    }
+
+    std::vector<int> evicted;
+    for (int64_t b = 0; b < num_bins; ++b) {
+        if (!overflow[b]) {
+            continue;
+        }
+        std::vector<int> &items = bins_items[b];
+        while (!items.empty()) {
+            double used = 0;
+            for (int idx : items) {
+                used += lengths[idx];
+            }
+            if (used <= batch_max_length) {
+                break;
             }
-            tree[node] = std::max(tree[2 * node], tree[2 * node + 1]);
+            evicted.push_back(items.back());
+            items.pop_back();
         }
     }
-};
 
-std::vector<std::vector<int>> ffd(const std::vector<double> &lengths,
-                                  double batch_max_length) {
-    if (lengths.empty() || batch_max_length <= 0) {
+    double used = batch_max_length;
+    for (int idx : evicted) {
+        if (used + lengths[idx] > batch_max_length) {
+            bins_items.emplace_back();
+            used = 0;
+        }
+        bins_items.back().push_back(idx);
+        used += lengths[idx];
+    }
+}
+
+std::vector<std::vector<int>> ffd(const LengthArray &lengths,
+                                  double batch_max_length,
+                                  int64_t quantize_levels = 0,
+                                  int num_threads = -1) {
+    if (lengths.size() == 0 || batch_max_length <= 0) {
         return {};
     }
+    if (lengths.ndim() != 1) {
+        throw std::runtime_error("Lengths must be a 1D sequence");
+    }
+    if (quantize_levels < 0 || quantize_levels > kMaxQuantizeLevels) {
+        throw std::runtime_error(
+            "quantize_levels must be between 0 and 4194304");
+    }
 
-    std::vector<std::pair<double, int>> length_pairs;
-    length_pairs.reserve(lengths.size());
-    for (size_t i = 0; i < lengths.size(); i++) {
-        if (lengths[i] > batch_max_length) {
-            throw std::runtime_error("Item size exceeds batch max length");
-        }
-        length_pairs.emplace_back(lengths[i], i);
+    if (num_threads <= 0) {
+        num_threads = omp_get_max_threads();
     }
 
-    std::sort(length_pairs.begin(), length_pairs.end(),
-              std::greater<std::pair<double, int>>());
+    const double *data = lengths.data();
+    int64_t n = lengths.size();
+    std::vector<std::vector<int>> bins_items;
 
-    size_t n = lengths.size();
-    std::vector<double> bins_remaining_space(n, 0.0);
-    std::vector<std::vector<int>> bins_items(n);
+    {
+        py::gil_scoped_release release;
 
-    SegmentTree segment_tree(n);
-    segment_tree.build(bins_remaining_space);
+        double unit =
+            quantize_levels > 0 ? batch_max_length / quantize_levels : 0.0;
+        int64_t capacity_units = quantize_levels;
+        while (capacity_units > 0 && capacity_units * unit > batch_max_length)
+            --capacity_units;
 
-    size_t bin_count = 0;
+        std::vector<uint64_t> keys(n);
+        int error = 0;
 
-    for (const auto &pair : length_pairs) {
-        double size = pair.first;
-        int orig_idx = pair.second;
+#pragma omp parallel for schedule(static)                                      \
+    num_threads(num_threads) if (n >= kParallelThreshold && num_threads > 1)
+        for (int64_t i = 0; i < n; ++i) {
+            double len = data[i];
+            if (len > batch_max_length) {
+#pragma omp atomic write
+                error = 1;
+            } else if (len < 0) {
+#pragma omp atomic write
+                error = 2;
+            } else if (quantize_levels > 0) {
+                int64_t units = (int64_t)std::ceil(len / unit);
+                if (units * unit < len)
+                    ++units;
+                keys[i] = std::min(std::max<int64_t>(units, 1), capacity_units);
+            } else {
+                keys[i] = length_key(len);
+            }
+        }
 
-        int bin_idx = segment_tree.query(size);
+        if (error == 1) {
+            throw std::runtime_error("Item size exceeds batch max length");
+        }
+        if (error == 2) {
+            throw std::runtime_error("Item size must be non-negative");
+        }
+
+        std::vector<int> order = radix_order(keys, num_threads);
 
-        if (bin_idx != -1 && bin_idx < static_cast<int>(bin_count)) {
-            bins_remaining_space[bin_idx] -= size;
-            bins_items[bin_idx].push_back(orig_idx);
-            segment_tree.update(bin_idx, bins_remaining_space[bin_idx]);
+        if (quantize_levels > 0) {
+            const int64_t *units =
+                reinterpret_cast<const int64_t *>(keys.data());
+            bins_items = first_fit(units, order, capacity_units);
+            repair_overflow(data, batch_max_length, bins_items, num_threads);
         } else {
-            bins_remaining_space[bin_count] = batch_max_length - size;
-            bins_items[bin_count].push_back(orig_idx);
-            segment_tree.update(bin_count, bins_remaining_space[bin_count]);
-            bin_count++;
+            bins_items = first_fit(data, order, batch_max_length);
         }
     }
 
-    bins_items.resize(bin_count);
-
     return bins_items;
 }
 
 PYBIND11_MODULE(ffd, m) {
     m.doc() = "FFD (First Fit Decreasing) algorithm implementation in C++";
-    m.def("ffd", &ffd, "FFD algorithm");
+    m.def("ffd", &ffd, "FFD algorithm", py::arg("lengths"),
+          py::arg("batch_max_length"), py::arg("quantize_levels") = 0,
+          py::arg("num_threads") = -1);
 }
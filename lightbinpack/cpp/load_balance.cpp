@@ -92,11 +92,14 @@ std::vector<int> balance_single_list(const std::vector<int> &input_lengths,
 
 std::vector<std::vector<int>>
 load_balance_parallel(const std::vector<std::vector<int>> &input_data,
-                      int nodes, bool enable_parallel) {
+                      int nodes, bool enable_parallel, int num_threads = -1) {
     std::vector<std::vector<int>> result(input_data.size());
 
     if (enable_parallel) {
-#pragma omp parallel for
+        if (num_threads <= 0) {
+            num_threads = omp_get_max_threads();
+        }
+#pragma omp parallel for num_threads(num_threads)
         for (size_t i = 0; i < input_data.size(); ++i) {
             const auto &lengths = input_data[i];
             if (!lengths.empty()) {
@@ -122,12 +125,13 @@ load_balance_parallel(const std::vector<std::vector<int>> &input_data,
 
 std::vector<std::vector<int>>
 load_balance(const std::vector<std::vector<int>> &input_data, int nodes,
-             bool enable_parallel = true) {
+             bool enable_parallel = true, int num_threads = -1) {
     if (input_data.empty()) {
         return {};
     }
 
-    return load_balance_parallel(input_data, nodes, enable_parallel);
+    return load_balance_parallel(input_data, nodes, enable_parallel,
+                                 num_threads);
 }
 
 std::vector<int> load_balance(const std::vector<int> &input_data, int nodes) {
@@ -139,7 +143,7 @@ std::vector<int> load_balance(const std::vector<int> &input_data, int nodes) {
 
 std::vector<std::vector<std::vector<int>>>
 load_balance(const std::vector<std::vector<std::vector<int>>> &input_data,
-             int nodes, bool enable_parallel = true) {
+             int nodes, bool enable_parallel = true, int num_threads = -1) {
     if (input_data.empty()) {
         return {};
     }
@@ -147,7 +151,10 @@ load_balance(const std::vector<std::vector<std::vector<int>>> &input_data,
     std::vector<std::vector<std::vector<int>>> result(input_data.size());
 
     if (enable_parallel) {
-#pragma omp parallel for
+        if (num_threads <= 0) {
+            num_threads = omp_get_max_threads();
+        }
+#pragma omp parallel for num_threads(num_threads)
         for (size_t i = 0; i < input_data.size(); ++i) {
             const auto &data_2d = input_data[i];
             if (!data_2d.empty()) {
@@ -176,16 +183,16 @@ PYBIND11_MODULE(load_balance, m) {
     m.doc() = "Load balancing algorithm implementation";
     m.def("load_balance",
           py::overload_cast<const std::vector<std::vector<std::vector<int>>> &,
-                            int, bool>(&load_balance),
+                            int, bool, int>(&load_balance),
           "Load balancing algorithm for 3D integer lists",
           py::arg("input_data"), py::arg("nodes") = 2,
-          py::arg("enable_parallel") = true);
+          py::arg("enable_parallel") = true, py::arg("num_threads") = -1);
     m.def("load_balance",
-          py::overload_cast<const std::vector<std::vector<int>> &, int, bool>(
-              &load_balance),
+          py::overload_cast<const std::vector<std::vector<int>> &, int, bool,
+                            int>(&load_balance),
           "Load balancing algorithm for 2D integer lists",
           py::arg("input_data"), py::arg("nodes") = 2,
-          py::arg("enable_parallel") = true);
+          py::arg("enable_parallel") = true, py::arg("num_threads") = -1);
     m.def("load_balance",
           py::overload_cast<const std::vector<int> &, int>(&load_balance),
           "Load balancing algorithm for 1D integer list", py::arg("input_data"),
@@ -118,7 +118,8 @@ std::vector<std::vector<int>> obfd_worker(const std::vector<int> &lengths,
 
 std::vector<std::vector<int>> obfdp(const std::vector<int> &lengths,
                                     int batch_max_length,
-                                    int item_max_length = -1) {
+                                    int item_max_length = -1,
+                                    int num_threads = -1) {
     if (lengths.empty() || batch_max_length <= 0) {
         return {};
     }
@@ -142,13 +143,15 @@ std::vector<std::vector<int>> obfdp(const std::vector<int> &lengths,
         }
     }
 
-    int num_threads = 1;
-    if (lengths.size() > 20000)
-        num_threads = 2;
-    if (lengths.size() > 100000)
-        num_threads = 4;
-    if (lengths.size() > 500000)
-        num_threads = omp_get_max_threads();
+    if (num_threads <= 0) {
+        num_threads = 1;
+        if (lengths.size() > 20000)
+            num_threads = 2;
+        if (lengths.size() > 100000)
+            num_threads = 4;
+        if (lengths.size() > 500000)
+            num_threads = omp_get_max_threads();
+    }
 
     std::vector<std::vector<int>> groups(num_threads);
     for (size_t i = 0; i < lengths.size(); ++i) {
@@ -189,5 +192,5 @@ PYBIND11_MODULE(obfdp, m) {
               "implementation";
     m.def("obfdp", &obfdp, "Parallel Optimized BFD algorithm",
           py::arg("lengths"), py::arg("batch_max_length"),
-          py::arg("item_max_length") = -1);
+          py::arg("item_max_length") = -1, py::arg("num_threads") = -1);
 }
@@ -0,0 +1,216 @@
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+#include <algorithm>
+#include <stdexcept>
+#include <vector>
+
+namespace py = pybind11;
+
+class IterativeSegmentTree {
+  private:
+    int n;
+    std::vector<int> tree;
+
+  public:
+    IterativeSegmentTree(int max_length) {
+        n = 1;
+        while (n < max_length + 1)
+            n <<= 1;
+        tree.assign(2 * n, 0);
+    }
+
+    void update(int idx, int val) {
+        idx += n - 1;
+        tree[idx] = val;
+        while (idx > 0) {
+            idx = (idx - 1) / 2;
+            int left = tree[2 * idx + 1];
+            int right = tree[2 * idx + 2];
+            int new_val = std::max(left, right);
+            if (tree[idx] == new_val)
+                break;
+            tree[idx] = new_val;
+        }
+    }
+
+    int find_best_fit(int target) const {
+        int idx = 0;
+        if (tree[idx] < target)
+            return -1;
+        while (idx < (n - 1)) {
+            if (tree[2 * idx + 1] >= target)
+                idx = 2 * idx + 1;
+            else
+                idx = 2 * idx + 2;
+        }
+        int capacity = idx - (n - 1);
+        return tree[idx] >= target ? capacity : -1;
+    }
+};
+
+// Persistent state of an OBFD plan: its bins, their residual capacities and
+// the capacity index. It is built once from an existing plan, after which
+// each update only touches the new items and the bins they go to.
+class OBFDUpdater {
+  private:
+    int batch_max_length;
+    int num_items;
+    IterativeSegmentTree seg_tree;
+    std::vector<std::vector<size_t>> capacity_to_bins;
+    std::vector<int> bins_remaining;
+    std::vector<std::vector<int>> bins_items;
+
+  public:
+    OBFDUpdater(const std::vector<std::vector<int>> &bins,
+                const std::vector<int> &lengths, int batch_max_length)
+        : batch_max_length(batch_max_length), num_items(lengths.size()),
+          seg_tree(std::max(batch_max_length, 1)),
+          capacity_to_bins(std::max(batch_max_length, 0) + 1),
+          bins_items(bins) {
+        if (batch_max_length <= 0) {
+            throw std::runtime_error("Batch max length must be positive");
+        }
+        bins_remaining.reserve(bins.size());
+        for (size_t bin_idx = 0; bin_idx < bins.size(); ++bin_idx) {
+            long long used = 0;
+            for (int idx : bins[bin_idx]) {
+                if (idx < 0 || idx >= num_items) {
+                    throw std::runtime_error(
+                        "Existing bin references a new item");
+                }
+                used += lengths[idx];
+            }
+            if (used > batch_max_length) {
+                throw std::runtime_error(
+                    "Existing bin exceeds batch max length");
+            }
+
+            int capacity = batch_max_length - (int)used;
+            bins_remaining.push_back(capacity);
+            capacity_to_bins[capacity].push_back(bin_idx);
+            if (capacity > 0) {
+                seg_tree.update(capacity, capacity);
+            }
+        }
+    }
+
+    int get_num_items() const { return num_items; }
+
+    const std::vector<std::vector<int>> &get_bins() const { return bins_items; }
+
+    // Packs items numbered from the current item count onwards and returns
+    // the changed and new bins with their full contents, by bin index.
+    std::vector<std::pair<int, std::vector<int>>>
+    update(const std::vector<int> &lengths, int item_max_length = -1) {
+        if (item_max_length <= 0) {
+            item_max_length = 0;
+            for (int len : lengths) {
+                item_max_length = std::max(item_max_length, len);
+            }
+        }
+
+        std::vector<std::vector<int>> count(item_max_length + 1);
+        for (size_t i = 0; i < lengths.size(); ++i) {
+            int len = lengths[i];
+            if (len > batch_max_length) {
+                throw std::runtime_error("Item size exceeds batch max length");
+            }
+            if (len > item_max_length) {
+                throw std::runtime_error("Item size exceeds item max length");
+            }
+            if (len <= 0) {
+                throw std::runtime_error("Item size must be positive");
+            }
+            count[len].push_back(num_items + i);
+        }
+
+        std::vector<size_t> changed;
+        for (int size = item_max_length; size >= 1; --size) {
+            for (int orig_idx : count[size]) {
+                int best_capacity = seg_tree.find_best_fit(size);
+
+                size_t bin_idx;
+                if (best_capacity != -1) {
+                    bin_idx = capacity_to_bins[best_capacity].back();
+                    capacity_to_bins[best_capacity].pop_back();
+                    if (capacity_to_bins[best_capacity].empty()) {
+                        seg_tree.update(best_capacity, 0);
+                    }
+                } else {
+                    bin_idx = bins_remaining.size();
+                    bins_remaining.push_back(batch_max_length);
+                    bins_items.emplace_back();
+                }
+
+                int new_capacity = bins_remaining[bin_idx] - size;
+                bins_remaining[bin_idx] = new_capacity;
+                bins_items[bin_idx].push_back(orig_idx);
+                changed.push_back(bin_idx);
+
+                capacity_to_bins[new_capacity].push_back(bin_idx);
+                if (new_capacity > 0) {
+                    seg_tree.update(new_capacity, new_capacity);
+                }
+            }
+        }
+        num_items += lengths.size();
+
+        std::sort(changed.begin(), changed.end());
+        changed.erase(std::unique(changed.begin(), changed.end()),
+                      changed.end());
+        std::vector<std::pair<int, std::vector<int>>> result;
+        result.reserve(changed.size());
+        for (size_t bin_idx : changed) {
+            result.emplace_back(bin_idx, bins_items[bin_idx]);
+        }
+        return result;
+    }
+};
+
+std::vector<std::vector<int>> obfdu(const std::vector<std::vector<int>> &bins,
+                                    const std::vector<int> &lengths,
+                                    int batch_max_length, int start_index = -1,
+                                    int item_max_length = -1) {
+    if (batch_max_length <= 0) {
+        return bins;
+    }
+
+    if (start_index < 0) {
+        start_index = 0;
+        for (const auto &bin : bins) {
+            for (int idx : bin) {
+                start_index = std::max(start_index, idx + 1);
+            }
+        }
+    }
+    if (start_index > (int)lengths.size()) {
+        throw std::runtime_error("Start index exceeds number of lengths");
+    }
+    if (start_index == (int)lengths.size()) {
+        return bins;
+    }
+
+    OBFDUpdater updater(
+        bins, std::vector<int>(lengths.begin(), lengths.begin() + start_index),
+        batch_max_length);
+    updater.update(
+        std::vector<int>(lengths.begin() + start_index, lengths.end()),
+        item_max_length);
+    return updater.get_bins();
+}
+
+PYBIND11_MODULE(obfdu, m) {
+    m.doc() = "Incremental update of Optimized BFD (Best Fit Decreasing) "
+              "packing plans";
+    m.def("obfdu", &obfdu, "Incremental Optimized BFD algorithm",
+          py::arg("bins"), py::arg("lengths"), py::arg("batch_max_length"),
+          py::arg("start_index") = -1, py::arg("item_max_length") = -1);
+    py::class_<OBFDUpdater>(m, "OBFDUpdater")
+        .def(py::init<const std::vector<std::vector<int>> &,
+                      const std::vector<int> &, int>(),
+             py::arg("bins"), py::arg("lengths"), py::arg("batch_max_length"))
+        .def("update", &OBFDUpdater::update, py::arg("lengths"),
+             py::arg("item_max_length") = -1)
+        .def_property_readonly("num_items", &OBFDUpdater::get_num_items);
+}
@@ -103,7 +103,7 @@ class BinGroup {
 
 std::vector<std::vector<std::vector<int>>>
 ogbfd(const std::vector<int> &lengths, int batch_max_length, int bins_per_group,
-      int item_max_length = -1, int strategy = 0) {
+      int item_max_length = -1, int strategy = 0, bool fill_last_group = true) {
     if (lengths.empty() || batch_max_length <= 0 || bins_per_group <= 0) {
         return {};
     }
@@ -181,7 +181,7 @@ ogbfd(const std::vector<int> &lengths, int batch_max_length, int bins_per_group,
             result.push_back(group.get_bins());
         }
 
-        if (result.size() >= 2) {
+        if (fill_last_group && result.size() >= 2) {
             auto &target_group = result.back();
             const auto &source_group = result.front();
 
@@ -297,7 +297,7 @@ ogbfd(const std::vector<int> &lengths, int batch_max_length, int bins_per_group,
             result.push_back(group);
         }
 
-        if (result.size() >= 2) {
+        if (fill_last_group && result.size() >= 2) {
             auto &target_group = result.back();
             const auto &source_group = result.front();
 
@@ -361,5 +361,5 @@ PYBIND11_MODULE(ogbfd, m) {
     m.def("ogbfd", &ogbfd, "Optimized Grouped BFD algorithm",
           py::arg("lengths"), py::arg("batch_max_length"),
           py::arg("bins_per_group") = 1, py::arg("item_max_length") = -1,
-          py::arg("strategy") = 0);
+          py::arg("strategy") = 0, py::arg("fill_last_group") = true);
 }
@@ -234,7 +234,8 @@ ogbfd_worker(const std::vector<int> &lengths, const std::vector<int> &indices,
 
 std::vector<std::vector<std::vector<int>>>
 ogbfdp(const std::vector<int> &lengths, int batch_max_length,
-       int bins_per_group = 1, int item_max_length = -1, int strategy = 0) {
+       int bins_per_group = 1, int item_max_length = -1, int strategy = 0,
+       int num_threads = -1) {
     if (lengths.empty() || batch_max_length <= 0 || bins_per_group <= 0) {
         return {};
     }
@@ -258,13 +259,15 @@ ogbfdp(const std::vector<int> &lengths, int batch_max_length,
         }
     }
 
-    int num_threads = 1;
-    if (lengths.size() > 20000)
-        num_threads = 2;
-    if (lengths.size() > 100000)
-        num_threads = 4;
-    if (lengths.size() > 500000)
-        num_threads = omp_get_max_threads();
+    if (num_threads <= 0) {
+        num_threads = 1;
+        if (lengths.size() > 20000)
+            num_threads = 2;
+        if (lengths.size() > 100000)
+            num_threads = 4;
+        if (lengths.size() > 500000)
+            num_threads = omp_get_max_threads();
+    }
 
     std::vector<std::vector<int>> groups(num_threads);
     for (size_t i = 0; i < lengths.size(); ++i) {
@@ -371,5 +374,5 @@ PYBIND11_MODULE(ogbfdp, m) {
     m.def("ogbfdp", &ogbfdp, "Parallel Optimized Grouped BFD algorithm",
           py::arg("lengths"), py::arg("batch_max_length"),
           py::arg("bins_per_group") = 1, py::arg("item_max_length") = -1,
-          py::arg("strategy") = 0);
+          py::arg("strategy") = 0, py::arg("num_threads") = -1);
 }
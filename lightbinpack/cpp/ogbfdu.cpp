@@ -0,0 +1,398 @@
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+#include <algorithm>
+#include <queue>
+#include <stdexcept>
+#include <vector>
+
+namespace py = pybind11;
+
+class IterativeSegmentTree {
+  private:
+    int n;
+    std::vector<int> tree;
+
+  public:
+    IterativeSegmentTree(int max_length) {
+        n = 1;
+        while (n < max_length + 1)
+            n <<= 1;
+        tree.assign(2 * n, 0);
+    }
+
+    void update(int idx, int val) {
+        idx += n - 1;
+        tree[idx] = val;
+        while (idx > 0) {
+            idx = (idx - 1) / 2;
+            int left = tree[2 * idx + 1];
+            int right = tree[2 * idx + 2];
+            int new_val = std::max(left, right);
+            if (tree[idx] == new_val)
+                break;
+            tree[idx] = new_val;
+        }
+    }
+
+    int find_best_fit(int target) const {
+        int idx = 0;
+        if (tree[idx] < target)
+            return -1;
+        while (idx < (n - 1)) {
+            if (tree[2 * idx + 1] >= target)
+                idx = 2 * idx + 1;
+            else
+                idx = 2 * idx + 2;
+        }
+        int capacity = idx - (n - 1);
+        return tree[idx] >= target ? capacity : -1;
+    }
+};
+
+class BinGroup {
+  private:
+    std::vector<std::vector<int>> bins;
+    std::vector<int> remaining_space;
+    std::priority_queue<std::pair<int, int>> max_heap;
+
+  public:
+    BinGroup(int m, int l) {
+        bins.resize(m);
+        remaining_space.assign(m, l);
+        for (int i = 0; i < m; ++i) {
+            max_heap.push({remaining_space[i], i});
+        }
+    }
+
+    BinGroup(const std::vector<std::vector<int>> &existing_bins,
+             const std::vector<int> &existing_remaining)
+        : bins(existing_bins), remaining_space(existing_remaining) {
+        for (int i = 0; i < (int)bins.size(); ++i) {
+            max_heap.push({remaining_space[i], i});
+        }
+    }
+
+    int get_max_remaining() const {
+        return max_heap.empty() ? 0 : max_heap.top().first;
+    }
+
+    void add_item(int item_idx, int size) {
+        if (max_heap.empty()) {
+            throw std::runtime_error("No bins available in the group");
+        }
+
+        auto [space, bin_idx] = max_heap.top();
+        max_heap.pop();
+
+        bins[bin_idx].push_back(item_idx);
+        remaining_space[bin_idx] -= size;
+
+        max_heap.push({remaining_space[bin_idx], bin_idx});
+    }
+
+    const std::vector<std::vector<int>> &get_bins() const { return bins; }
+};
+
+// Persistent state of an OGBFD plan: its groups, their residual capacities
+// and the capacity index. It is built once from an existing plan, after which
+// each update only touches the new items and the groups they go to. Entries
+// of the capacity index whose group changed capacity while filling the last
+// group are skipped when they are reached.
+class OGBFDUpdater {
+  private:
+    int batch_max_length;
+    int bins_per_group;
+    std::vector<int> item_lengths;
+    IterativeSegmentTree seg_tree;
+    std::vector<std::vector<size_t>> capacity_to_groups;
+    std::vector<BinGroup> groups;
+
+    void index_group(size_t group_idx) {
+        int capacity = groups[group_idx].get_max_remaining();
+        capacity_to_groups[capacity].push_back(group_idx);
+        if (capacity > 0) {
+            seg_tree.update(capacity, capacity);
+        }
+    }
+
+    void rebuild_group(size_t group_idx,
+                       const std::vector<std::vector<int>> &bins) {
+        int old_capacity = groups[group_idx].get_max_remaining();
+        std::vector<int> remaining;
+        remaining.reserve(bins.size());
+        for (const auto &bin : bins) {
+            long long used = 0;
+            for (int idx : bin) {
+                used += item_lengths[idx];
+            }
+            remaining.push_back(batch_max_length - (int)used);
+        }
+        groups[group_idx] = BinGroup(bins, remaining);
+        if (groups[group_idx].get_max_remaining() != old_capacity) {
+            index_group(group_idx);
+        }
+    }
+
+    // Fills empty bins of the last group from the groups opened by this
+    // update, or else with copies of the first group's bins.
+    void fill_last_group(size_t first_new_group, std::vector<size_t> &changed) {
+        if (groups.size() < 2 || groups.size() - 1 < first_new_group) {
+            return;
+        }
+        std::vector<std::vector<int>> target_group = groups.back().get_bins();
+
+        std::vector<size_t> empty_bin_indices;
+        for (size_t bin_idx = 0; bin_idx < target_group.size(); ++bin_idx) {
+            if (target_group[bin_idx].empty()) {
+                empty_bin_indices.push_back(bin_idx);
+            }
+        }
+        if (empty_bin_indices.empty()) {
+            return;
+        }
+
+        bool early_termination = false;
+        for (int group_idx = groups.size() - 2;
+             group_idx >= (int)first_new_group && !empty_bin_indices.empty() &&
+             !early_termination;
+             --group_idx) {
+            std::vector<std::vector<int>> donor_group =
+                groups[group_idx].get_bins();
+            bool donated = false;
+            for (int bin_idx = donor_group.size() - 1;
+                 bin_idx >= 0 && !empty_bin_indices.empty() &&
+                 !early_termination;
+                 --bin_idx) {
+                auto &donor_bin = donor_group[bin_idx];
+                if (donor_bin.size() >= 2) {
+                    int item = donor_bin.back();
+                    donor_bin.pop_back();
+
+                    size_t target_bin_idx = empty_bin_indices.back();
+                    empty_bin_indices.pop_back();
+                    target_group[target_bin_idx].push_back(item);
+                    donated = true;
+                } else if (donor_bin.size() <= 1) {
+                    early_termination = true;
+                }
+            }
+            if (donated) {
+                rebuild_group(group_idx, donor_group);
+                changed.push_back(group_idx);
+            }
+        }
+
+        if (!empty_bin_indices.empty()) {
+            const std::vector<std::vector<int>> source_group =
+                groups.front().get_bins();
+            size_t source_bin_idx = 0;
+            for (size_t target_bin_idx = 0;
+                 target_bin_idx < target_group.size(); ++target_bin_idx) {
+                if (target_group[target_bin_idx].empty() &&
+                    source_bin_idx < source_group.size()) {
+                    target_group[target_bin_idx] =
+                        source_group[source_bin_idx++];
+                }
+            }
+        }
+        rebuild_group(groups.size() - 1, target_group);
+    }
+
+  public:
+    OGBFDUpdater(const std::vector<std::vector<std::vector<int>>> &groups_in,
+                 const std::vector<int> &lengths, int batch_max_length,
+                 int bins_per_group = -1)
+        : batch_max_length(batch_max_length), bins_per_group(bins_per_group),
+          item_lengths(lengths), seg_tree(std::max(batch_max_length, 1)),
+          capacity_to_groups(std::max(batch_max_length, 0) + 1) {
+        if (batch_max_length <= 0) {
+            throw std::runtime_error("Batch max length must be positive");
+        }
+        if (this->bins_per_group <= 0) {
+            if (groups_in.empty()) {
+                throw std::runtime_error(
+                    "bins_per_group must be given when the plan is empty");
+            }
+            this->bins_per_group = groups_in[0].size();
+        }
+
+        groups.reserve(groups_in.size());
+        for (size_t group_idx = 0; group_idx < groups_in.size(); ++group_idx) {
+            if ((int)groups_in[group_idx].size() != this->bins_per_group) {
+                throw std::runtime_error(
+                    "All groups must contain bins_per_group bins");
+            }
+            std::vector<int> remaining;
+            remaining.reserve(this->bins_per_group);
+            for (const auto &bin : groups_in[group_idx]) {
+                long long used = 0;
+                for (int idx : bin) {
+                    if (idx < 0 || idx >= (int)item_lengths.size()) {
+                        throw std::runtime_error(
+                            "Existing bin references a new item");
+                    }
+                    used += item_lengths[idx];
+                }
+                if (used > batch_max_length) {
+                    throw std::runtime_error(
+                        "Existing bin exceeds batch max length");
+                }
+                remaining.push_back(batch_max_length - (int)used);
+            }
+
+            groups.emplace_back(groups_in[group_idx], remaining);
+            index_group(group_idx);
+        }
+    }
+
+    int get_num_items() const { return item_lengths.size(); }
+
+    std::vector<std::vector<std::vector<int>>> get_groups() const {
+        std::vector<std::vector<std::vector<int>>> result;
+        result.reserve(groups.size());
+        for (const auto &group : groups) {
+            result.push_back(group.get_bins());
+        }
+        return result;
+    }
+
+    // Packs items numbered from the current item count onwards and returns
+    // the changed and new groups with their full contents, by group index.
+    std::vector<std::pair<int, std::vector<std::vector<int>>>>
+    update(const std::vector<int> &lengths, int item_max_length = -1) {
+        if (item_max_length <= 0) {
+            item_max_length = 0;
+            for (int len : lengths) {
+                item_max_length = std::max(item_max_length, len);
+            }
+        }
+
+        int start_index = item_lengths.size();
+        std::vector<std::vector<int>> count(item_max_length + 1);
+        for (size_t i = 0; i < lengths.size(); ++i) {
+            int len = lengths[i];
+            if (len > batch_max_length) {
+                throw std::runtime_error("Item size exceeds batch max length");
+            }
+            if (len > item_max_length) {
+                throw std::runtime_error("Item size exceeds item max length");
+            }
+            if (len <= 0) {
+                throw std::runtime_error("Item size must be positive");
+            }
+            count[len].push_back(start_index + i);
+        }
+        item_lengths.insert(item_lengths.end(), lengths.begin(), lengths.end());
+
+        size_t first_new_group = groups.size();
+        std::vector<size_t> changed;
+        for (int size = item_max_length; size >= 1; --size) {
+            for (int orig_idx : count[size]) {
+                size_t group_idx = groups.size();
+                int best_capacity;
+                while ((best_capacity = seg_tree.find_best_fit(size)) != -1) {
+                    size_t candidate = capacity_to_groups[best_capacity].back();
+                    capacity_to_groups[best_capacity].pop_back();
+                    if (capacity_to_groups[best_capacity].empty()) {
+                        seg_tree.update(best_capacity, 0);
+                    }
+                    if (groups[candidate].get_max_remaining() ==
+                        best_capacity) {
+                        group_idx = candidate;
+                        break;
+                    }
+                }
+
+                if (group_idx == groups.size()) {
+                    groups.emplace_back(bins_per_group, batch_max_length);
+                }
+                groups[group_idx].add_item(orig_idx, size);
+                changed.push_back(group_idx);
+                index_group(group_idx);
+            }
+        }
+
+        fill_last_group(first_new_group, changed);
+        if (groups.size() > first_new_group) {
+            changed.push_back(groups.size() - 1);
+        }
+
+        std::sort(changed.begin(), changed.end());
+        changed.erase(std::unique(changed.begin(), changed.end()),
+                      changed.end());
+        std::vector<std::pair<int, std::vector<std::vector<int>>>> result;
+        result.reserve(changed.size());
+        for (size_t group_idx : changed) {
+            result.emplace_back(group_idx, groups[group_idx].get_bins());
+        }
+        return result;
+    }
+};
+
+std::vector<std::vector<std::vector<int>>>
+ogbfdu(const std::vector<std::vector<std::vector<int>>> &groups_in,
+       const std::vector<int> &lengths, int batch_max_length,
+       int bins_per_group = -1, int start_index = -1,
+       int item_max_length = -1) {
+    if (batch_max_length <= 0) {
+        return groups_in;
+    }
+
+    if (bins_per_group <= 0) {
+        if (groups_in.empty()) {
+            throw std::runtime_error(
+                "bins_per_group must be given when the plan is empty");
+        }
+        bins_per_group = groups_in[0].size();
+    }
+    for (const auto &group : groups_in) {
+        if ((int)group.size() != bins_per_group) {
+            throw std::runtime_error(
+                "All groups must contain bins_per_group bins");
+        }
+    }
+
+    if (start_index < 0) {
+        start_index = 0;
+        for (const auto &group : groups_in) {
+            for (const auto &bin : group) {
+                for (int idx : bin) {
+                    start_index = std::max(start_index, idx + 1);
+                }
+            }
+        }
+    }
+    if (start_index > (int)lengths.size()) {
+        throw std::runtime_error("Start index exceeds number of lengths");
+    }
+    if (start_index == (int)lengths.size()) {
+        return groups_in;
+    }
+
+    OGBFDUpdater updater(
+        groups_in,
+        std::vector<int>(lengths.begin(), lengths.begin() + start_index),
+        batch_max_length, bins_per_group);
+    updater.update(
+        std::vector<int>(lengths.begin() + start_index, lengths.end()),
+        item_max_length);
+    return updater.get_groups();
+}
+
+PYBIND11_MODULE(ogbfdu, m) {
+    m.doc() = "Incremental update of Optimized Grouped BFD (Best Fit "
+              "Decreasing) packing plans";
+    m.def("ogbfdu", &ogbfdu, "Incremental Optimized Grouped BFD algorithm",
+          py::arg("groups"), py::arg("lengths"), py::arg("batch_max_length"),
+          py::arg("bins_per_group") = -1, py::arg("start_index") = -1,
+          py::arg("item_max_length") = -1);
+    py::class_<OGBFDUpdater>(m, "OGBFDUpdater")
+        .def(py::init<const std::vector<std::vector<std::vector<int>>> &,
+                      const std::vector<int> &, int, int>(),
+             py::arg("groups"), py::arg("lengths"), py::arg("batch_max_length"),
+             py::arg("bins_per_group") = -1)
+        .def("update", &OGBFDUpdater::update, py::arg("lengths"),
+             py::arg("item_max_length") = -1)
+        .def_property_readonly("num_items", &OGBFDUpdater::get_num_items);
+}
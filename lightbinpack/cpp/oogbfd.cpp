@@ -0,0 +1,504 @@
+#include <omp.h>
+#include <pybind11/numpy.h>
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+#include <algorithm>
+#include <cstdint>
+#include <stdexcept>
+#include <vector>
+
+namespace py = pybind11;
+
+class IterativeSegmentTree {
+  private:
+    int n;
+    std::vector<int> tree;
+
+  public:
+    IterativeSegmentTree(int max_length) {
+        n = 1;
+        while (n < max_length + 1)
+            n <<= 1;
+        tree.assign(2 * n, 0);
+        tree[n - 1 + max_length] = max_length;
+        for (int i = max_length - 1; i >= 0; --i) {
+            tree[n - 1 + i] = 0;
+        }
+        for (int i = n - 2; i >= 0; --i) {
+            tree[i] = std::max(tree[2 * i + 1], tree[2 * i + 2]);
+        }
+    }
+
+    void update(int idx, int val) {
+        idx += n - 1;
+        tree[idx] = val;
+        while (idx > 0) {
+            idx = (idx - 1) / 2;
+            int left = tree[2 * idx + 1];
+            int right = tree[2 * idx + 2];
+            int new_val = std::max(left, right);
+            if (tree[idx] == new_val)
+                break;
+            tree[idx] = new_val;
+        }
+    }
+
+    int find_best_fit(int target) const {
+        int idx = 0;
+        if (tree[idx] < target)
+            return -1;
+        while (idx < (n - 1)) {
+            if (tree[2 * idx + 1] >= target)
+                idx = 2 * idx + 1;
+            else
+                idx = 2 * idx + 2;
+        }
+        int capacity = idx - (n - 1);
+        return tree[idx] >= target ? capacity : -1;
+    }
+};
+
+const int64_t kChunkSize = 1 << 20;
+
+py::array allocate_buffer(const py::function &allocate, const char *name,
+                          int64_t size) {
+    py::array buffer = allocate(name, size);
+    if (!buffer.dtype().equal(py::dtype::of<int64_t>()) ||
+        !(buffer.flags() & py::array::c_style) || !buffer.writeable() ||
+        buffer.size() < size) {
+        throw std::runtime_error(
+            "Allocated buffer must be a writable contiguous int64 array");
+    }
+    return buffer;
+}
+
+// Writes the flat plan bin after bin from (bin, item) pairs emitted in
+// packing order. Scattering each pair straight to its slot would touch the
+// whole items array at random, so bins are split into runs of at most
+// kChunkSize items and bins. Pairs are staged in a small buffer per run and
+// flushed sequentially into the run's slice, tagged with their bin within
+// the run. Each run is then sorted by bin in memory, a chunk at a time.
+class PlanWriter {
+  private:
+    static const int kItemBits = 40;
+    static const int64_t kBufferBudget = 4 * kChunkSize;
+
+    int64_t *items;
+    const int64_t *offsets;
+    std::vector<int64_t> run_first_bin;
+    std::vector<int64_t> cursor;
+    std::vector<std::vector<int64_t>> buffers;
+    size_t buffer_size;
+
+    void flush(size_t run) {
+        std::vector<int64_t> &buffer = buffers[run];
+        std::copy(buffer.begin(), buffer.end(), items + cursor[run]);
+        cursor[run] += buffer.size();
+        buffer.clear();
+    }
+
+  public:
+    PlanWriter(int64_t n, const std::vector<int64_t> &bins_count,
+               int64_t *items, int64_t *offsets)
+        : items(items), offsets(offsets) {
+        if (n >= ((int64_t)1 << kItemBits)) {
+            throw std::runtime_error("Too many items for an out-of-core plan");
+        }
+        int64_t num_bins = bins_count.size();
+        offsets[0] = 0;
+        int64_t run_items = 0;
+        for (int64_t b = 0; b < num_bins; ++b) {
+            offsets[b + 1] = offsets[b] + bins_count[b];
+            if (run_first_bin.empty() ||
+                run_items + bins_count[b] > kChunkSize ||
+                b - run_first_bin.back() >= kChunkSize) {
+                run_first_bin.push_back(b);
+                cursor.push_back(offsets[b]);
+                run_items = 0;
+            }
+            run_items += bins_count[b];
+        }
+        run_first_bin.push_back(num_bins);
+
+        size_t num_runs = cursor.size();
+        buffer_size = std::max<int64_t>(
+            256, std::min<int64_t>(1 << 16, kBufferBudget /
+                                                std::max<size_t>(num_runs, 1)));
+        buffers.resize(num_runs);
+        for (auto &buffer : buffers) {
+            buffer.reserve(buffer_size);
+        }
+    }
+
+    void add(int64_t bin_idx, int64_t item) {
+        size_t run = std::upper_bound(run_first_bin.begin(),
+                                      run_first_bin.end(), bin_idx) -
+                     run_first_bin.begin() - 1;
+        int64_t local_bin = bin_idx - run_first_bin[run];
+        buffers[run].push_back(local_bin << kItemBits | item);
+        if (buffers[run].size() >= buffer_size) {
+            flush(run);
+        }
+    }
+
+    void finish() {
+        const int64_t mask = ((int64_t)1 << kItemBits) - 1;
+        std::vector<int64_t> staged;
+        std::vector<int64_t> position;
+        for (size_t run = 0; run < buffers.size(); ++run) {
+            flush(run);
+            int64_t first = run_first_bin[run];
+            int64_t last = run_first_bin[run + 1];
+            // Items of the run's first bin carry no tag, so a run of a
+            // single bin is already in place
+            if (last - first == 1) {
+                continue;
+            }
+            int64_t begin = offsets[first];
+            staged.assign(items + begin, items + offsets[last]);
+            position.assign(offsets + first, offsets + last);
+            for (int64_t value : staged) {
+                items[position[value >> kItemBits]++] = value & mask;
+            }
+        }
+    }
+};
+
+template <typename T>
+int histogram(const T *lengths, int64_t n, int batch_max_length,
+              int item_max_length, std::vector<int64_t> &count,
+              int num_threads) {
+    if (item_max_length <= 0) {
+        T max_length = 0;
+#pragma omp parallel for reduction(max : max_length) schedule(static)          \
+    num_threads(num_threads) if (num_threads > 1)
+        for (int64_t i = 0; i < n; ++i) {
+            max_length = std::max(max_length, lengths[i]);
+        }
+        item_max_length = (int)std::min<int64_t>(max_length, batch_max_length);
+    }
+
+    count.assign(item_max_length + 1, 0);
+    int64_t num_chunks = (n + kChunkSize - 1) / kChunkSize;
+    int error = 0;
+
+#pragma omp parallel num_threads(num_threads) if (num_threads > 1)
+    {
+        std::vector<int64_t> local_count(item_max_length + 1, 0);
+#pragma omp for schedule(static)
+        for (int64_t chunk = 0; chunk < num_chunks; ++chunk) {
+            int64_t end = std::min(n, (chunk + 1) * kChunkSize);
+            for (int64_t i = chunk * kChunkSize; i < end; ++i) {
+                int64_t len = lengths[i];
+                if (len > batch_max_length) {
+#pragma omp atomic write
+                    error = 1;
+                } else if (len > item_max_length) {
+#pragma omp atomic write
+                    error = 2;
+                } else if (len <= 0) {
+#pragma omp atomic write
+                    error = 3;
+                } else {
+                    ++local_count[len];
+                }
+            }
+        }
+#pragma omp critical
+        for (int size = 0; size <= item_max_length; ++size) {
+            count[size] += local_count[size];
+        }
+    }
+
+    if (error == 1) {
+        throw std::runtime_error("Item size exceeds batch max length");
+    }
+    if (error == 2) {
+        throw std::runtime_error("Item size exceeds item max length");
+    }
+    if (error == 3) {
+        throw std::runtime_error("Item size must be positive");
+    }
+    return item_max_length;
+}
+
+template <typename T>
+void counting_order(const T *lengths, int64_t n, int item_max_length,
+                    const std::vector<int64_t> &count, int64_t *order) {
+    std::vector<int64_t> cursor(item_max_length + 1, 0);
+    int64_t position = 0;
+    for (int size = item_max_length; size >= 1; --size) {
+        cursor[size] = position;
+        position += count[size];
+    }
+    for (int64_t i = 0; i < n; ++i) {
+        order[cursor[lengths[i]]++] = i;
+    }
+}
+
+template <typename T>
+int64_t oogbfd_impl(const py::array &lengths_array, int batch_max_length,
+                    int bins_per_group, const py::function &allocate,
+                    int item_max_length, int strategy, int num_threads) {
+    const T *lengths = static_cast<const T *>(lengths_array.data());
+    int64_t n = lengths_array.size();
+
+    py::array workspace_array = allocate_buffer(allocate, "workspace", 2 * n);
+    int64_t *order = static_cast<int64_t *>(workspace_array.mutable_data());
+    int64_t *bin_ids = order + n;
+
+    std::vector<int64_t> bins_count;
+    std::vector<int64_t> repeat_target(bins_per_group, -1);
+    {
+        py::gil_scoped_release release;
+
+        std::vector<int64_t> count;
+        item_max_length = histogram(lengths, n, batch_max_length,
+                                    item_max_length, count, num_threads);
+        counting_order(lengths, n, item_max_length, count, order);
+
+        IterativeSegmentTree seg_tree(batch_max_length);
+
+        if (strategy == 0) {
+            std::vector<std::vector<int64_t>> capacity_to_groups(
+                batch_max_length + 1);
+            std::vector<int> bins_remaining(bins_per_group, batch_max_length);
+            bins_count.assign(bins_per_group, 0);
+
+            capacity_to_groups[batch_max_length].push_back(0);
+            seg_tree.update(batch_max_length, batch_max_length);
+
+            // Worst fit within the group, ties go to the higher bin index
+            auto add_item = [&](int64_t group_idx, int64_t k, int size) {
+                int64_t first = group_idx * bins_per_group;
+                int64_t chosen = first;
+                for (int64_t b = first + 1; b < first + bins_per_group; ++b) {
+                    if (bins_remaining[b] >= bins_remaining[chosen]) {
+                        chosen = b;
+                    }
+                }
+                bins_remaining[chosen] -= size;
+                ++bins_count[chosen];
+                bin_ids[k] = chosen;
+
+                int max_remaining = 0;
+                for (int64_t b = first; b < first + bins_per_group; ++b) {
+                    max_remaining = std::max(max_remaining, bins_remaining[b]);
+                }
+                return max_remaining;
+            };
+
+            for (int64_t k = 0; k < n; ++k) {
+                int size = (int)lengths[order[k]];
+                int best_capacity = seg_tree.find_best_fit(size);
+
+                if (best_capacity != -1) {
+                    int64_t group_idx =
+                        capacity_to_groups[best_capacity].back();
+                    capacity_to_groups[best_capacity].pop_back();
+                    if (capacity_to_groups[best_capacity].empty()) {
+                        seg_tree.update(best_capacity, 0);
+                    }
+
+                    int new_capacity = add_item(group_idx, k, size);
+
+                    capacity_to_groups[new_capacity].push_back(group_idx);
+                    if (new_capacity > 0) {
+                        seg_tree.update(new_capacity, new_capacity);
+                    }
+                } else {
+                    int64_t new_group_idx =
+                        bins_remaining.size() / bins_per_group;
+                    bins_remaining.resize(bins_remaining.size() +
+                                              bins_per_group,
+                                          batch_max_length);
+                    bins_count.resize(bins_count.size() + bins_per_group, 0);
+
+                    int new_capacity = add_item(new_group_idx, k, size);
+                    capacity_to_groups[new_capacity].push_back(new_group_idx);
+                    seg_tree.update(new_capacity, new_capacity);
+                }
+            }
+        } else {
+            std::vector<std::vector<int64_t>> capacity_to_bins(
+                batch_max_length + 1);
+            std::vector<int> bins_remaining;
+
+            bins_remaining.push_back(batch_max_length);
+            bins_count.push_back(0);
+            capacity_to_bins[batch_max_length].push_back(0);
+            seg_tree.update(batch_max_length, batch_max_length);
+
+            for (int64_t k = 0; k < n; ++k) {
+                int size = (int)lengths[order[k]];
+                int best_capacity = seg_tree.find_best_fit(size);
+
+                if (best_capacity != -1) {
+                    int64_t bin_idx = capacity_to_bins[best_capacity].back();
+                    capacity_to_bins[best_capacity].pop_back();
+                    if (capacity_to_bins[best_capacity].empty()) {
+                        seg_tree.update(best_capacity, 0);
+                    }
+
+                    int new_capacity = bins_remaining[bin_idx] - size;
+                    bins_remaining[bin_idx] = new_capacity;
+
+                    bin_ids[k] = bin_idx;
+                    ++bins_count[bin_idx];
+
+                    capacity_to_bins[new_capacity].push_back(bin_idx);
+                    if (new_capacity > 0) {
+                        seg_tree.update(new_capacity, new_capacity);
+                    }
+                } else {
+                    int64_t new_bin_idx = bins_remaining.size();
+                    bins_remaining.push_back(batch_max_length - size);
+                    bins_count.push_back(1);
+                    bin_ids[k] = new_bin_idx;
+
+                    int new_capacity = batch_max_length - size;
+                    capacity_to_bins[new_capacity].push_back(new_bin_idx);
+                    seg_tree.update(new_capacity, new_capacity);
+                }
+            }
+
+            int64_t padded = (bins_count.size() + bins_per_group - 1) /
+                             bins_per_group * bins_per_group;
+            bins_count.resize(padded, 0);
+        }
+
+        int64_t num_groups = bins_count.size() / bins_per_group;
+        if (num_groups >= 2) {
+            int64_t target_first = (num_groups - 1) * bins_per_group;
+
+            std::vector<int64_t> empty_bin_indices;
+            for (int64_t b = 0; b < bins_per_group; ++b) {
+                if (bins_count[target_first + b] == 0) {
+                    empty_bin_indices.push_back(target_first + b);
+                }
+            }
+
+            // Move the last item of each donor bin into an empty bin of the
+            // last group, scanning the assignment backwards once.
+            std::vector<std::pair<int64_t, int64_t>> moves;
+            bool early_termination = false;
+            for (int64_t group_idx = num_groups - 2;
+                 group_idx >= 0 && !empty_bin_indices.empty() &&
+                 !early_termination;
+                 --group_idx) {
+                for (int64_t b = bins_per_group - 1;
+                     b >= 0 && !empty_bin_indices.empty() && !early_termination;
+                     --b) {
+                    int64_t donor = group_idx * bins_per_group + b;
+                    if (bins_count[donor] >= 2) {
+                        --bins_count[donor];
+                        ++bins_count[empty_bin_indices.back()];
+                        moves.emplace_back(donor, empty_bin_indices.back());
+                        empty_bin_indices.pop_back();
+                    } else {
+                        early_termination = true;
+                    }
+                }
+            }
+
+            for (int64_t k = n - 1; k >= 0 && !moves.empty(); --k) {
+                for (size_t m = 0; m < moves.size(); ++m) {
+                    if (bin_ids[k] == moves[m].first) {
+                        bin_ids[k] = moves[m].second;
+                        moves[m] = moves.back();
+                        moves.pop_back();
+                        break;
+                    }
+                }
+            }
+
+            int64_t source_bin_idx = 0;
+            for (int64_t b = 0; b < bins_per_group; ++b) {
+                if (bins_count[target_first + b] == 0 &&
+                    source_bin_idx < bins_per_group) {
+                    repeat_target[source_bin_idx] = target_first + b;
+                    bins_count[target_first + b] = bins_count[source_bin_idx];
+                    ++source_bin_idx;
+                }
+            }
+        }
+    }
+
+    int64_t num_bins = bins_count.size();
+    int64_t total = 0;
+    for (int64_t c : bins_count) {
+        total += c;
+    }
+
+    py::array items_array = allocate_buffer(allocate, "items", total);
+    py::array offsets_array =
+        allocate_buffer(allocate, "offsets", num_bins + 1);
+    int64_t *items = static_cast<int64_t *>(items_array.mutable_data());
+    int64_t *offsets = static_cast<int64_t *>(offsets_array.mutable_data());
+
+    {
+        py::gil_scoped_release release;
+
+        PlanWriter writer(n, bins_count, items, offsets);
+        for (int64_t k = 0; k < n; ++k) {
+            int64_t bin_idx = bin_ids[k];
+            writer.add(bin_idx, order[k]);
+            if (bin_idx < bins_per_group && repeat_target[bin_idx] >= 0) {
+                writer.add(repeat_target[bin_idx], order[k]);
+            }
+        }
+        writer.finish();
+    }
+
+    return num_bins / bins_per_group;
+}
+
+int64_t oogbfd(const py::array &lengths, int batch_max_length,
+               int bins_per_group, const py::function &allocate,
+               int item_max_length = -1, int strategy = 0,
+               int num_threads = -1) {
+    if (lengths.size() == 0 || batch_max_length <= 0 || bins_per_group <= 0) {
+        return 0;
+    }
+    if (lengths.ndim() != 1 || !(lengths.flags() & py::array::c_style)) {
+        throw std::runtime_error("Lengths must be a contiguous 1D array");
+    }
+
+    if (num_threads <= 0) {
+        num_threads = omp_get_max_threads();
+    }
+
+    if (lengths.dtype().equal(py::dtype::of<int32_t>())) {
+        return oogbfd_impl<int32_t>(lengths, batch_max_length, bins_per_group,
+                                    allocate, item_max_length, strategy,
+                                    num_threads);
+    }
+    if (lengths.dtype().equal(py::dtype::of<int64_t>())) {
+        return oogbfd_impl<int64_t>(lengths, batch_max_length, bins_per_group,
+                                    allocate, item_max_length, strategy,
+                                    num_threads);
+    }
+    if (lengths.dtype().equal(py::dtype::of<uint16_t>())) {
+        return oogbfd_impl<uint16_t>(lengths, batch_max_length, bins_per_group,
+                                     allocate, item_max_length, strategy,
+                                     num_threads);
+    }
+    if (lengths.dtype().equal(py::dtype::of<uint32_t>())) {
+        return oogbfd_impl<uint32_t>(lengths, batch_max_length, bins_per_group,
+                                     allocate, item_max_length, strategy,
+                                     num_threads);
+    }
+    throw std::runtime_error(
+        "Lengths dtype must be one of int32, int64, uint16 or uint32");
+}
+
+PYBIND11_MODULE(oogbfd, m) {
+    m.doc() = "Out-of-core Optimized Grouped BFD (Best Fit Decreasing) "
+              "algorithm implementation over memory-mapped lengths";
+    m.def("oogbfd", &oogbfd, "Out-of-core Optimized Grouped BFD algorithm",
+          py::arg("lengths"), py::arg("batch_max_length"),
+          py::arg("bins_per_group"), py::arg("allocate"),
+          py::arg("item_max_length") = -1, py::arg("strategy") = 0,
+          py::arg("num_threads") = -1);
+}
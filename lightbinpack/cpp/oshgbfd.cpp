@@ -2,6 +2,7 @@
 #include <pybind11/stl.h>
 
 #include <algorithm>
+#include <iterator>
 #include <queue>
 #include <stdexcept>
 #include <vector>
@@ -114,7 +115,8 @@ std::vector<std::pair<int, std::vector<std::vector<int>>>>
 oshgbfd(const std::vector<int> &lengths,
         const std::vector<std::vector<int>> &batch_max_lengths_list,
         int item_max_length = -1,
-        const std::vector<long long> &weights = std::vector<long long>()) {
+        const std::vector<long long> &weights = std::vector<long long>(),
+        bool fill_last_group = true) {
     if (lengths.empty() || batch_max_lengths_list.empty()) {
         return {};
     }
@@ -228,7 +230,10 @@ oshgbfd(const std::vector<int> &lengths,
         result.emplace_back(bin_type, group.get_bins());
     }
 
-    if (result.size() >= 2) {
+    // Empty bins of the last group take items moved from earlier groups, or
+    // else copies of bins of the first group, but only what fits their own
+    // capacity; a bin that nothing fits stays empty.
+    if (fill_last_group && result.size() >= 2) {
         auto &target_group = result.back();
         const auto &source_group = result.front();
 
@@ -254,11 +259,19 @@ oshgbfd(const std::vector<int> &lengths,
                     auto &donor_bin = result[group_idx].second[bin_idx];
                     if (donor_bin.size() >= 2) {
                         int item = donor_bin.back();
-                        donor_bin.pop_back();
-
-                        size_t target_bin_idx = empty_bin_indices.back();
-                        empty_bin_indices.pop_back();
-                        target_group.second[target_bin_idx].push_back(item);
+                        auto target = std::find_if(
+                            empty_bin_indices.rbegin(),
+                            empty_bin_indices.rend(),
+                            [&](size_t target_bin_idx) {
+                                return lengths[item] <=
+                                       batch_max_lengths_list
+                                           [target_group.first][target_bin_idx];
+                            });
+                        if (target != empty_bin_indices.rend()) {
+                            donor_bin.pop_back();
+                            target_group.second[*target].push_back(item);
+                            empty_bin_indices.erase(std::next(target).base());
+                        }
                     } else if (donor_bin.size() <= 1) {
                         early_termination = true;
                     }
@@ -271,14 +284,31 @@ oshgbfd(const std::vector<int> &lengths,
         }
 
         if (fallback_to_repeat) {
-            int source_bin_idx = 0;
+            std::vector<bool> copied(source_group.second.size(), false);
             for (size_t target_bin_idx = 0;
                  target_bin_idx < target_group.second.size();
                  ++target_bin_idx) {
-                if (target_group.second[target_bin_idx].empty() &&
-                    source_bin_idx < source_group.second.size()) {
-                    target_group.second[target_bin_idx] =
-                        source_group.second[source_bin_idx++];
+                if (!target_group.second[target_bin_idx].empty()) {
+                    continue;
+                }
+                for (size_t source_bin_idx = 0;
+                     source_bin_idx < source_group.second.size();
+                     ++source_bin_idx) {
+                    if (copied[source_bin_idx]) {
+                        continue;
+                    }
+                    const auto &source_bin =
+                        source_group.second[source_bin_idx];
+                    long long used = 0;
+                    for (int idx : source_bin) {
+                        used += lengths[idx];
+                    }
+                    if (used <= batch_max_lengths_list[target_group.first]
+                                                      [target_bin_idx]) {
+                        target_group.second[target_bin_idx] = source_bin;
+                        copied[source_bin_idx] = true;
+                        break;
+                    }
                 }
             }
         }
@@ -295,5 +325,6 @@ PYBIND11_MODULE(oshgbfd, m) {
           "Optimized Sequential Heterogeneous Grouped BFD algorithm",
           py::arg("lengths"), py::arg("batch_max_lengths_list"),
           py::arg("item_max_length") = -1,
-          py::arg("weights") = std::vector<long long>());
+          py::arg("weights") = std::vector<long long>(),
+          py::arg("fill_last_group") = true);
 }
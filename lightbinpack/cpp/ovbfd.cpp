@@ -0,0 +1,271 @@
+#include <pybind11/numpy.h>
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+#include <algorithm>
+#include <stdexcept>
+#include <vector>
+
+namespace py = pybind11;
+
+enum class Probe { kReject, kAccept, kStop };
+
+class VectorSegmentTree {
+  private:
+    int n;
+    int dims;
+    std::vector<int> tree;
+    std::vector<long long> secondary;
+    std::vector<int> stack;
+
+    void pull(int idx) {
+        while (idx > 0) {
+            idx = (idx - 1) / 2;
+            int left = 2 * idx + 1;
+            int right = 2 * idx + 2;
+            tree[idx] = std::max(tree[left], tree[right]);
+            for (int j = 0; j < dims; ++j) {
+                secondary[idx * dims + j] = std::max(
+                    secondary[left * dims + j], secondary[right * dims + j]);
+            }
+        }
+    }
+
+    bool admits(int idx, int target, const long long *need) const {
+        if (tree[idx] < target)
+            return false;
+        for (int j = 0; j < dims; ++j) {
+            if (secondary[idx * dims + j] < need[j])
+                return false;
+        }
+        return true;
+    }
+
+  public:
+    VectorSegmentTree(int max_length, int secondary_dims)
+        : dims(secondary_dims) {
+        n = 1;
+        while (n < max_length + 1)
+            n <<= 1;
+        tree.assign(2 * n, 0);
+        secondary.assign(2 * n * dims, 0);
+    }
+
+    // Set a capacity leaf to the component-wise maximum of its bins'
+    // secondary residuals, or clear it when the capacity has no bins.
+    void update(int capacity, bool occupied, const long long *max_secondary) {
+        int idx = capacity + n - 1;
+        tree[idx] = occupied ? capacity : 0;
+        for (int j = 0; j < dims; ++j) {
+            secondary[idx * dims + j] = occupied ? max_secondary[j] : 0;
+        }
+        pull(idx);
+    }
+
+    // Visit capacities >= target in increasing order, skipping subtrees
+    // whose component-wise maxima cannot hold the item, until try_capacity
+    // accepts one or gives up. Returns the accepted capacity or -1. Leaf
+    // maxima may be stale upper bounds, which try_capacity can tighten.
+    template <typename F>
+    int find_best_fit(int target, const long long *need, F &&try_capacity) {
+        stack.clear();
+        stack.push_back(0);
+        while (!stack.empty()) {
+            int idx = stack.back();
+            stack.pop_back();
+            if (!admits(idx, target, need))
+                continue;
+            if (idx >= n - 1) {
+                int capacity = idx - (n - 1);
+                Probe probe = try_capacity(capacity);
+                if (probe == Probe::kAccept)
+                    return capacity;
+                if (probe == Probe::kStop)
+                    return -1;
+                continue;
+            }
+            stack.push_back(2 * idx + 2);
+            stack.push_back(2 * idx + 1);
+        }
+        return -1;
+    }
+
+    // Largest capacity that holds any bin, 0 when there is none
+    int max_capacity() const { return tree[0]; }
+};
+
+// Bins (or groups) checked per item when max_probes is -1
+const int kDefaultMaxProbes = 256;
+
+using SizeMatrix =
+    py::array_t<long long, py::array::c_style | py::array::forcecast>;
+
+std::vector<std::vector<int>>
+count_items(const SizeMatrix &sizes, const std::vector<long long> &capacity,
+            int &item_max_length) {
+    if (sizes.ndim() != 2 || sizes.shape(1) != (py::ssize_t)capacity.size()) {
+        throw std::runtime_error(
+            "Sizes must be an (N, d) matrix matching the capacity dimensions");
+    }
+    if (capacity[0] <= 0) {
+        throw std::runtime_error("Primary capacity must be positive");
+    }
+
+    auto data = sizes.unchecked<2>();
+    size_t n = sizes.shape(0);
+    size_t dims = capacity.size();
+
+    if (item_max_length <= 0) {
+        item_max_length = 0;
+        for (size_t i = 0; i < n; ++i) {
+            item_max_length = std::max(
+                item_max_length, (int)std::min(data(i, 0), capacity[0] + 1));
+        }
+    }
+
+    std::vector<std::vector<int>> count(item_max_length + 1);
+    for (size_t i = 0; i < n; ++i) {
+        for (size_t j = 0; j < dims; ++j) {
+            if (data(i, j) > capacity[j]) {
+                throw std::runtime_error("Item size exceeds batch max length");
+            }
+            if (data(i, j) < 0) {
+                throw std::runtime_error("Item size must be non-negative");
+            }
+        }
+        long long len = data(i, 0);
+        if (len > item_max_length) {
+            throw std::runtime_error("Item size exceeds item max length");
+        }
+        if (len <= 0) {
+            throw std::runtime_error("Item size must be positive");
+        }
+        count[len].push_back(i);
+    }
+    return count;
+}
+
+std::vector<std::vector<int>> ovbfd(const SizeMatrix &sizes,
+                                    const std::vector<long long> &capacity,
+                                    int item_max_length = -1,
+                                    int max_probes = -1) {
+    if (sizes.size() == 0 || capacity.empty()) {
+        return {};
+    }
+    if (max_probes < 0) {
+        max_probes = kDefaultMaxProbes;
+    }
+
+    std::vector<std::vector<int>> count =
+        count_items(sizes, capacity, item_max_length);
+    auto data = sizes.unchecked<2>();
+    int dims = capacity.size();
+    int secondary_dims = dims - 1;
+    int batch_max_length = (int)capacity[0];
+
+    VectorSegmentTree seg_tree(batch_max_length, secondary_dims);
+
+    std::vector<std::vector<size_t>> capacity_to_bins(batch_max_length + 1);
+    // Component-wise maximum secondary residual of each bucket. It is raised
+    // as bins are added and only lowered when a full scan of the bucket finds
+    // no fit, so it is an upper bound that never costs a rescan.
+    std::vector<long long> bucket_max((batch_max_length + 1) * secondary_dims,
+                                      0);
+    std::vector<long long> bins_remaining;
+    std::vector<std::vector<int>> bins_items;
+    std::vector<long long> need(secondary_dims);
+    std::vector<long long> scanned_max(secondary_dims);
+
+    for (int size = item_max_length; size >= 1; --size) {
+        for (int orig_idx : count[size]) {
+            for (int j = 0; j < secondary_dims; ++j) {
+                need[j] = data(orig_idx, j + 1);
+            }
+
+            int probes = 0;
+            size_t bin_idx = 0;
+            auto try_bucket = [&](int c) {
+                auto &bucket = capacity_to_bins[c];
+                std::fill(scanned_max.begin(), scanned_max.end(), 0);
+                for (size_t pos = bucket.size(); pos-- > 0;) {
+                    if (max_probes > 0 && probes++ >= max_probes) {
+                        return Probe::kStop;
+                    }
+                    const long long *remaining =
+                        &bins_remaining[bucket[pos] * dims + 1];
+                    bool fits = true;
+                    for (int j = 0; j < secondary_dims && fits; ++j) {
+                        fits = remaining[j] >= need[j];
+                    }
+                    if (fits) {
+                        bin_idx = bucket[pos];
+                        bucket[pos] = bucket.back();
+                        bucket.pop_back();
+                        return Probe::kAccept;
+                    }
+                    for (int j = 0; j < secondary_dims; ++j) {
+                        scanned_max[j] = std::max(scanned_max[j], remaining[j]);
+                    }
+                }
+                std::copy(scanned_max.begin(), scanned_max.end(),
+                          bucket_max.data() + c * secondary_dims);
+                seg_tree.update(c, true, scanned_max.data());
+                return Probe::kReject;
+            };
+            int best_capacity =
+                seg_tree.find_best_fit(size, need.data(), try_bucket);
+            // Once the probes run out, fall back to the emptiest bins rather
+            // than opening a new one next to bins that still have room
+            int top = seg_tree.max_capacity();
+            if (best_capacity == -1 && max_probes > 0 && probes > max_probes &&
+                top >= size) {
+                probes = 0;
+                if (try_bucket(top) == Probe::kAccept) {
+                    best_capacity = top;
+                }
+            }
+
+            if (best_capacity != -1) {
+                if (capacity_to_bins[best_capacity].empty()) {
+                    long long *bucket_secondary =
+                        bucket_max.data() + best_capacity * secondary_dims;
+                    std::fill_n(bucket_secondary, secondary_dims, 0);
+                    seg_tree.update(best_capacity, false, bucket_secondary);
+                }
+            } else {
+                bin_idx = bins_items.size();
+                bins_items.emplace_back();
+                bins_remaining.insert(bins_remaining.end(), capacity.begin(),
+                                      capacity.end());
+            }
+
+            long long *remaining = &bins_remaining[bin_idx * dims];
+            for (int j = 0; j < dims; ++j) {
+                remaining[j] -= data(orig_idx, j);
+            }
+            bins_items[bin_idx].push_back(orig_idx);
+
+            int new_capacity = (int)remaining[0];
+            if (new_capacity > 0) {
+                capacity_to_bins[new_capacity].push_back(bin_idx);
+                long long *bucket_secondary =
+                    bucket_max.data() + new_capacity * secondary_dims;
+                for (int j = 0; j < secondary_dims; ++j) {
+                    bucket_secondary[j] =
+                        std::max(bucket_secondary[j], remaining[j + 1]);
+                }
+                seg_tree.update(new_capacity, true, bucket_secondary);
+            }
+        }
+    }
+
+    return bins_items;
+}
+
+PYBIND11_MODULE(ovbfd, m) {
+    m.doc() = "Optimized Vector BFD (Best Fit Decreasing) algorithm "
+              "implementation for multi-dimensional integer sizes";
+    m.def("ovbfd", &ovbfd, "Optimized Vector BFD algorithm", py::arg("sizes"),
+          py::arg("capacity"), py::arg("item_max_length") = -1,
+          py::arg("max_probes") = -1);
+}
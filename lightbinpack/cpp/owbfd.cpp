@@ -0,0 +1,217 @@
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+#include <algorithm>
+#include <cstdint>
+#include <stdexcept>
+#include <vector>
+
+namespace py = pybind11;
+
+class IterativeSegmentTree {
+  private:
+    int n;
+    std::vector<int> tree;
+
+  public:
+    IterativeSegmentTree(int max_length) {
+        n = 1;
+        while (n < max_length + 1)
+            n <<= 1;
+        tree.assign(2 * n, 0);
+    }
+
+    void update(int idx, int val) {
+        idx += n - 1;
+        tree[idx] = val;
+        while (idx > 0) {
+            idx = (idx - 1) / 2;
+            int left = tree[2 * idx + 1];
+            int right = tree[2 * idx + 2];
+            int new_val = std::max(left, right);
+            if (tree[idx] == new_val)
+                break;
+            tree[idx] = new_val;
+        }
+    }
+
+    int find_best_fit(int target) const {
+        int idx = 0;
+        if (tree[idx] < target)
+            return -1;
+        while (idx < (n - 1)) {
+            if (tree[2 * idx + 1] >= target)
+                idx = 2 * idx + 1;
+            else
+                idx = 2 * idx + 2;
+        }
+        int capacity = idx - (n - 1);
+        return tree[idx] >= target ? capacity : -1;
+    }
+};
+
+// Best fit decreasing applied to consecutive windows of the input order.
+// Bins left partly filled by a window stay open for the next one, the
+// emptiest first and at most max_open_bins of them, and are closed at the end
+// of that next window. An item therefore shares a bin only with items of its
+// own or an adjacent window and moves by less than 2 * window_size positions,
+// while the last bins of a window are still filled by the next. The segment
+// tree and capacity lists are allocated once and only the entries touched by
+// a window are reset, which keeps the working memory at
+// O(batch_max_length + window_size) for any number of windows.
+std::vector<std::vector<int>> owbfd(const std::vector<int> &lengths,
+                                    int batch_max_length, int window_size = -1,
+                                    int item_max_length = -1,
+                                    int max_open_bins = -1) {
+    if (lengths.empty() || batch_max_length <= 0) {
+        return {};
+    }
+
+    int n = lengths.size();
+    if (window_size <= 0 || window_size > n) {
+        window_size = n;
+    }
+    if (item_max_length <= 0) {
+        item_max_length = batch_max_length;
+    }
+    if (max_open_bins < 0) {
+        max_open_bins = window_size;
+    }
+
+    for (int len : lengths) {
+        if (len > batch_max_length) {
+            throw std::runtime_error("Item size exceeds batch max length");
+        }
+        if (len > item_max_length) {
+            throw std::runtime_error("Item size exceeds item max length");
+        }
+        if (len <= 0) {
+            throw std::runtime_error("Item size must be positive");
+        }
+    }
+
+    IterativeSegmentTree seg_tree(batch_max_length);
+    std::vector<std::vector<int>> capacity_to_bins(batch_max_length + 1);
+
+    std::vector<uint64_t> window;
+    window.reserve(window_size);
+    // Bins of the current window, the carried ones first
+    std::vector<int> bins_remaining;
+    std::vector<std::vector<int>> window_bins;
+    int num_carried = 0;
+    std::vector<uint64_t> open_order;
+    std::vector<uint64_t> bin_order;
+    std::vector<std::vector<int>> bins_items;
+
+    for (int start = 0; start < n; start += window_size) {
+        int end = std::min(n, start + window_size);
+
+        window.clear();
+        for (int i = start; i < end; ++i) {
+            uint64_t rank = batch_max_length - lengths[i];
+            window.push_back(rank << 32 | (uint32_t)i);
+        }
+        std::sort(window.begin(), window.end());
+
+        for (uint64_t key : window) {
+            int orig_idx = key & 0xffffffffu;
+            int size = lengths[orig_idx];
+            int best_capacity = seg_tree.find_best_fit(size);
+
+            int bin_idx;
+            if (best_capacity != -1) {
+                bin_idx = capacity_to_bins[best_capacity].back();
+                capacity_to_bins[best_capacity].pop_back();
+                if (capacity_to_bins[best_capacity].empty()) {
+                    seg_tree.update(best_capacity, 0);
+                }
+            } else {
+                bin_idx = bins_remaining.size();
+                bins_remaining.push_back(batch_max_length);
+                window_bins.emplace_back();
+            }
+
+            int new_capacity = bins_remaining[bin_idx] - size;
+            bins_remaining[bin_idx] = new_capacity;
+            window_bins[bin_idx].push_back(orig_idx);
+
+            if (new_capacity > 0) {
+                capacity_to_bins[new_capacity].push_back(bin_idx);
+                seg_tree.update(new_capacity, new_capacity);
+            }
+        }
+
+        for (int remaining : bins_remaining) {
+            if (remaining > 0 && !capacity_to_bins[remaining].empty()) {
+                capacity_to_bins[remaining].clear();
+                seg_tree.update(remaining, 0);
+            }
+        }
+
+        // Keep the emptiest partly filled bins opened by this window open,
+        // unless it was the last one. Carried bins are closed now.
+        open_order.clear();
+        if (end < n) {
+            for (size_t b = num_carried; b < bins_remaining.size(); ++b) {
+                if (bins_remaining[b] > 0) {
+                    open_order.push_back(
+                        (uint64_t)(batch_max_length - bins_remaining[b]) << 32 |
+                        b);
+                }
+            }
+            if ((int)open_order.size() > max_open_bins) {
+                std::nth_element(open_order.begin(),
+                                 open_order.begin() + max_open_bins,
+                                 open_order.end());
+                open_order.resize(max_open_bins);
+            }
+            std::sort(open_order.begin(), open_order.end(),
+                      [](uint64_t a, uint64_t b) {
+                          return (a & 0xffffffffu) < (b & 0xffffffffu);
+                      });
+        }
+
+        // Emit the closed bins by their earliest item, each in input order.
+        size_t next_open = 0;
+        bin_order.clear();
+        for (size_t b = 0; b < window_bins.size(); ++b) {
+            if (next_open < open_order.size() &&
+                (open_order[next_open] & 0xffffffffu) == b) {
+                ++next_open;
+                continue;
+            }
+            std::vector<int> &items = window_bins[b];
+            std::sort(items.begin(), items.end());
+            bin_order.push_back((uint64_t)items.front() << 32 | b);
+        }
+        std::sort(bin_order.begin(), bin_order.end());
+        for (uint64_t key : bin_order) {
+            bins_items.push_back(std::move(window_bins[key & 0xffffffffu]));
+        }
+
+        // Move the open bins to the front and index them for the next window
+        num_carried = open_order.size();
+        for (int b = 0; b < num_carried; ++b) {
+            int from = open_order[b] & 0xffffffffu;
+            if (from != b) {
+                bins_remaining[b] = bins_remaining[from];
+                window_bins[b] = std::move(window_bins[from]);
+            }
+            capacity_to_bins[bins_remaining[b]].push_back(b);
+            seg_tree.update(bins_remaining[b], bins_remaining[b]);
+        }
+        bins_remaining.resize(num_carried);
+        window_bins.resize(num_carried);
+    }
+
+    return bins_items;
+}
+
+PYBIND11_MODULE(owbfd, m) {
+    m.doc() = "Order-preserving windowed BFD (Best Fit Decreasing) algorithm "
+              "implementation for integer lengths";
+    m.def("owbfd", &owbfd, "Optimized windowed BFD algorithm",
+          py::arg("lengths"), py::arg("batch_max_length"),
+          py::arg("window_size") = -1, py::arg("item_max_length") = -1,
+          py::arg("max_open_bins") = -1);
+}
@@ -1,13 +1,44 @@
 from enum import Enum
+import itertools
+import os
 import warnings
 import numpy as np
-from typing import List, Union, Optional, Tuple
-from lightbinpack import nf, ffd, bfd, obfd, obfdp, ogbfd, ogbfdp, ohgbfd, oshgbfd
+from typing import Any, Dict, List, Union, Optional, Tuple
+from lightbinpack import (
+    nf,
+    ffd,
+    bfd,
+    obfd,
+    obfdp,
+    ogbfd,
+    ogbfdp,
+    ohgbfd,
+    ohgbfdp,
+    oshgbfd,
+    oshgbfdp,
+    obfdu,
+    ogbfdu,
+    oobfd,
+    oogbfd,
+    ovbfd,
+    ovgbfd,
+    owbfd,
+)
+from lightbinpack.cpp.evaluate import evaluate as evaluate_flat
+from lightbinpack.cpp.obfdu import OBFDUpdater
+from lightbinpack.cpp.ogbfdu import OGBFDUpdater
+from lightbinpack.backend import (
+    ExecutionBackend,
+    mark_openmp_used,
+    process_pack,
+    resolve_num_threads,
+)
 
 
 class PackingStrategy(Enum):
     """Enum class for packing strategies"""
 
+    AUTO = "auto"  # Selected by the cost model
     NF = "nf"  # Next Fit
     FFD = "ffd"  # First Fit Decreasing
     BFD = "bfd"  # Best Fit Decreasing
@@ -16,9 +47,15 @@ class PackingStrategy(Enum):
     OGBFD = "ogbfd"  # Optimized Grouped Best Fit Decreasing
     OGBFDP = "ogbfdp"  # Parallel Optimized Grouped Best Fit Decreasing
     OHGBFD = "ohgbfd"  # Optimized Heterogeneous Grouped Best Fit Decreasing
+    OHGBFDP = "ohgbfdp"  # Parallel Optimized Heterogeneous Grouped Best Fit Decreasing
     OSHGBFD = (
         "oshgbfd"  # Optimized Sequential Heterogeneous Grouped Best Fit Decreasing
     )
+    # Parallel Optimized Sequential Heterogeneous Grouped Best Fit Decreasing
+    OSHGBFDP = "oshgbfdp"
+    OVBFD = "ovbfd"  # Optimized Vector Best Fit Decreasing
+    OVGBFD = "ovgbfd"  # Optimized Vector Grouped Best Fit Decreasing
+    OWBFD = "owbfd"  # Optimized Windowed Best Fit Decreasing
 
 
 class PackingVariant(Enum):
@@ -29,7 +66,7 @@ class PackingVariant(Enum):
 
 
 def pack(
-    lengths: List[Union[int, float]],
+    lengths: Union[List[Union[int, float]], List[List[int]], np.ndarray],
     batch_max_length: Union[float, int, List[int], List[List[int]]],
     strategy: Optional[Union[str, PackingStrategy]] = None,
     variant: Optional[Union[str, PackingVariant]] = None,
@@ -37,41 +74,71 @@ def pack(
     item_max_length: int = -1,
     enable_parallel: bool = False,
     parallel_strategy: int = 0,
+    num_threads: int = -1,
+    backend: Union[str, ExecutionBackend] = ExecutionBackend.OPENMP,
     weights: Optional[List[int]] = [],
     random_seed: Optional[int] = None,
     add_noise: bool = False,
     noise_scale: float = 0.01,
+    window_size: int = -1,
+    max_probes: int = -1,
+    max_open_bins: int = -1,
 ) -> Union[List[List[int]], List[List[List[int]]], List[Tuple[int, List[List[int]]]]]:
     """
     Unified packing function API
 
     Args:
-        lengths: List of item lengths to be packed
+        lengths: List of item lengths to be packed. For OVBFD/OVGBFD, an (N, d)
+            matrix of item sizes whose first column is the token length
         batch_max_length: Maximum capacity of bins.
             - For basic and grouped algorithms: single value
             - For OHGBFD: list of integers
             - For OSHGBFD: list of integer lists
-        strategy: Packing strategy, can be PackingStrategy enum value or corresponding string
+            - For OVBFD/OVGBFD: list of d integers, one capacity per dimension
+        strategy: Packing strategy, can be PackingStrategy enum value or corresponding string.
+            "auto" picks the kernel and thread count with a cost model of the kernels,
+            see ``lightbinpack.auto.select_strategy`` and ``calibrate``
         variant: Packing variant, can be PackingVariant enum value or corresponding string ("linear"/"square")
         dp_size: Number of bins per group
         item_max_length: Maximum length of items. If -1, calculated automatically
         enable_parallel: Whether to enable parallel processing (for parallel algorithms)
         parallel_strategy: Strategy for parallel algorithms (0 or 1)
-        weights: Optional weights for heterogeneous algorithms (OHGBFD/OSHGBFD)
+        num_threads: Number of threads for parallel algorithms and for sorting in FFD
+            and BFD. If -1, chosen from the number of items (or by the cost model for
+            "auto"). Capped by ``set_num_threads`` and forced to 1 with the OpenMP
+            backend in a process forked after OpenMP ran multi-threaded
+        backend: Execution backend for parallel algorithms, "openmp" (threads in the
+            native kernel) or "process" (worker processes over shared memory, safe
+            in dataloader workers and after fork)
+        weights: Optional weights for heterogeneous algorithms (OHGBFD/OSHGBFD and parallel versions)
         random_seed: Optional random seed for reproducible randomization. If None, uses system time
         add_noise: Whether to add small integer noise to lengths to create randomization
         noise_scale: Scale factor for noise (as fraction of max length), default 0.01
+        window_size: Number of consecutive items OWBFD reorders among. If -1, the
+            whole input is one window
+        max_probes: Number of bins (or groups) OVBFD/OVGBFD check per item before
+            falling back to the emptiest bins. If -1, a default of 256; if 0, unbounded
+        max_open_bins: Number of partly filled bins OWBFD keeps open for the next
+            window. If -1, every partly filled bin of the window; if 0, bins are
+            closed at the end of their window
 
     Returns:
         Different formats of packing results based on strategy:
-        - Basic algorithms (NF/FFD/BFD/OBFD/OBFDP): List[List[int]]
-        - Grouped algorithms (OGBFD/OGBFDP): List[List[List[int]]]
-        - Heterogeneous bin algorithms (OHGBFD/OSHGBFD): List[Tuple[int, List[List[int]]]]
+        - Basic algorithms (NF/FFD/BFD/OBFD/OBFDP/OVBFD/OWBFD): List[List[int]]
+        - Grouped algorithms (OGBFD/OGBFDP/OVGBFD): List[List[List[int]]]
+        - Heterogeneous bin algorithm (OHGBFD/OHGBFDP): List[List[List[int]]]
+        - Sequential heterogeneous bin algorithm (OSHGBFD/OSHGBFDP): List[Tuple[int, List[List[int]]]]
 
     Raises:
         ValueError: When parameters are invalid
         RuntimeError: When packing process fails
     """
+    if isinstance(backend, str):
+        try:
+            backend = ExecutionBackend(backend.lower())
+        except ValueError:
+            raise ValueError(f"Invalid backend: {backend}")
+
     if variant is not None:
         if isinstance(variant, str):
             try:
@@ -79,8 +146,20 @@ def pack(
             except ValueError:
                 raise ValueError(f"Invalid variant: {variant}")
 
+    vector_sizes = (isinstance(lengths, np.ndarray) and lengths.ndim == 2) or (
+        isinstance(lengths, (list, tuple))
+        and len(lengths) > 0
+        and isinstance(lengths[0], (list, tuple, np.ndarray))
+    )
+
     if strategy is None:
-        if isinstance(batch_max_length, (list, tuple)):
+        if vector_sizes:
+            strategy = (
+                PackingStrategy.OVBFD
+                if variant == PackingVariant.LINEAR
+                else PackingStrategy.OVGBFD
+            )
+        elif isinstance(batch_max_length, (list, tuple)):
             if all(isinstance(x, (list, tuple)) for x in batch_max_length):
                 strategy = PackingStrategy.OSHGBFD
             elif all(isinstance(x, (int, float)) for x in batch_max_length):
@@ -97,20 +176,53 @@ def pack(
                     else PackingStrategy.OBFD
                 )
     else:
-        if variant is not None:
-            warnings.warn(
-                "Both strategy and variant are specified. Using the specified strategy."
-            )
-
         if isinstance(strategy, str):
             try:
                 strategy = PackingStrategy(strategy.lower())
             except ValueError:
                 raise ValueError(f"Invalid strategy: {strategy}")
 
-    if not lengths:
+        if variant is not None and strategy != PackingStrategy.AUTO:
+            warnings.warn(
+                "Both strategy and variant are specified. Using the specified strategy."
+            )
+
+    if len(lengths) == 0:
         return []
 
+    if strategy == PackingStrategy.AUTO:
+        if vector_sizes:
+            strategy = (
+                PackingStrategy.OVBFD
+                if variant == PackingVariant.LINEAR
+                else PackingStrategy.OVGBFD
+            )
+        else:
+            from lightbinpack.auto import select_strategy
+
+            selection = select_strategy(
+                lengths,
+                batch_max_length,
+                dp_size,
+                variant,
+                weights,
+                add_noise=add_noise,
+            )
+            strategy = selection["strategy"]
+            if num_threads <= 0:
+                num_threads = selection["num_threads"]
+            enable_parallel = False
+
+    if window_size > 0 and strategy != PackingStrategy.OWBFD:
+        raise ValueError("window_size is only supported for OWBFD")
+    if max_open_bins >= 0 and strategy != PackingStrategy.OWBFD:
+        raise ValueError("max_open_bins is only supported for OWBFD")
+    if max_probes >= 0 and strategy not in (
+        PackingStrategy.OVBFD,
+        PackingStrategy.OVGBFD,
+    ):
+        raise ValueError("max_probes is only supported for OVBFD and OVGBFD")
+
     working_lengths = lengths
     if add_noise and lengths:
         if (
@@ -119,6 +231,8 @@ def pack(
             or strategy == PackingStrategy.BFD
         ):
             raise ValueError("add_noise is not supported for NF, FFD, and BFD")
+        if strategy == PackingStrategy.OVBFD or strategy == PackingStrategy.OVGBFD:
+            raise ValueError("add_noise is not supported for OVBFD and OVGBFD")
         lengths_array = np.array(lengths, dtype=int)
         max_length = np.max(lengths_array)
         noise_magnitude = max(1, int(max_length * noise_scale))
@@ -126,17 +240,17 @@ def pack(
             -noise_magnitude, noise_magnitude + 1, size=len(lengths_array)
         )
         noisy_lengths = lengths_array + noise
-        if strategy == PackingStrategy.OSHGBFD:
+        if strategy in (PackingStrategy.OSHGBFD, PackingStrategy.OSHGBFDP):
             min_batch_max = min(min(sublist) for sublist in batch_max_length if sublist)
             noisy_lengths = np.minimum(noisy_lengths, min_batch_max)
-        elif strategy == PackingStrategy.OHGBFD:
+        elif strategy in (PackingStrategy.OHGBFD, PackingStrategy.OHGBFDP):
             min_batch_max = min(batch_max_length)
             noisy_lengths = np.minimum(noisy_lengths, min_batch_max)
         else:
             noisy_lengths = np.minimum(noisy_lengths, int(batch_max_length))
         working_lengths = np.maximum(noisy_lengths, 1).astype(int).tolist()
 
-    if strategy == PackingStrategy.OSHGBFD:
+    if strategy in (PackingStrategy.OSHGBFD, PackingStrategy.OSHGBFDP):
         if not isinstance(batch_max_length, (list, tuple)) or not all(
             isinstance(sublist, (list, tuple))
             and all(isinstance(x, int) for x in sublist)
@@ -145,11 +259,18 @@ def pack(
             raise ValueError(
                 "batch_max_length must be a list of integer lists for OSHGBFD"
             )
-    elif strategy == PackingStrategy.OHGBFD:
+    elif strategy in (PackingStrategy.OHGBFD, PackingStrategy.OHGBFDP):
         if not isinstance(batch_max_length, (list, tuple)) or not all(
             isinstance(x, int) for x in batch_max_length
         ):
             raise ValueError("batch_max_length must be a list of integers for OHGBFD")
+    elif strategy == PackingStrategy.OVBFD or strategy == PackingStrategy.OVGBFD:
+        if not isinstance(batch_max_length, (list, tuple)) or not all(
+            isinstance(x, int) for x in batch_max_length
+        ):
+            raise ValueError(
+                "batch_max_length must be a list of integers for OVBFD and OVGBFD"
+            )
     else:
         if isinstance(batch_max_length, (list, tuple)):
             raise ValueError(
@@ -161,23 +282,52 @@ def pack(
             strategy = PackingStrategy.OBFDP
         elif strategy == PackingStrategy.OGBFD:
             strategy = PackingStrategy.OGBFDP
+        elif strategy == PackingStrategy.OHGBFD:
+            strategy = PackingStrategy.OHGBFDP
+        elif strategy == PackingStrategy.OSHGBFD:
+            strategy = PackingStrategy.OSHGBFDP
+
+    parallel = strategy in (
+        PackingStrategy.OBFDP,
+        PackingStrategy.OGBFDP,
+        PackingStrategy.OHGBFDP,
+        PackingStrategy.OSHGBFDP,
+    )
+    threaded = strategy in (PackingStrategy.FFD, PackingStrategy.BFD) or (
+        parallel and backend == ExecutionBackend.OPENMP
+    )
+    if threaded:
+        num_threads = resolve_num_threads(num_threads, len(working_lengths))
+        mark_openmp_used(num_threads)
 
     try:
-        if strategy == PackingStrategy.NF:
+        if parallel and backend == ExecutionBackend.PROCESS:
+            return process_pack(
+                strategy.value,
+                working_lengths,
+                batch_max_length,
+                item_max_length,
+                dp_size,
+                parallel_strategy,
+                weights,
+                num_threads,
+            )
+
+        elif strategy == PackingStrategy.NF:
             return nf(working_lengths, batch_max_length)
 
         elif strategy == PackingStrategy.FFD:
-            return ffd(working_lengths, batch_max_length)
+            return ffd(working_lengths, batch_max_length, 0, num_threads)
 
         elif strategy == PackingStrategy.BFD:
-            return bfd(working_lengths, batch_max_length)
+            return bfd(working_lengths, batch_max_length, 0, num_threads)
 
         elif strategy == PackingStrategy.OBFD:
             return obfd(working_lengths, batch_max_length, item_max_length)
 
         elif strategy == PackingStrategy.OBFDP:
             return obfdp(
-                working_lengths, batch_max_length, item_max_length, parallel_strategy
+                working_lengths, batch_max_length, item_max_length, num_threads
             )
 
         elif strategy == PackingStrategy.OGBFD:
@@ -190,13 +340,460 @@ def pack(
                 dp_size,
                 item_max_length,
                 parallel_strategy,
+                num_threads,
             )
 
         elif strategy == PackingStrategy.OHGBFD:
             return ohgbfd(working_lengths, batch_max_length, item_max_length, weights)
 
+        elif strategy == PackingStrategy.OHGBFDP:
+            return ohgbfdp(
+                working_lengths, batch_max_length, item_max_length, weights, num_threads
+            )
+
         elif strategy == PackingStrategy.OSHGBFD:
             return oshgbfd(working_lengths, batch_max_length, item_max_length, weights)
 
+        elif strategy == PackingStrategy.OSHGBFDP:
+            return oshgbfdp(
+                working_lengths, batch_max_length, item_max_length, weights, num_threads
+            )
+
+        elif strategy == PackingStrategy.OVBFD:
+            return ovbfd(working_lengths, batch_max_length, item_max_length, max_probes)
+
+        elif strategy == PackingStrategy.OVGBFD:
+            return ovgbfd(
+                working_lengths,
+                batch_max_length,
+                dp_size,
+                item_max_length,
+                max_probes,
+            )
+
+        elif strategy == PackingStrategy.OWBFD:
+            return owbfd(
+                working_lengths,
+                batch_max_length,
+                window_size,
+                item_max_length,
+                max_open_bins,
+            )
+
+    except Exception as e:
+        raise RuntimeError(f"Packing failed with strategy {strategy}: {str(e)}")
+
+
+def pack_update(
+    plan: Union[List[List[int]], List[List[List[int]]]],
+    lengths: List[int],
+    batch_max_length: int,
+    start_index: int = -1,
+    dp_size: Optional[int] = None,
+    item_max_length: int = -1,
+) -> Union[List[List[int]], List[List[List[int]]]]:
+    """
+    Incrementally update an existing packing plan with newly appended items
+
+    Existing bins keep their items and positions. New items are best-fitted
+    into the residual capacity of existing bins (or bin groups), and new bins
+    or groups are appended only when nothing fits.
+
+    Residual capacities are recomputed from the lengths of the existing items
+    and the plan is copied to and from the native kernel, so a call takes time
+    linear in the total number of items. Use ``PlanUpdater`` for repeated
+    updates, which keeps the residuals between calls.
+
+    Args:
+        plan: Existing plan, as returned by OBFD (List[List[int]]) or
+            OGBFD (List[List[List[int]]])
+        lengths: Lengths of all items, existing items first followed by the
+            newly appended ones
+        batch_max_length: Maximum capacity of bins, must match the plan
+        start_index: Index of the first new item. If -1, inferred as one past
+            the largest index referenced by the plan
+        dp_size: Number of bins per group. Required to create a grouped plan
+            from an empty one, inferred from the plan otherwise
+        item_max_length: Maximum length of new items. If -1, calculated automatically
+
+    Returns:
+        Updated plan in the same format as the input plan
+
+    Raises:
+        ValueError: When parameters are invalid
+        RuntimeError: When the update fails
+    """
+    if isinstance(batch_max_length, (list, tuple)):
+        raise ValueError("batch_max_length must be a single value for pack_update")
+
+    grouped = (
+        any(isinstance(bin_items, (list, tuple)) for bin_items in plan[0])
+        if plan
+        else dp_size is not None
+    )
+
+    try:
+        if grouped:
+            return ogbfdu(
+                plan,
+                lengths,
+                batch_max_length,
+                dp_size if dp_size is not None else -1,
+                start_index,
+                item_max_length,
+            )
+        return obfdu(plan, lengths, batch_max_length, start_index, item_max_length)
+    except Exception as e:
+        raise RuntimeError(f"Plan update failed: {str(e)}")
+
+
+class PlanUpdater:
+    """
+    Repeated incremental updates of a packing plan
+
+    The residual capacities of the plan's bins (or bin groups) and their
+    capacity index are built once, from the plan and the lengths of its
+    items, and kept between updates. An update then best-fits the new items
+    in O(D log L) and only touches the bins they go to: ``plan`` is updated
+    in place, replacing the changed bins or groups and appending new ones.
+    Existing bins keep their items and positions, and new items follow them.
+
+    Args:
+        plan: Existing plan, as returned by OBFD (List[List[int]]) or
+            OGBFD (List[List[List[int]]])
+        lengths: Lengths of the items of the plan, indexed by item
+        batch_max_length: Maximum capacity of bins, must match the plan
+        dp_size: Number of bins per group. Required to create a grouped plan
+            from an empty one, inferred from the plan otherwise
+
+    Raises:
+        ValueError: When parameters are invalid
+        RuntimeError: When the plan does not match the lengths
+    """
+
+    def __init__(
+        self,
+        plan: Union[List[List[int]], List[List[List[int]]]],
+        lengths: List[int],
+        batch_max_length: int,
+        dp_size: Optional[int] = None,
+    ):
+        if isinstance(batch_max_length, (list, tuple)):
+            raise ValueError("batch_max_length must be a single value")
+        if batch_max_length <= 0:
+            raise ValueError("batch_max_length must be positive")
+
+        self.grouped = (
+            any(isinstance(bin_items, (list, tuple)) for bin_items in plan[0])
+            if plan
+            else dp_size is not None
+        )
+        self.plan = list(plan)
+        try:
+            if self.grouped:
+                self._state = OGBFDUpdater(
+                    plan,
+                    lengths,
+                    batch_max_length,
+                    dp_size if dp_size is not None else -1,
+                )
+            else:
+                self._state = OBFDUpdater(plan, lengths, batch_max_length)
+        except Exception as e:
+            raise RuntimeError(f"Plan update failed: {str(e)}")
+
+    @property
+    def num_items(self) -> int:
+        """Number of items packed so far, the index of the next new item"""
+        return self._state.num_items
+
+    def update(
+        self, lengths: List[int], item_max_length: int = -1
+    ) -> Union[List[List[int]], List[List[List[int]]]]:
+        """
+        Pack newly appended items into the plan
+
+        Args:
+            lengths: Lengths of the new items only, which are numbered from
+                ``num_items`` onwards
+            item_max_length: Maximum length of new items. If -1, calculated
+                automatically
+
+        Returns:
+            The updated plan, the same list as ``plan``
+
+        Raises:
+            RuntimeError: When the update fails
+        """
+        try:
+            changed = self._state.update(lengths, item_max_length)
+        except Exception as e:
+            raise RuntimeError(f"Plan update failed: {str(e)}")
+        for index, contents in changed:
+            if index < len(self.plan):
+                self.plan[index] = contents
+            else:
+                self.plan.append(contents)
+        return self.plan
+
+
+def pack_file(
+    lengths: Union[str, os.PathLike, np.ndarray],
+    output_dir: Union[str, os.PathLike],
+    batch_max_length: int,
+    strategy: Optional[Union[str, PackingStrategy]] = None,
+    variant: Optional[Union[str, PackingVariant]] = None,
+    dp_size: int = 1,
+    item_max_length: int = -1,
+    parallel_strategy: int = 0,
+    dtype: str = "int32",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Out-of-core packing of lengths stored on disk
+
+    Lengths are read through a memory map and never materialized as a Python
+    list. The plan is written to ``output_dir`` in a flat format:
+    ``items.npy`` holds item indices bin after bin and ``offsets.npy`` holds
+    the bin boundaries, so bin ``b`` contains ``items[offsets[b]:offsets[b + 1]]``.
+    Any ``items.npy`` and ``offsets.npy`` already in ``output_dir`` are replaced.
+    For OGBFD, group ``g`` consists of bins ``g * dp_size`` to
+    ``(g + 1) * dp_size - 1``. A temporary ``workspace.npy`` of ``16 * N``
+    bytes is created in ``output_dir`` during packing and removed afterwards.
+
+    Args:
+        lengths: Path to a ``.npy`` file or raw binary file of integer lengths,
+            or a contiguous 1D integer array such as ``np.memmap``
+        output_dir: Directory where the plan is written
+        batch_max_length: Maximum capacity of bins
+        strategy: Packing strategy, only OBFD and OGBFD are supported
+        variant: Packing variant ("linear"/"square"), used when strategy is None
+        dp_size: Number of bins per group
+        item_max_length: Maximum length of items. If -1, calculated automatically
+        parallel_strategy: Strategy for OGBFD (0 or 1)
+        dtype: Dtype of raw binary length files, ignored for ``.npy`` files and arrays
+
+    Returns:
+        Tuple of read-only memory-mapped ``(items, offsets)`` arrays
+
+    Raises:
+        ValueError: When parameters are invalid
+        RuntimeError: When packing process fails
+    """
+    if variant is not None and isinstance(variant, str):
+        try:
+            variant = PackingVariant(variant.lower())
+        except ValueError:
+            raise ValueError(f"Invalid variant: {variant}")
+
+    if strategy is None:
+        strategy = (
+            PackingStrategy.OBFD
+            if variant == PackingVariant.LINEAR
+            else PackingStrategy.OGBFD
+        )
+    elif isinstance(strategy, str):
+        try:
+            strategy = PackingStrategy(strategy.lower())
+        except ValueError:
+            raise ValueError(f"Invalid strategy: {strategy}")
+
+    if strategy not in (PackingStrategy.OBFD, PackingStrategy.OGBFD):
+        raise ValueError("pack_file only supports OBFD and OGBFD")
+    if batch_max_length <= 0:
+        raise ValueError("batch_max_length must be positive")
+    if strategy == PackingStrategy.OGBFD and dp_size <= 0:
+        raise ValueError("dp_size must be positive")
+
+    if isinstance(lengths, (str, os.PathLike)):
+        if os.fspath(lengths).endswith(".npy"):
+            lengths = np.load(lengths, mmap_mode="r")
+        else:
+            lengths = np.memmap(lengths, dtype=dtype, mode="r")
+    lengths = np.asarray(lengths)
+    if lengths.ndim != 1:
+        raise ValueError("lengths must be one-dimensional")
+    # A strided view would have to be copied into memory, defeating the point
+    if not lengths.flags.c_contiguous:
+        raise ValueError("lengths must be contiguous, e.g. a np.memmap of a file")
+
+    os.makedirs(output_dir, exist_ok=True)
+    # The kernels allocate nothing for empty input, so a plan left in the
+    # directory by an earlier call must not be mistaken for the new one
+    for name in ("items", "offsets"):
+        path = os.path.join(output_dir, f"{name}.npy")
+        if os.path.exists(path):
+            os.remove(path)
+    buffers = {}
+
+    def allocate(name: str, size: int) -> np.ndarray:
+        buffers[name] = np.lib.format.open_memmap(
+            os.path.join(output_dir, f"{name}.npy"),
+            mode="w+",
+            dtype=np.int64,
+            shape=(size,),
+        )
+        return buffers[name]
+
+    try:
+        if strategy == PackingStrategy.OBFD:
+            oobfd(lengths, batch_max_length, allocate, item_max_length)
+        else:
+            oogbfd(
+                lengths,
+                batch_max_length,
+                dp_size,
+                allocate,
+                item_max_length,
+                parallel_strategy,
+            )
     except Exception as e:
         raise RuntimeError(f"Packing failed with strategy {strategy}: {str(e)}")
+    finally:
+        buffers.pop("workspace", None)
+        workspace_path = os.path.join(output_dir, "workspace.npy")
+        if os.path.exists(workspace_path):
+            os.remove(workspace_path)
+        for buffer in buffers.values():
+            buffer.flush()
+        buffers.clear()
+
+    if not os.path.exists(os.path.join(output_dir, "items.npy")):
+        allocate("items", 0)
+        allocate("offsets", 1)[0] = 0
+        buffers.clear()
+
+    return (
+        np.load(os.path.join(output_dir, "items.npy"), mmap_mode="r"),
+        np.load(os.path.join(output_dir, "offsets.npy"), mmap_mode="r"),
+    )
+
+
+def _flatten_bins(bins: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert a list of bins into flat ``(items, offsets)`` arrays"""
+    sizes = np.fromiter((len(bin_items) for bin_items in bins), dtype=np.int64)
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    items = np.fromiter(
+        itertools.chain.from_iterable(bins), dtype=np.int64, count=offsets[-1]
+    )
+    return items, offsets
+
+
+def _is_flat_plan(plan: Any) -> bool:
+    """Whether ``plan`` is a flat ``(items, offsets)`` pair of integer arrays"""
+    return (
+        isinstance(plan, tuple)
+        and len(plan) == 2
+        and all(
+            isinstance(array, np.ndarray)
+            and array.ndim == 1
+            and np.issubdtype(array.dtype, np.integer)
+            for array in plan
+        )
+        and len(plan[1]) > 0
+    )
+
+
+def evaluate(
+    plan: Union[
+        List[List[int]],
+        List[List[List[int]]],
+        List[Tuple[int, List[List[int]]]],
+        Tuple[np.ndarray, np.ndarray],
+    ],
+    lengths: Union[List[Union[int, float]], np.ndarray],
+    capacity: Union[float, int, List[int], List[List[int]]],
+    weights: Optional[Union[List[float], np.ndarray]] = None,
+    dp_size: Optional[int] = None,
+    num_threads: int = -1,
+) -> Dict[str, Any]:
+    """
+    Validate a packing plan and compute utilization and balance metrics
+
+    Nested plans are converted to the flat format once; flat
+    ``(items, offsets)`` plans, such as those written by ``pack_file``, are
+    evaluated without copying.
+
+    Args:
+        plan: Packing plan in any format returned by ``pack``, or a flat
+            ``(items, offsets)`` tuple of 1D integer arrays. Tuples of lists
+            are treated as lists of bins
+        lengths: Item lengths the plan was built from
+        capacity: Bin capacity, matching ``batch_max_length`` of the plan.
+            A list of integers gives per-bin capacities within each group
+            (OHGBFD), a list of integer lists gives them per bin combination
+            (OSHGBFD)
+        weights: Optional per-item cost for balance metrics, defaults to
+            squared lengths
+        dp_size: Number of bins per group for flat plans. If None, each bin
+            is its own group
+        num_threads: Number of OpenMP threads. If -1, chosen from the number of
+            items like the parallel packing algorithms. Capped by
+            ``set_num_threads`` and forced to 1 in a process forked after
+            OpenMP ran multi-threaded
+
+    Returns:
+        Dictionary with keys:
+        - valid: No missing items, invalid indices or overflowing bins
+        - num_items, num_bins, num_groups, empty_bins
+        - missing, duplicates, invalid_indices, overflow_bins
+        - utilization: Total packed length over total bin capacity
+        - group_imbalance: Mean of (max - min) / max bin cost within groups
+        - max_group_imbalance: Largest within-group imbalance
+        - global_imbalance: (max - min) / max bin cost over all non-empty bins
+        - bin_lower_bound: Lower bound on the number of bins
+        - bin_excess: Non-empty bins above the lower bound
+
+    Raises:
+        ValueError: When parameters are invalid
+    """
+    group_offsets = None
+    bin_capacity = None
+
+    if _is_flat_plan(plan):
+        items, offsets = plan
+        if dp_size is not None:
+            group_offsets = np.arange(0, len(offsets), dp_size, dtype=np.int64)
+    elif plan and isinstance(plan[0], tuple):
+        groups = [bins for _, bins in plan]
+        items, offsets = _flatten_bins(
+            [bin_items for bins in groups for bin_items in bins]
+        )
+        group_offsets = np.zeros(len(groups) + 1, dtype=np.int64)
+        np.cumsum([len(bins) for bins in groups], out=group_offsets[1:])
+        if isinstance(capacity, (list, tuple)):
+            bin_capacity = np.concatenate(
+                [
+                    np.asarray(capacity[bin_type], dtype=np.float64)
+                    for bin_type, _ in plan
+                ]
+            )
+    elif plan and plan[0] and isinstance(plan[0][0], (list, tuple)):
+        group_size = len(plan[0])
+        items, offsets = _flatten_bins(
+            [bin_items for group in plan for bin_items in group]
+        )
+        group_offsets = np.arange(
+            0, len(plan) * group_size + 1, group_size, dtype=np.int64
+        )
+        if isinstance(capacity, (list, tuple)):
+            bin_capacity = np.tile(np.asarray(capacity, dtype=np.float64), len(plan))
+    else:
+        items, offsets = _flatten_bins(plan)
+
+    if bin_capacity is None:
+        bin_capacity = np.asarray(capacity, dtype=np.float64).reshape(-1)
+    if group_offsets is None:
+        group_offsets = np.empty(0, dtype=np.int64)
+    if not isinstance(lengths, np.ndarray):
+        lengths = np.asarray(lengths)
+
+    num_threads = resolve_num_threads(num_threads, len(lengths))
+    mark_openmp_used(num_threads)
+
+    try:
+        return evaluate_flat(
+            items, offsets, lengths, bin_capacity, group_offsets, weights, num_threads
+        )
+    except RuntimeError as e:
+        raise ValueError(f"Invalid plan: {str(e)}")
@@ -105,6 +105,22 @@ ext_modules = [
         extra_compile_args=extra_compile_args,
         extra_link_args=extra_link_args,
     ),
+    Extension(
+        "lightbinpack.cpp.ohgbfdp",
+        ["lightbinpack/cpp/ohgbfdp.cpp"],
+        include_dirs=[pybind11.get_include()],
+        language="c++",
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
+    ),
+    Extension(
+        "lightbinpack.cpp.oshgbfdp",
+        ["lightbinpack/cpp/oshgbfdp.cpp"],
+        include_dirs=[pybind11.get_include()],
+        language="c++",
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
+    ),
     Extension(
         "lightbinpack.cpp.load_balance",
         ["lightbinpack/cpp/load_balance.cpp"],
@@ -113,6 +129,70 @@ ext_modules = [
         extra_compile_args=extra_compile_args,
         extra_link_args=extra_link_args,
     ),
+    Extension(
+        "lightbinpack.cpp.obfdu",
+        ["lightbinpack/cpp/obfdu.cpp"],
+        include_dirs=[pybind11.get_include()],
+        language="c++",
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
+    ),
+    Extension(
+        "lightbinpack.cpp.ogbfdu",
+        ["lightbinpack/cpp/ogbfdu.cpp"],
+        include_dirs=[pybind11.get_include()],
+        language="c++",
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
+    ),
+    Extension(
+        "lightbinpack.cpp.oobfd",
+        ["lightbinpack/cpp/oobfd.cpp"],
+        include_dirs=[pybind11.get_include()],
+        language="c++",
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
+    ),
+    Extension(
+        "lightbinpack.cpp.oogbfd",
+        ["lightbinpack/cpp/oogbfd.cpp"],
+        include_dirs=[pybind11.get_include()],
+        language="c++",
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
+    ),
+    Extension(
+        "lightbinpack.cpp.ovbfd",
+        ["lightbinpack/cpp/ovbfd.cpp"],
+        include_dirs=[pybind11.get_include()],
+        language="c++",
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
+    ),
+    Extension(
+        "lightbinpack.cpp.ovgbfd",
+        ["lightbinpack/cpp/ovgbfd.cpp"],
+        include_dirs=[pybind11.get_include()],
+        language="c++",
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
+    ),
+    Extension(
+        "lightbinpack.cpp.owbfd",
+        ["lightbinpack/cpp/owbfd.cpp"],
+        include_dirs=[pybind11.get_include()],
+        language="c++",
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
+    ),
+    Extension(
+        "lightbinpack.cpp.evaluate",
+        ["lightbinpack/cpp/evaluate.cpp"],
+        include_dirs=[pybind11.get_include()],
+        language="c++",
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
+    ),
 ]
 
 setup(
@@ -123,7 +203,7 @@ setup(
     url="https://github.com/TechxGenus/LightBinPack",
     packages=find_packages(),
     package_data={
-        "lightbinpack": ["cpp/*.cpp"],
+        "lightbinpack": ["cpp/*.cpp", "cost_model.json"],
     },
     ext_modules=ext_modules,
     python_requires=">=3.6",
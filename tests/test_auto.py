@@ -0,0 +1,166 @@
+import numpy as np
+import pytest
+
+from lightbinpack import PackingStrategy, calibrate, pack, select_strategy
+from lightbinpack import auto
+from lightbinpack.auto import _nnls, load_cost_model
+
+NUM_FEATURES = 5
+
+
+def _model(**kernels):
+    """Cost model predicting each kernel from a single regressor"""
+    model = {"version": auto.COST_MODEL_VERSION, "max_threads": 2, "kernels": {}}
+    for name in auto._KERNELS:
+        coefficients = [0.0] * NUM_FEATURES
+        threads = "2" if auto._KERNELS[name][1] else "1"
+        feature, cost = kernels.get(name, (0, 1.0))
+        coefficients[feature] = cost
+        model["kernels"][name] = {threads: coefficients}
+    return model
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    path = tmp_path / "cost_model.json"
+    monkeypatch.setenv("LIGHTBINPACK_COST_MODEL", str(path))
+    monkeypatch.delenv("LIGHTBINPACK_AUTO_CALIBRATE", raising=False)
+    monkeypatch.setattr(auto, "_cost_models", {})
+    return path
+
+
+def _lengths(num_items, seed=0):
+    return np.random.default_rng(seed).integers(1, 4096, num_items).tolist()
+
+
+def test_bundled_model_is_used_without_calibrating(cache, monkeypatch):
+    monkeypatch.setattr(auto, "calibrate", pytest.fail)
+
+    model = load_cost_model()
+
+    assert model["version"] == auto.COST_MODEL_VERSION
+    assert set(model["kernels"]) == set(auto._KERNELS)
+    assert not cache.exists()
+    selection = select_strategy(_lengths(1000), 4096, dp_size=8)
+    assert selection["predicted_time"] is not None
+
+
+def test_calibrate_replaces_the_bundled_model(cache):
+    load_cost_model()
+
+    model = calibrate(
+        sizes=(2000,),
+        capacities=(4096,),
+        length_ratios=(4,),
+        group_sizes=(2, 4),
+        repeat=1,
+        path=cache,
+    )
+
+    assert cache.exists()
+    assert load_cost_model() is model
+    for kernel in model["kernels"].values():
+        for coefficients in kernel.values():
+            assert len(coefficients) == NUM_FEATURES
+            assert min(coefficients) >= 0
+
+
+def test_selection_follows_the_cost_model():
+    lengths = _lengths(5000)
+    # BFD only depends on the number of bins, OBFD on the capacity
+    cheap_bfd = _model(bfd=(3, 1e-9), obfd=(1, 1e-3))
+
+    selection = select_strategy(lengths, 4096, variant="linear", cost_model=cheap_bfd)
+    assert selection["strategy"] == PackingStrategy.BFD
+
+    cheap_obfd = _model(bfd=(3, 1.0), obfd=(1, 1e-9))
+    selection = select_strategy(lengths, 4096, variant="linear", cost_model=cheap_obfd)
+    assert selection["strategy"] == PackingStrategy.OBFD
+    assert selection["num_threads"] == 1
+
+
+def test_parallel_kernel_needs_a_clear_speedup():
+    lengths = _lengths(5000)
+    slightly_faster = _model(ogbfd=(0, 1.0), ogbfdp=(0, 0.95))
+    much_faster = _model(ogbfd=(0, 1.0), ogbfdp=(0, 0.5))
+
+    selection = select_strategy(lengths, 4096, dp_size=8, cost_model=slightly_faster)
+    assert selection["strategy"] == PackingStrategy.OGBFD
+    selection = select_strategy(lengths, 4096, dp_size=8, cost_model=much_faster)
+    assert selection["strategy"] == PackingStrategy.OGBFDP
+    assert selection["num_threads"] == 2
+
+
+def test_thread_counts_above_the_core_count_are_skipped(monkeypatch):
+    model = _model(ogbfd=(0, 1.0), ogbfdp=(0, 0.1))
+    model["kernels"]["ogbfdp"] = {"1024": model["kernels"]["ogbfdp"]["2"]}
+    monkeypatch.setattr(auto, "default_num_threads", lambda: 4)
+
+    selection = select_strategy(_lengths(1000), 4096, dp_size=8, cost_model=model)
+
+    assert selection["strategy"] == PackingStrategy.OGBFD
+
+
+def test_prediction_follows_the_group_size():
+    # Only the items times group size regressor costs time
+    model = _model(ogbfd=(4, 1e-6), ohgbfd=(4, 1e-6))
+    lengths = _lengths(1000)
+
+    small = select_strategy(lengths, 4096, dp_size=2, cost_model=model)
+    large = select_strategy(lengths, 4096, dp_size=32, cost_model=model)
+    assert large["predicted_time"] == pytest.approx(16 * small["predicted_time"])
+
+    heterogeneous = select_strategy(lengths, [4096] * 4, cost_model=model)
+    assert heterogeneous["features"]["group_size"] == 4
+    assert heterogeneous["predicted_time"] == pytest.approx(2 * small["predicted_time"])
+
+
+def test_options_restrict_the_family():
+    model = _model(bfd=(0, 1e-9))
+    floats = np.random.default_rng(0).random(1000).tolist()
+
+    selection = select_strategy(floats, 1.0, variant="linear", cost_model=model)
+    assert selection["strategy"] == PackingStrategy.BFD
+    selection = select_strategy(
+        _lengths(1000), 4096, variant="linear", cost_model=model, add_noise=True
+    )
+    assert selection["strategy"] != PackingStrategy.BFD
+    with pytest.raises(ValueError):
+        select_strategy(floats, 1.0, cost_model=model)
+
+
+def test_predicted_utilization_is_consistent(cache):
+    lengths = _lengths(30000)
+
+    first = select_strategy(lengths, 4096, dp_size=8)
+    second = select_strategy(lengths, 4096, dp_size=8)
+    other_model = select_strategy(lengths, 4096, dp_size=8, cost_model=_model())
+
+    assert first["predicted_utilization"] == second["predicted_utilization"]
+    assert first["predicted_utilization"] == other_model["predicted_utilization"]
+    assert 0 < first["predicted_utilization"] <= 1
+
+
+def test_auto_pack_is_valid(cache):
+    lengths = _lengths(5000)
+
+    plan = pack(lengths, 4096, strategy="auto", dp_size=4)
+
+    items = sorted(item for group in plan for bin_items in group for item in bin_items)
+    assert set(items) == set(range(len(lengths)))
+
+
+def test_nnls_recovers_non_negative_coefficients():
+    rng = np.random.default_rng(0)
+    features = rng.random((50, NUM_FEATURES)) * [1e5, 1e6, 1e3, 1e2, 1e6]
+    coefficients = np.array([2e-7, 0.0, 1e-6, 3e-5, 0.0])
+    targets = features @ coefficients - 1e-3 * features[:, 1] / 1e6
+
+    fitted = _nnls(features, targets)
+
+    assert (fitted >= 0).all()
+    # Optimal: no zero coefficient could lower the residual
+    gradient = features.T @ (targets - features @ fitted)
+    scale = np.linalg.norm(features, axis=0)
+    assert (gradient / scale <= 1e-9).all()
+    assert np.allclose((gradient / scale)[fitted > 0], 0, atol=1e-9)
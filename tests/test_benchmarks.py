@@ -0,0 +1,102 @@
+import copy
+import json
+
+import pytest
+
+from lightbinpack.benchmarks import ENTRY_POINTS, compare, run_case, run_suite
+from lightbinpack.benchmarks.__main__ import main
+
+
+def _record(entry="obfd", **metrics):
+    record = {
+        "entry": entry,
+        "distribution": "uniform",
+        "num_items": 1000,
+        "capacity": 4096,
+        "seed": 0,
+        "time_min": 0.01,
+        "time_median": 0.01,
+        "peak_rss_mb": 100.0,
+        "call_rss_mb": 1.0,
+        "utilization": 0.99,
+        "valid": True,
+    }
+    record.update(metrics)
+    return record
+
+
+def _results(*records):
+    return {"version": 1, "results": list(records)}
+
+
+def _metrics(regressions):
+    return sorted(regression["metric"] for regression in regressions)
+
+
+def test_identical_results_have_no_regressions():
+    results = _results(_record(), _record("ogbfd"))
+
+    assert compare(results, copy.deepcopy(results)) == []
+
+
+def test_each_metric_is_flagged_beyond_its_tolerance():
+    baseline = _results(_record())
+
+    slower = _results(_record(time_min=0.013))
+    assert _metrics(compare(slower, baseline)) == ["time_min"]
+    assert compare(slower, baseline, time_tolerance=0.5) == []
+
+    larger = _results(_record(peak_rss_mb=130.0))
+    assert _metrics(compare(larger, baseline)) == ["peak_rss_mb"]
+
+    worse = _results(_record(utilization=0.98))
+    regressions = compare(worse, baseline)
+    assert _metrics(regressions) == ["utilization"]
+    assert regressions[0]["case"] == "obfd/uniform/N=1000/L=4096"
+    assert regressions[0]["baseline"] == 0.99
+    assert regressions[0]["current"] == 0.98
+
+
+def test_noise_and_unmeasured_metrics_are_skipped():
+    baseline = _results(_record(time_min=0.0001, peak_rss_mb=None))
+    current = _results(_record(time_min=0.0009, peak_rss_mb=500.0))
+
+    assert compare(current, baseline) == []
+
+
+def test_cases_missing_from_either_side_are_skipped():
+    baseline = _results(_record("obfd"))
+    current = _results(_record("ogbfd", time_min=10.0))
+
+    assert compare(current, baseline) == []
+
+
+@pytest.mark.parametrize("baseline_valid", [True, False])
+def test_invalid_plans_are_always_reported(baseline_valid):
+    baseline = _results(_record(valid=baseline_valid))
+    current = _results(_record(valid=False))
+
+    assert _metrics(compare(current, baseline)) == ["valid"]
+
+
+@pytest.mark.parametrize("entry", list(ENTRY_POINTS))
+def test_every_entry_point_runs(entry):
+    record = run_case(entry, "uniform", 2000, 4096, repeat=1, memory=False)
+
+    assert record["time_min"] > 0
+    assert record["peak_rss_mb"] is None
+    assert record.get("valid", True)
+
+
+def test_cli_compares_against_a_baseline(tmp_path, capsys):
+    results = run_suite(["obfd", "ogbfd"], ["uniform"], [2000], [4096], 0, 1, False)
+    current_path = tmp_path / "current.json"
+    baseline_path = tmp_path / "baseline.json"
+    current_path.write_text(json.dumps(results))
+    for record in results["results"]:
+        record["utilization"] += 0.01
+    baseline_path.write_text(json.dumps(results))
+
+    assert main(["compare", str(current_path), str(current_path)]) == 0
+    assert main(["compare", str(current_path), str(baseline_path)]) == 1
+    assert "2 regressions" in capsys.readouterr().out
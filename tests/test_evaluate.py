@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from lightbinpack import evaluate, obfd, ogbfd
+
+CAPACITY = 4096
+
+
+def _lengths(num_items):
+    return np.random.default_rng(0).integers(1, CAPACITY, num_items).tolist()
+
+
+def _flat(bins):
+    offsets = np.cumsum([0] + [len(bin_items) for bin_items in bins])
+    return np.array([i for bin_items in bins for i in bin_items]), offsets
+
+
+def test_valid_plans_in_every_format():
+    lengths = _lengths(2000)
+    bins = obfd(lengths, CAPACITY)
+
+    result = evaluate(bins, lengths, CAPACITY)
+    assert result["valid"]
+    assert result["num_bins"] == len(bins)
+    assert result["utilization"] == pytest.approx(sum(lengths) / (len(bins) * CAPACITY))
+    assert evaluate(_flat(bins), lengths, CAPACITY) == result
+
+    groups = ogbfd(lengths, CAPACITY, 4)
+    grouped = evaluate(groups, lengths, CAPACITY)
+    assert grouped["valid"]
+    assert grouped["num_groups"] == len(groups)
+
+
+def test_missing_duplicate_and_invalid_items():
+    result = evaluate([[0, 1], [1, 5]], [1, 2, 3], 4)
+
+    assert not result["valid"]
+    assert result["missing"] == 1
+    assert result["duplicates"] == 1
+    assert result["invalid_indices"] == 1
+
+
+def test_overflow_bins():
+    result = evaluate([[0, 1], [2]], [3, 2, 1], 4)
+
+    assert not result["valid"]
+    assert result["overflow_bins"] == 1
+    assert result["missing"] == 0
+
+
+def test_tuple_of_two_bins_is_not_a_flat_plan():
+    # Two bins given as a tuple of lists, not (items, offsets)
+    result = evaluate(([0, 1], [2]), [1, 2, 3], 4)
+
+    assert result["valid"]
+    assert result["num_bins"] == 2
+
+
+def test_flat_plan_with_bad_offsets_is_rejected():
+    items = np.array([0, 1, 2])
+    with pytest.raises(ValueError):
+        evaluate((items, np.array([0, 5])), [1, 2, 3], 4)
@@ -0,0 +1,114 @@
+import bisect
+import time
+
+import numpy as np
+import pytest
+
+from lightbinpack import bfd, evaluate, ffd
+
+
+def _order(lengths):
+    # Descending length, ties by descending index, as the radix sort orders
+    return sorted(range(len(lengths)), key=lambda i: (lengths[i], i), reverse=True)
+
+
+def _reference_bfd(lengths, capacity):
+    bins = []
+    remaining = []
+    index = []  # (remaining, insertion order, bin) kept sorted
+    for step, i in enumerate(_order(lengths)):
+        position = bisect.bisect_left(index, (lengths[i], -1, -1))
+        if position < len(index):
+            _, _, b = index.pop(position)
+        else:
+            b = len(bins)
+            bins.append([])
+            remaining.append(capacity)
+        bins[b].append(i)
+        remaining[b] -= lengths[i]
+        bisect.insort(index, (remaining[b], step, b))
+    return bins
+
+
+def _reference_ffd(lengths, capacity):
+    bins = []
+    remaining = []
+    for i in _order(lengths):
+        b = next((b for b, r in enumerate(remaining) if r >= lengths[i]), len(bins))
+        if b == len(bins):
+            bins.append([])
+            remaining.append(capacity)
+        bins[b].append(i)
+        remaining[b] -= lengths[i]
+    return bins
+
+
+def _inputs():
+    rng = np.random.default_rng(0)
+    yield rng.random(2000).tolist(), 1.0
+    # Many equal lengths and capacities, where tie order matters
+    yield (rng.integers(0, 5, 2000) / 4.0).tolist(), 1.0
+    # Lengths below the smallest capacity bucket
+    yield np.concatenate([rng.random(500) * 1e-12, rng.random(500)]).tolist(), 1.0
+    yield (np.round(rng.random(2000), 3) * 3.5).tolist(), 7.0
+
+
+@pytest.mark.parametrize("lengths, capacity", list(_inputs()))
+def test_radix_path_matches_reference(lengths, capacity):
+    assert bfd(lengths, capacity) == _reference_bfd(lengths, capacity)
+    assert ffd(lengths, capacity) == _reference_ffd(lengths, capacity)
+
+
+def test_numpy_input_matches_list_input():
+    lengths = np.random.default_rng(1).random(300000)
+
+    assert bfd(lengths, 1.0) == bfd(lengths.tolist(), 1.0)
+    assert ffd(lengths, 1.0, 0, 1) == ffd(lengths, 1.0, 0, 4)
+
+
+def test_clustered_capacities_stay_fast():
+    # Every large item leaves a bin just under half full in the same
+    # capacity bucket, then each tiny item moves one of them
+    rng = np.random.default_rng(2)
+    lengths = np.concatenate([0.5 + rng.random(100000) * 1e-3, np.full(400000, 1e-9)])
+
+    start = time.perf_counter()
+    bins = bfd(lengths, 1.0, 0, 1)
+    assert time.perf_counter() - start < 5
+
+    assert len(bins) == 100000
+    assert evaluate(bins, lengths, 1.0)["valid"]
+
+
+@pytest.mark.parametrize("kernel", [ffd, bfd])
+@pytest.mark.parametrize("quantize_levels", [16, 4096, 1 << 22])
+def test_quantized_bins_never_overflow(kernel, quantize_levels):
+    rng = np.random.default_rng(3)
+    # Lengths just above unit boundaries round up the most
+    lengths = np.concatenate(
+        [rng.random(20000), np.full(5000, 1 / 3), np.full(5000, 0.1)]
+    ).tolist()
+
+    bins = kernel(lengths, 1.0, quantize_levels)
+
+    result = evaluate(bins, lengths, 1.0)
+    assert result["valid"]
+    assert result["duplicates"] == 0
+    for bin_items in bins:
+        assert sum(lengths[i] for i in bin_items) <= 1.0
+
+
+def test_quantized_plan_is_close_to_exact():
+    lengths = np.random.default_rng(4).random(20000).tolist()
+
+    exact = len(bfd(lengths, 1.0))
+    assert exact <= len(bfd(lengths, 1.0, 4096)) <= 1.01 * exact
+
+
+def test_invalid_lengths_are_rejected():
+    with pytest.raises(RuntimeError):
+        bfd([0.5, 1.5], 1.0)
+    with pytest.raises(RuntimeError):
+        ffd([0.5, -0.1], 1.0)
+    with pytest.raises(RuntimeError):
+        bfd([0.5], 1.0, 1 << 23)
@@ -0,0 +1,60 @@
+import multiprocessing
+import sys
+import warnings
+
+import numpy as np
+import pytest
+
+from lightbinpack import evaluate, pack
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="fork is not available on Windows"
+)
+
+CAPACITY = 8192
+TIMEOUT = 120
+
+LENGTHS = np.random.default_rng(0).integers(1, 4000, 200000).tolist()
+
+
+def _pack(backend, num_threads):
+    return pack(
+        LENGTHS,
+        CAPACITY,
+        strategy="ogbfd",
+        dp_size=8,
+        enable_parallel=True,
+        num_threads=num_threads,
+        backend=backend,
+    )
+
+
+def _child(queue):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        queue.put((_pack("openmp", 4), _pack("process", 4)))
+
+
+def test_pack_after_fork_matches_parent():
+    # OpenMP runs multi-threaded in the parent before it forks
+    expected = _pack("openmp", 4)
+    single_thread = _pack("openmp", 1)
+
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    child = context.Process(target=_child, args=(queue,))
+    child.start()
+    try:
+        openmp_plan, process_plan = queue.get(timeout=TIMEOUT)
+        child.join(TIMEOUT)
+    finally:
+        if child.is_alive():
+            child.kill()
+    assert child.exitcode == 0
+
+    # OpenMP is clamped to one thread in the child, the process backend
+    # still packs with four workers
+    assert openmp_plan == single_thread
+    assert process_plan == expected
+    for plan in (openmp_plan, process_plan):
+        assert evaluate(plan, LENGTHS, CAPACITY)["valid"]
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from lightbinpack import evaluate, ohgbfd, ohgbfdp, oshgbfd, oshgbfdp, pack
+
+CAPACITIES = [4096, 2048, 2048, 1024]
+COMBINATIONS = [[4096, 2048], [2048, 2048], [4096, 1024, 1024]]
+
+
+def _lengths(distribution, num_items):
+    # Long-context samples fill most of the largest bin, the bimodal mix has
+    # 70% short turns and 30% documents of about half the largest bin
+    rng = np.random.default_rng(num_items)
+    if distribution == "long_context":
+        lengths = 4096 * rng.beta(5.0, 1.5, num_items)
+    else:
+        short = rng.lognormal(np.log(64), 0.5, num_items)
+        long = rng.normal(2048, 512, num_items)
+        lengths = np.where(rng.random(num_items) < 0.7, short, long)
+    return np.clip(np.rint(lengths), 1, 4096).astype(int).tolist()
+
+
+def _check_plan(plan, lengths, capacity):
+    metrics = evaluate(plan, lengths, capacity)
+    assert metrics["valid"], metrics
+    assert metrics["overflow_bins"] == 0
+    assert metrics["missing"] == 0
+
+
+@pytest.mark.parametrize("distribution", ["long_context", "bimodal"])
+@pytest.mark.parametrize("num_items", [57, 3001, 30000])
+def test_last_group_respects_bin_capacities(distribution, num_items):
+    lengths = _lengths(distribution, num_items)
+
+    _check_plan(ohgbfd(lengths, CAPACITIES), lengths, CAPACITIES)
+    _check_plan(ohgbfdp(lengths, CAPACITIES), lengths, CAPACITIES)
+    _check_plan(oshgbfd(lengths, COMBINATIONS), lengths, COMBINATIONS)
+    _check_plan(oshgbfdp(lengths, COMBINATIONS), lengths, COMBINATIONS)
+
+
+def test_long_item_never_lands_in_small_bin():
+    lengths = _lengths("long_context", 30000)
+    plan = ohgbfdp(lengths, CAPACITIES)
+    for group in plan:
+        for bin_items, capacity in zip(group, CAPACITIES):
+            assert sum(lengths[idx] for idx in bin_items) <= capacity
+
+
+@pytest.mark.parametrize("distribution", ["long_context", "bimodal"])
+@pytest.mark.parametrize("capacity", [CAPACITIES, COMBINATIONS])
+def test_process_backend_respects_bin_capacities(distribution, capacity):
+    lengths = _lengths(distribution, 10000)
+    plan = pack(
+        lengths, capacity, enable_parallel=True, num_threads=4, backend="process"
+    )
+    _check_plan(plan, lengths, capacity)
+
+
+@pytest.mark.parametrize("distribution", ["long_context", "bimodal"])
+@pytest.mark.parametrize("weighted", [False, True])
+def test_process_backend_matches_openmp(distribution, weighted):
+    lengths = _lengths(distribution, 10000)
+    weights = lengths[::-1] if weighted else []
+    for capacity, kernel in [(CAPACITIES, ohgbfdp), (COMBINATIONS, oshgbfdp)]:
+        expected = kernel(lengths, capacity, -1, weights, 4)
+        plan = pack(
+            lengths,
+            capacity,
+            enable_parallel=True,
+            num_threads=4,
+            backend="process",
+            weights=weights or None,
+        )
+        assert [list(group) for group in plan] == [list(g) for g in expected]
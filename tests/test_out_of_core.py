@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from lightbinpack import obfd, ogbfd, pack_file
+
+CAPACITY = 4096
+
+
+def _lengths(num_items):
+    return np.random.default_rng(0).integers(1, CAPACITY, num_items).astype(np.int32)
+
+
+def _bins(items, offsets):
+    return [
+        items[offsets[b] : offsets[b + 1]].tolist() for b in range(len(offsets) - 1)
+    ]
+
+
+def test_npy_input_matches_obfd(tmp_path):
+    lengths = _lengths(20000)
+    np.save(tmp_path / "lengths.npy", lengths)
+
+    items, offsets = pack_file(tmp_path / "lengths.npy", tmp_path / "plan", CAPACITY)
+
+    assert _bins(items, offsets) == obfd(lengths.tolist(), CAPACITY)
+    assert not (tmp_path / "plan" / "workspace.npy").exists()
+
+
+@pytest.mark.parametrize("parallel_strategy", [0, 1])
+def test_raw_input_matches_ogbfd(tmp_path, parallel_strategy):
+    lengths = _lengths(20000).astype(np.int64)
+    lengths.tofile(tmp_path / "lengths.bin")
+
+    items, offsets = pack_file(
+        tmp_path / "lengths.bin",
+        tmp_path,
+        CAPACITY,
+        strategy="ogbfd",
+        dp_size=4,
+        parallel_strategy=parallel_strategy,
+        dtype="int64",
+    )
+
+    expected = ogbfd(lengths.tolist(), CAPACITY, 4, -1, parallel_strategy)
+    bins = _bins(items, offsets)
+    assert [bins[g : g + 4] for g in range(0, len(bins), 4)] == expected
+
+
+def test_empty_input_replaces_stale_plan(tmp_path):
+    pack_file(_lengths(100), tmp_path, CAPACITY)
+
+    items, offsets = pack_file(np.zeros(0, dtype=np.int32), tmp_path, CAPACITY)
+
+    assert len(items) == 0
+    assert offsets.tolist() == [0]
+
+
+def test_invalid_input_is_rejected(tmp_path):
+    lengths = _lengths(100)
+    with pytest.raises(ValueError):
+        pack_file(lengths, tmp_path, 0)
+    with pytest.raises(ValueError):
+        pack_file(lengths[::2], tmp_path, CAPACITY)
+    with pytest.raises(ValueError):
+        pack_file(lengths, tmp_path, CAPACITY, strategy="bfd")
+
+
+def test_plan_spanning_several_output_runs(tmp_path):
+    # More than 2^20 items, so the plan is written in several runs
+    lengths = np.random.default_rng(1).integers(1, 64, 1_500_000).astype(np.int32)
+
+    items, offsets = pack_file(lengths, tmp_path, CAPACITY)
+
+    assert _bins(items, offsets) == obfd(lengths.tolist(), CAPACITY)
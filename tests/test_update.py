@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from lightbinpack import PlanUpdater, obfd, ogbfd, pack_update
+
+CAPACITY = 4096
+
+
+def _lengths(num_items, seed=0):
+    return np.random.default_rng(seed).integers(1, CAPACITY // 2, num_items).tolist()
+
+
+def _bins(plan, grouped):
+    return [bin_items for group in plan for bin_items in group] if grouped else plan
+
+
+def _check_plan(plan, lengths, grouped):
+    # Grouped plans may repeat items to fill the last group
+    bins = _bins(plan, grouped)
+    assert {item for bin_items in bins for item in bin_items} == set(
+        range(len(lengths))
+    )
+    for bin_items in bins:
+        assert sum(lengths[item] for item in bin_items) <= CAPACITY
+
+
+def _check_prefix(old_plan, new_plan, grouped):
+    old_bins = _bins(old_plan, grouped)
+    new_bins = _bins(new_plan, grouped)
+    assert len(new_bins) >= len(old_bins)
+    for old_bin, new_bin in zip(old_bins, new_bins):
+        assert new_bin[: len(old_bin)] == old_bin
+
+
+@pytest.mark.parametrize("grouped", [False, True])
+def test_pack_update_keeps_existing_bins(grouped):
+    lengths = _lengths(5000)
+    plan = (
+        ogbfd(lengths[:4000], CAPACITY, 4)
+        if grouped
+        else obfd(lengths[:4000], CAPACITY)
+    )
+    updated = pack_update(plan, lengths, CAPACITY)
+
+    _check_prefix(plan, updated, grouped)
+    _check_plan(updated, lengths, grouped)
+
+
+@pytest.mark.parametrize("grouped", [False, True])
+def test_plan_updater_matches_pack_update(grouped):
+    lengths = _lengths(5000, seed=1)
+    plan = (
+        ogbfd(lengths[:4000], CAPACITY, 4)
+        if grouped
+        else obfd(lengths[:4000], CAPACITY)
+    )
+
+    updater = PlanUpdater(plan, lengths[:4000], CAPACITY)
+    assert updater.update(lengths[4000:]) == pack_update(plan, lengths, CAPACITY)
+    assert updater.num_items == len(lengths)
+
+
+@pytest.mark.parametrize("grouped", [False, True])
+def test_plan_updater_repeated_updates(grouped):
+    lengths = _lengths(8000, seed=2)
+    updater = PlanUpdater([], [], CAPACITY, dp_size=4 if grouped else None)
+    previous = []
+    for start in range(0, len(lengths), 1000):
+        plan = updater.update(lengths[start : start + 1000])
+        _check_prefix(previous, plan, grouped)
+        previous = [
+            [list(bin_items) for bin_items in group] if grouped else list(group)
+            for group in plan
+        ]
+        _check_plan(plan, lengths[: start + 1000], grouped)
+
+
+def test_plan_updater_rejects_invalid_plan():
+    lengths = [3000, 3000]
+    with pytest.raises(RuntimeError):
+        PlanUpdater([[0, 1]], lengths, CAPACITY)
+    with pytest.raises(RuntimeError):
+        PlanUpdater([[0, 2]], lengths, CAPACITY)
@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+import pytest
+
+from lightbinpack import obfd, ogbfd, ovbfd, ovgbfd, pack
+
+CAPACITY = [4096, 64]
+
+
+def _sizes(num_items, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.stack(
+        [
+            rng.integers(1, CAPACITY[0], num_items),
+            rng.integers(0, CAPACITY[1], num_items),
+        ],
+        axis=1,
+    ).astype(np.int64)
+
+
+def _check_plan(bins, sizes, capacity):
+    # Grouped plans may repeat items to fill the last group
+    assert {item for bin_items in bins for item in bin_items} == set(range(len(sizes)))
+    for bin_items in bins:
+        assert (sizes[bin_items].sum(axis=0) <= capacity).all()
+
+
+def test_one_dimension_matches_obfd_and_ogbfd():
+    lengths = _sizes(5000)[:, :1]
+
+    assert ovbfd(lengths, [4096]) == obfd(lengths[:, 0].tolist(), 4096)
+    assert ovgbfd(lengths, [4096], 4) == ogbfd(lengths[:, 0].tolist(), 4096, 4)
+
+
+@pytest.mark.parametrize("strategy", ["ovbfd", "ovgbfd"])
+@pytest.mark.parametrize("max_probes", [-1, 0, 1])
+def test_plans_respect_every_dimension(strategy, max_probes):
+    sizes = _sizes(5000, seed=1)
+
+    plan = pack(sizes, CAPACITY, strategy=strategy, dp_size=4, max_probes=max_probes)
+
+    bins = [b for group in plan for b in group] if strategy == "ovgbfd" else plan
+    _check_plan(bins, sizes, np.array(CAPACITY))
+
+
+def _shared_token_length(num_items):
+    # Every item has the same token length, so all bins share one capacity
+    # and only the second dimension tells them apart
+    rng = np.random.default_rng(2)
+    return np.stack(
+        [np.full(num_items, 100), rng.integers(1, 4000, num_items)], axis=1
+    ).astype(np.int64)
+
+
+@pytest.mark.parametrize("strategy", ["ovbfd", "ovgbfd"])
+def test_shared_token_length_stays_linear(strategy):
+    sizes = _shared_token_length(80000)
+
+    start = time.perf_counter()
+    plan = pack(sizes, [4096, 4096], strategy=strategy, dp_size=4)
+    assert time.perf_counter() - start < 5
+
+    bins = [b for group in plan for b in group] if strategy == "ovgbfd" else plan
+    _check_plan(bins, sizes, np.array([4096, 4096]))
+
+
+@pytest.mark.parametrize("strategy", ["ovbfd", "ovgbfd"])
+def test_probe_bound_keeps_plan_quality(strategy):
+    # Once the probes run out the emptiest bins are tried before a new one
+    sizes = _shared_token_length(10000)
+
+    bounded = pack(sizes, [4096, 4096], strategy=strategy, dp_size=4)
+    unbounded = pack(sizes, [4096, 4096], strategy=strategy, dp_size=4, max_probes=0)
+
+    assert len(bounded) <= 1.05 * len(unbounded)
+
+
+def test_max_probes_is_only_for_vector_strategies():
+    with pytest.raises(ValueError):
+        pack([1, 2, 3], 4, strategy="obfd", max_probes=8)
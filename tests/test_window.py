@@ -0,0 +1,86 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from lightbinpack import evaluate, obfd, owbfd, pack
+
+CAPACITY = 8192
+
+
+def _curriculum(num_items, seed=0):
+    # Typical length grows over the epoch, as in examples/bench_window.py
+    rng = np.random.default_rng(seed)
+    medians = CAPACITY / 64 * (1 + 7 * np.linspace(0.0, 1.0, num_items))
+    lengths = rng.lognormal(np.log(medians), 0.8)
+    return np.clip(np.rint(lengths), 1, CAPACITY).astype(int).tolist()
+
+
+def _max_shift(bins):
+    order = np.fromiter((i for bin_items in bins for i in bin_items), dtype=np.int64)
+    return int(np.abs(order - np.arange(len(order))).max())
+
+
+@pytest.mark.parametrize("window_size", [1, 7, 100, 1000])
+@pytest.mark.parametrize("max_open_bins", [-1, 0, 2])
+def test_items_move_less_than_two_windows(window_size, max_open_bins):
+    lengths = _curriculum(20000)
+
+    bins = owbfd(lengths, CAPACITY, window_size, -1, max_open_bins)
+
+    assert evaluate(bins, lengths, CAPACITY)["valid"]
+    assert _max_shift(bins) < 2 * window_size
+    for bin_items in bins:
+        assert bin_items == sorted(bin_items)
+        windows = {i // window_size for i in bin_items}
+        assert max(windows) - min(windows) <= (0 if max_open_bins == 0 else 1)
+
+
+@pytest.mark.parametrize("max_open_bins", [0, 1, 3])
+def test_open_bins_are_bounded(max_open_bins):
+    window_size = 100
+    lengths = _curriculum(20000, seed=1)
+
+    bins = owbfd(lengths, CAPACITY, window_size, -1, max_open_bins)
+
+    carried = Counter(
+        bin_items[0] // window_size
+        for bin_items in bins
+        if bin_items[-1] // window_size != bin_items[0] // window_size
+    )
+    assert max(carried.values(), default=0) <= max_open_bins
+
+
+def test_carrying_bins_approaches_obfd():
+    lengths = _curriculum(50000, seed=2)
+    closed = evaluate(owbfd(lengths, CAPACITY, 100, -1, 0), lengths, CAPACITY)
+    carried = evaluate(owbfd(lengths, CAPACITY, 100), lengths, CAPACITY)
+    reference = evaluate(obfd(lengths, CAPACITY), lengths, CAPACITY)
+
+    assert carried["utilization"] > closed["utilization"]
+    assert carried["utilization"] > 0.99 * reference["utilization"]
+
+
+def test_single_window_matches_obfd():
+    lengths = _curriculum(5000, seed=3)
+
+    assert len(owbfd(lengths, CAPACITY)) == len(obfd(lengths, CAPACITY))
+
+
+def test_pack_options():
+    lengths = [5, 3, 8, 2, 7, 1]
+
+    assert pack(lengths, 10, strategy="owbfd", window_size=3) == [
+        [0, 1, 3],
+        [2, 5],
+        [4],
+    ]
+    assert pack(lengths, 10, strategy="owbfd", window_size=3, max_open_bins=0) == [
+        [0, 1],
+        [2],
+        [3, 4, 5],
+    ]
+    with pytest.raises(ValueError):
+        pack(lengths, 10, strategy="obfd", max_open_bins=1)
+    with pytest.raises(RuntimeError):
+        pack([5, 11], 10, strategy="owbfd", window_size=1)